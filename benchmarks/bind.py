@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+
+"""Benchmark BIND master file import and export.
+
+Usage: python benchmarks/bind.py [lines]
+
+Writes a master file of ``lines`` records (default: one million) to a
+temporary directory, parses it with ``pdorclient.bind.parse()`` and
+writes it back out with ``pdorclient.bind.dump()``.  No server is
+needed.  Peak resident set size is reported after parsing alone, to
+show that parsing runs in constant memory, and again after the records
+have been collected into a zone for export.
+
+"""
+
+import os
+import pdorclient
+import pdorclient.bind
+import resource
+import shutil
+import sys
+import tempfile
+import time
+
+def peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+def generate(path, lines):
+    f = open(path, 'w')
+    f.write('$ORIGIN bench.example.\n$TTL 3600\n')
+    f.write('@ IN SOA ns1 hostmaster 1 10800 900 604800 86400\n')
+    f.write('  IN NS ns1\n')
+    types = (
+      'IN A 192.0.2.%d',
+      '300 IN AAAA 2001:db8::%x',
+      'IN MX %d mail',
+      'IN CNAME www',
+      'IN TXT "v=spf1 -all %d"',
+    )
+    for i in xrange(lines - 2):
+        fmt = types[i % len(types)]
+        if '%' in fmt:
+            fmt = fmt % (i % 250)
+        f.write('h%d %s\n' % (i, fmt))
+    f.close()
+
+def main(argv):
+    if len(argv) > 1:
+        lines = int(argv[1])
+    else:
+        lines = 1000000
+
+    config = pdorclient.Config()
+    tmp = tempfile.mkdtemp()
+    try:
+        src = os.path.join(tmp, 'in.zone')
+        dst = os.path.join(tmp, 'out.zone')
+        generate(src, lines)
+
+        start = time.time()
+        count = 0
+        for r in pdorclient.bind.parse(open(src), config=config):
+            count += 1
+        elapsed = time.time() - start
+        print 'parse:  %d records in %.2fs (%d/s), peak RSS %d MiB' % (
+          count, elapsed, count / elapsed, peak_rss())
+
+        zone = pdorclient.Zone(name='bench.example',
+          type=pdorclient.Zone.TYPE_MASTER, ttl=3600, config=config)
+        zone.records.extend(pdorclient.bind.parse(open(src),
+          config=config))
+        start = time.time()
+        pdorclient.bind.dump(zone, open(dst, 'w'))
+        elapsed = time.time() - start
+        print 'export: %d records in %.2fs (%d/s), peak RSS %d MiB' % (
+          count, elapsed, count / elapsed, peak_rss())
+    finally:
+        shutil.rmtree(tmp)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+
+"""Benchmark a capacity report over the records of a zone.
+
+Usage: python benchmarks/columns.py [records]
+
+Starts a small stand-in for PowerDNS on Rails in a child process,
+serving one zone of ``records`` RRs (default: 100000) of mixed types
+and TTLs.  Then counts RRs by TTL and by type, and groups the ``MX``
+RRs by content, through:
+
+``records``
+  ``Zone.lookup()`` and the attributes of each ``Record``;
+``columns``
+  ``pdorclient.columns.lookup()`` and the view's ``count()``,
+  ``filter()`` and ``group()``.
+
+Reports the best time of ``ROUNDS`` rounds to build each from the
+server's response, and to compute the report from it.  Run with a
+``pdorclient.conf`` in the current directory; its ``url`` is ignored.
+
+"""
+
+import pdorclient
+import pdorclient.columns
+import standin
+import sys
+import time
+
+ROUNDS = 3
+
+def record(i):
+    (rtype, content, prio) = (('A', '192.0.2.%d' % (i % 250), None),
+      ('AAAA', '2001:db8::%x' % i, None),
+      ('MX', 'mx%d.bench.example' % (i % 4), 10))[i % 3]
+    return standin.record(i + 1, content=content, type=rtype,
+      ttl=(300, 3600, 86400)[i % 7 % 3], prio=prio, timestamps=True)
+
+def report_records(zone):
+    ttls = {}
+    types = {}
+    mx = {}
+    for r in zone.records:
+        ttls[r.ttl] = ttls.get(r.ttl, 0) + 1
+        types[r.rtype] = types.get(r.rtype, 0) + 1
+        if r.type == pdorclient.Record.TYPE_MX:
+            mx.setdefault(r.content, []).append(r)
+    return (ttls, types, dict(map(lambda (k, v): (k, len(v)),
+      mx.iteritems())))
+
+def report_columns(view):
+    names = pdorclient.Record._type_names()
+    return (view.count('ttl'), dict(map(lambda (k, v): (names[k], v),
+      view.count('type').iteritems())), dict(map(lambda (k, v): (k,
+      len(v)), view.filter(type='MX').group('content').iteritems())))
+
+def main(argv):
+    records = 100000
+    if len(argv) > 1:
+        records = int(argv[1])
+
+    (pid, url) = standin.serve(xml=standin.zone(map(record,
+      xrange(records))))
+    try:
+        client = pdorclient.Client()
+        client.url = url
+        reports = []
+        for (name, build, report) in (
+          ('records', lambda: client.lookup('bench.example'),
+            report_records),
+          ('columns', lambda: pdorclient.columns.lookup('bench.example',
+            config=client), report_columns)):
+            build_times = []
+            report_times = []
+            for i in range(ROUNDS):
+                start = time.time()
+                built = build()
+                build_times.append(time.time() - start)
+                start = time.time()
+                result = report(built)
+                report_times.append(time.time() - start)
+                del built
+            reports.append(result)
+            print '%-7s %d records: build best %.3fs, report best %.3fs' % (
+              name, records, min(build_times), min(report_times))
+        assert reports[0] == reports[1]
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
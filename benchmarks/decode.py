@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+
+"""Benchmark decoding of zone responses.
+
+Usage: python benchmarks/decode.py [records]
+
+Builds the XML the server sends for a zone of ``records`` RRs (default:
+10000) and decodes it into ``Zone`` and ``Record`` instances, first
+through ``lxml.objectify`` as this library used to and then through
+the typed extractor behind ``Zone.lookup()``.  No server is needed.
+
+Both paths share today's constructors and date parsing, so the speedup
+reported covers XML parsing and field extraction alone.
+
+"""
+
+import pdorclient
+import pdorclient.utils
+import sys
+import time
+
+RUNS = 5
+
+RECORD = (
+  '<record type="A">'
+    '<change-date type="integer">1306134000</change-date>'
+    '<content>192.0.2.%(octet)d</content>'
+    '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+    '<domain-id type="integer">1</domain-id>'
+    '<id type="integer">%(id)d</id>'
+    '<name>host%(id)d.bench.example</name>'
+    '<prio type="integer" nil="true"></prio>'
+    '<ttl type="integer">3600</ttl>'
+    '<type>A</type>'
+    '<updated-at type="datetime">2011-05-23T07:00:00Z</updated-at>'
+  '</record>'
+)
+
+ZONE = (
+  '<?xml version="1.0" encoding="UTF-8"?>'
+  '<domain>'
+    '<account nil="true"></account>'
+    '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+    '<id type="integer">1</id>'
+    '<last-check type="integer" nil="true"></last-check>'
+    '<master nil="true"></master>'
+    '<name>bench.example</name>'
+    '<notes nil="true"></notes>'
+    '<notified-serial type="integer" nil="true"></notified-serial>'
+    '<ttl type="integer">3600</ttl>'
+    '<type>NATIVE</type>'
+    '<updated-at type="datetime">2011-05-23T07:00:00Z</updated-at>'
+    '<records type="array">%s</records>'
+  '</domain>'
+)
+
+def objectify_from_xml(klass, xmlobj, config):
+    # ``Resource.from_xml()`` as it was before the typed extractor.
+    attrs = {}
+    for attr in klass.ATTRS.keys():
+        (conv_in, conv_out, default, emit) = klass.ATTRS[attr]
+        if attr in xmlobj.attrib.keys():
+            raw_value = xmlobj.attrib[attr]
+        else:
+            raw_value = getattr(xmlobj, attr, None)
+        if raw_value == '':
+            raw_value = default
+        if raw_value != None:
+            attrs[attr.replace('-', '_')] = \
+              eval(conv_in.replace('#', "'%s'" % raw_value),
+              vars(pdorclient))
+    attrs['config'] = config
+    return klass(**attrs)
+
+def objectify_decode(xml, config):
+    xmlobj = pdorclient.utils.xmlobjify(xml)
+    zone = objectify_from_xml(pdorclient.Zone, xmlobj, config)
+    for r in xmlobj.records.iterchildren():
+        zone.records.append(objectify_from_xml(pdorclient.Record, r,
+          config))
+    return zone
+
+def extractor_decode(xml, config):
+    return pdorclient.Zone._decode(xml, True, config)
+
+def bench(name, decode, xml, config, count):
+    times = []
+    for i in range(RUNS):
+        start = time.time()
+        zone = decode(xml, config)
+        times.append(time.time() - start)
+    assert len(zone.records) == count
+    rate = count / min(times)
+    print '%-10s %d records in %.3fs (%d records/s, best of %d)' % (
+      name, count, min(times), rate, RUNS)
+    return rate
+
+def main(argv):
+    if len(argv) > 1:
+        count = int(argv[1])
+    else:
+        count = 10000
+
+    config = pdorclient.Config()
+    xml = unicode(ZONE % ''.join(map(
+      lambda i: RECORD % {'id': i, 'octet': i % 250}, xrange(count))))
+
+    before = bench('objectify', objectify_decode, xml, config, count)
+    after = bench('extractor', extractor_decode, xml, config, count)
+    print 'speedup    %.1fx' % (after / before)
+
+if __name__ == '__main__':
+    main(sys.argv)
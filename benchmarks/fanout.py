@@ -0,0 +1,128 @@
+#!/usr/bin/env python
+
+"""Benchmark decoding a big zone in a pool of worker processes.
+
+Usage: python benchmarks/fanout.py [records] [processes...]
+
+Serves the XML for a zone of ``records`` RRs (default: 100000) from a
+local HTTP server and times, for each number of ``processes`` (default:
+1, 2, 4 and the number of CPUs):
+
+``lookup``
+  ``Zone.lookup(..., processes=n)``, from the request to the last
+  ``Record`` instance;
+``jsonl``
+  ``list(jsonl.parse(lines, processes=n))`` over the same records as
+  JSON lines.
+
+One process decodes in the calling process, as without fan-out.
+Reports the best of three runs and the speed-up over one process.  The
+parent still builds every ``Record`` instance, so the speed-up levels
+off well short of the number of cores.  Run with a ``pdorclient.conf``
+in the current directory; its ``url`` is ignored.
+
+"""
+
+import BaseHTTPServer
+import multiprocessing
+import pdorclient
+import pdorclient.jsonl
+import sys
+import threading
+import time
+
+RUNS = 3
+
+RECORD = (
+  '<record>'
+    '<change-date type="integer">1306134000</change-date>'
+    '<content>192.0.2.%(octet)d</content>'
+    '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+    '<domain-id type="integer">1</domain-id>'
+    '<id type="integer">%(id)d</id>'
+    '<name>host%(id)d.bench.example</name>'
+    '<prio type="integer" nil="true"></prio>'
+    '<ttl type="integer">3600</ttl>'
+    '<type>A</type>'
+    '<updated-at type="datetime">2011-05-23T07:00:00Z</updated-at>'
+  '</record>'
+)
+
+ZONE = (
+  '<?xml version="1.0" encoding="UTF-8"?>'
+  '<domain>'
+    '<id type="integer">1</id>'
+    '<name>bench.example</name>'
+    '<type>MASTER</type>'
+    '<records type="array">%s</records>'
+  '</domain>'
+)
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/xml; charset=utf-8')
+        self.send_header('Content-Length', str(len(self.server.xml)))
+        self.end_headers()
+        self.wfile.write(self.server.xml)
+
+    def log_message(self, *args):
+        pass
+
+def serve(xml):
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    server.xml = xml
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    return server
+
+def best(func):
+    times = []
+    for run in range(RUNS):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+def main(argv):
+    records = 100000
+    processes = sorted(set((1, 2, 4, multiprocessing.cpu_count())))
+    if len(argv) > 1:
+        records = int(argv[1])
+    if len(argv) > 2:
+        processes = map(int, argv[2:])
+
+    xml = ZONE % ''.join(map(lambda i: RECORD % {'id': i,
+      'octet': i % 250}, xrange(records)))
+    server = serve(xml)
+    config = pdorclient.Config()
+    config.config.set('client', 'url',
+      'http://127.0.0.1:%d' % server.server_address[1])
+
+    zone = pdorclient.Zone.lookup(1, config=config)
+    assert len(zone.records) == records
+    lines = list(pdorclient.jsonl.iterlines(zone.records))
+    del zone
+
+    print '%d records, %d bytes of XML, %d CPUs' % (records, len(xml),
+      multiprocessing.cpu_count())
+    baseline = {}
+    for n in processes:
+        for (name, func) in (
+          ('lookup', lambda: pdorclient.Zone.lookup(1, config=config,
+            processes=n)),
+          ('jsonl', lambda: list(pdorclient.jsonl.parse(lines,
+            config=config, processes=n)))):
+            seconds = best(func)
+            baseline.setdefault(name, seconds)
+            print '%-6s %2d processes: %.3fs (%d records/s, %.2fx)' % (
+              name, n, seconds, records / seconds,
+              baseline[name] / seconds)
+    server.shutdown()
+
+if __name__ == '__main__':
+    main(sys.argv)
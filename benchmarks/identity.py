@@ -0,0 +1,64 @@
+#!/usr/bin/env python
+
+"""Benchmark repeated lookups of one zone with and without an identity
+map.
+
+Usage: python benchmarks/identity.py [records] [lookups]
+
+Starts a small stand-in for PowerDNS on Rails in a child process,
+serving one zone of ``records`` RRs (default: 20000), then looks the
+zone up ``lookups`` times (default: 5), keeping every result, through:
+
+``plain``
+  a ``pdorclient.Client``, which builds new instances every time;
+``identity``
+  a ``pdorclient.Client(identity_map=True)``, which updates the
+  instances it already holds.
+
+Reports the ``Record`` instances alive afterwards and the best time of
+a lookup.  Run with a ``pdorclient.conf`` in the current directory; its
+``url`` is ignored.
+
+"""
+
+import gc
+import pdorclient
+import standin
+import sys
+import time
+
+def live_records():
+    gc.collect()
+    return len(filter(lambda o: isinstance(o, pdorclient.Record),
+      gc.get_objects()))
+
+def main(argv):
+    records = 20000
+    lookups = 5
+    if len(argv) > 1:
+        records = int(argv[1])
+    if len(argv) > 2:
+        lookups = int(argv[2])
+
+    (pid, url) = standin.serve(xml=standin.zone(map(lambda i:
+      standin.record(i + 1, timestamps=True), xrange(records))))
+    try:
+        for (name, identity_map) in (('plain', False), ('identity', True)):
+            client = pdorclient.Client(identity_map=identity_map)
+            client.url = url
+            before = live_records()
+            zones = []
+            times = []
+            for i in range(lookups):
+                start = time.time()
+                zones.append(client.lookup('bench.example'))
+                times.append(time.time() - start)
+            print '%-8s %d lookups of %d records: %d records alive, ' \
+              'best lookup %.3fs' % (name, lookups, records,
+              live_records() - before, min(times))
+            del zones
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
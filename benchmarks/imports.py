@@ -0,0 +1,96 @@
+#!/usr/bin/env python
+
+"""Benchmark importing this library.
+
+Usage: python benchmarks/imports.py [runs]
+
+Times, in ``runs`` fresh interpreters each (default: 10):
+
+``pdorclient``
+  ``import pdorclient``;
+``Config``
+  ``import pdorclient`` and reading the configuration;
+``jsonl``
+  ``import pdorclient.jsonl``;
+``cli``
+  ``import pdorclient.cli``.
+
+Reports the best and median times, then breaks ``import pdorclient``
+down by module the way Python 3's ``-X importtime`` does: the time
+spent in each module's own code (self) and with everything it imported
+(cumulative), in microseconds, with nested imports indented.  No server
+is needed.  Run with a ``pdorclient.conf`` in the current directory.
+
+"""
+
+import subprocess
+import sys
+
+TIMED = '''
+import time
+start = time.time()
+%s
+print time.time() - start
+'''
+
+BREAKDOWN = '''
+import __builtin__
+import sys
+import time
+
+_import = __builtin__.__import__
+stack = []
+rows = []
+
+def timed(name, *args, **kwargs):
+    n = len(sys.modules)
+    stack.append(0.0)
+    start = time.time()
+    try:
+        return _import(name, *args, **kwargs)
+    finally:
+        cumulative = time.time() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += cumulative
+        if len(sys.modules) > n:
+            rows.append((len(stack), name, cumulative - children,
+              cumulative))
+
+__builtin__.__import__ = timed
+import pdorclient
+__builtin__.__import__ = _import
+
+print 'import time: self [us] | cumulative | imported package'
+for (depth, name, self, cumulative) in rows:
+    print 'import time: %9d | %10d | %s%s' % (self * 1e6, cumulative * 1e6,
+      '  ' * depth, name)
+'''
+
+def run(code):
+    p = subprocess.Popen([sys.executable, '-c', code],
+      stdout=subprocess.PIPE)
+    out = p.communicate()[0]
+    assert p.returncode == 0
+    return out
+
+def main(argv):
+    runs = 10
+    if len(argv) > 1:
+        runs = int(argv[1])
+
+    for (name, code) in (
+      ('pdorclient', 'import pdorclient'),
+      ('Config', 'import pdorclient\npdorclient.Config().url'),
+      ('jsonl', 'import pdorclient.jsonl'),
+      ('cli', 'import pdorclient.cli')):
+        times = sorted(map(lambda i: float(run(TIMED % code)),
+          range(runs)))
+        print '%-10s best %.1fms, median %.1fms over %d runs' % (name,
+          times[0] * 1e3, times[len(times) / 2] * 1e3, runs)
+
+    print
+    sys.stdout.write(run(BREAKDOWN))
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+
+"""Report the memory held by the records of big zones.
+
+Usage: python benchmarks/memory.py [records]
+
+Builds the XML for two zones of ``records`` RRs (default: 50000):
+
+``hosting``
+  a forward zone shaped like a web host's: every host has ``A``,
+  ``AAAA``, ``MX`` and ``TXT`` records; ``MX`` records point at three
+  mail hosts; ``TXT`` records carry one SPF policy; TTLs are drawn from
+  three values and timestamps from twenty bulk imports;
+``reverse``
+  a reverse zone of ``PTR`` records, whose names and contents are all
+  different.
+
+Each zone is decoded twice: one record at a time with
+``Record.from_xml()``, which shares nothing, and as ``Zone.lookup()``
+does, which shares repeated values between the zone's records.  Reports
+decode time, the number of distinct value objects the records hold and
+their size, counting each object once.  No server is needed.  Run with
+a ``pdorclient.conf`` in the current directory.
+
+"""
+
+import datetime
+import lxml.etree
+import pdorclient
+import sys
+import time
+
+FMT = pdorclient.Resource.ENCODED_DATE_FMT
+
+RECORD = (
+  '<record>'
+    '<content>%(content)s</content>'
+    '<created-at type="datetime">%(ts)s</created-at>'
+    '<domain-id type="integer">1</domain-id>'
+    '<id type="integer">%(id)d</id>'
+    '<name>%(name)s</name>'
+    '<prio type="integer">%(prio)s</prio>'
+    '<ttl type="integer">%(ttl)d</ttl>'
+    '<type>%(type)s</type>'
+    '<updated-at type="datetime">%(ts)s</updated-at>'
+  '</record>'
+)
+
+ZONE = (
+  '<?xml version="1.0" encoding="UTF-8"?>'
+  '<domain>'
+    '<id type="integer">1</id>'
+    '<name>%s</name>'
+    '<type>MASTER</type>'
+    '<records type="array">%s</records>'
+  '</domain>'
+)
+
+IMPORTS = map(lambda i: (datetime.datetime(2011, 5, 23, 7, 0, 0) +
+  datetime.timedelta(days=i)).strftime(FMT), range(20))
+SPF = 'v=spf1 mx include:_spf.hosting.example ~all'
+TTLS = (300, 3600, 86400)
+
+def hosting(i):
+    host = 'www%d.hosting.example' % (i / 4)
+    (type, content, prio) = (
+      ('A', '192.0.%d.%d' % (i / 1000 % 250, i % 250), 0),
+      ('AAAA', '2001:db8::%x' % i, 0),
+      ('MX', 'mx%d.hosting.example' % (i % 3), 10),
+      ('TXT', SPF, 0),
+    )[i % 4]
+    return {'name': host, 'type': type, 'content': content, 'prio': prio,
+      'ttl': TTLS[i / 4 % 3], 'ts': IMPORTS[i / 4 % 20]}
+
+def reverse(i):
+    return {'name': '%d.%d.10.in-addr.arpa' % (i % 250, i / 250),
+      'type': 'PTR', 'content': 'host%d.hosting.example' % i,
+      'prio': 0, 'ttl': 3600, 'ts': IMPORTS[i % 20]}
+
+def held(records):
+    """Return ``(objects, bytes)`` for the distinct values held by
+    ``records``."""
+    seen = {}
+    for r in records:
+        for value in r._repr.itervalues():
+            seen[id(value)] = value
+    return (len(seen), sum(map(sys.getsizeof, seen.itervalues())))
+
+def main(argv):
+    records = 50000
+    if len(argv) > 1:
+        records = int(argv[1])
+
+    config = pdorclient.Config()
+    for (name, shape) in (('hosting', hosting), ('reverse', reverse)):
+        xml = ZONE % ('%s.example' % name, ''.join(map(lambda i:
+          RECORD % dict(shape(i), id=i + 1), xrange(records))))
+
+        start = time.time()
+        root = lxml.etree.fromstring(xml)
+        unshared = map(lambda r: pdorclient.Record.from_xml(r, config),
+          root.iterfind('records/record'))
+        unshared_seconds = time.time() - start
+
+        start = time.time()
+        zone = pdorclient.Zone._decode(xml, True, config)
+        shared_seconds = time.time() - start
+
+        (unshared_objects, unshared_bytes) = held(unshared)
+        (shared_objects, shared_bytes) = held(zone.records)
+        print '%-8s %d records: %d values in %.1fMB unshared (%.3fs), ' \
+          '%d values in %.1fMB shared (%.3fs), %.1fMB (%d%%) saved' % (
+          name, records, unshared_objects, unshared_bytes / 1048576.0,
+          unshared_seconds, shared_objects, shared_bytes / 1048576.0,
+          shared_seconds, (unshared_bytes - shared_bytes) / 1048576.0,
+          100 * (unshared_bytes - shared_bytes) / unshared_bytes)
+        del unshared, zone
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+
+"""Benchmark looking up zones that do not exist.
+
+Usage: python benchmarks/misses.py [lookups] [names]
+
+Starts a small stand-in for PowerDNS on Rails in a child process that
+hosts no zones.  Every search takes ``LATENCY`` seconds on the server,
+as a stand-in for the work Rails does.  Then makes ``lookups`` calls to
+``Zone.lookup_id()`` (default: 1000) for names drawn from ``names``
+(default: 50) that do not exist:
+
+``uncached``
+  with ``cache=False``, so that every miss is searched for;
+``cached``
+  with ``cache=True``, so that repeated misses are answered from the
+  miss cache.
+
+Reports searches sent and wall time for each.  Run with a
+``pdorclient.conf`` in the current directory; its ``url`` is ignored.
+
+"""
+
+import pdorclient
+import pdorclient.errors
+import standin
+import sys
+import time
+import urlparse
+
+LATENCY = 0.01
+
+class Handler(standin.Handler):
+    def do_GET(self):
+        if urlparse.urlsplit(self.path).path == '/stats':
+            standin.Handler.do_GET(self)
+            return
+        time.sleep(LATENCY)
+        self.reply('[]', 'application/json')
+
+def main(argv):
+    lookups = 1000
+    names = 50
+    if len(argv) > 1:
+        lookups = int(argv[1])
+    if len(argv) > 2:
+        names = int(argv[2])
+
+    (pid, url) = standin.serve(Handler)
+    try:
+        config = pdorclient.Config()
+        config.config.set('client', 'url', url)
+
+        for (name, cache) in (('uncached', False), ('cached', True)):
+            pdorclient.Resource._miss_cache.clear()
+            before = standin.stats(url)['GET']
+            start = time.time()
+            for i in xrange(lookups):
+                try:
+                    pdorclient.Zone.lookup_id('typo%d.example' % (i % names),
+                      config, cache=cache)
+                except pdorclient.errors.NameNotFoundError:
+                    pass
+            seconds = time.time() - start
+            print '%-8s %d lookups of %d names: %4d searches in %.3fs' % (
+              name, lookups, names, standin.stats(url)['GET'] - before,
+              seconds)
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+
+"""Benchmark attribute writes on the records of a big zone.
+
+Usage: python benchmarks/mutate.py [mutations] [records]
+
+Builds a persisted zone of ``records`` RRs (default: 100000) and makes
+``mutations`` attribute writes (default: 1000000) across them, as a
+bulk edit would: each write goes through the read-only check and dirty
+tracking of ``Resource.__setattr__()`` and marks the record as pending
+in its zone.  Each record is then parameterised for its ``PUT``.  No
+server is needed.
+
+"""
+
+import pdorclient
+import sys
+import time
+
+RUNS = 3
+
+# Attributes written in turn, with the value written on the ``i``th
+# mutation.
+WRITES = (
+  ('ttl', lambda i: 60 + i % 3600),
+  ('content', lambda i: '198.51.100.%d' % (i % 250)),
+  ('prio', lambda i: i % 10),
+  ('name', lambda i: 'host%d.bench.example' % (i % 1000)),
+)
+
+def build(records, config):
+    zone = pdorclient.Zone(name='bench.example',
+      type=pdorclient.Zone.TYPE_MASTER, id=1, config=config)
+    zone.records = map(lambda i: pdorclient.Record(
+      name='host%d.bench.example' % i, type=pdorclient.Record.TYPE_A,
+      content='192.0.2.%d' % (i % 250), ttl=3600, id=i + 1, domain_id=1,
+      config=config), xrange(records))
+    return zone
+
+def main(argv):
+    mutations = 1000000
+    records = 100000
+    if len(argv) > 1:
+        mutations = int(argv[1])
+    if len(argv) > 2:
+        records = int(argv[2])
+
+    config = pdorclient.Config()
+    writes = map(lambda i: (WRITES[i % len(WRITES)][0],
+      WRITES[i % len(WRITES)][1](i)), xrange(len(WRITES) * 250))
+
+    mutate_times = []
+    parameterise_times = []
+    for run in range(RUNS):
+        zone = build(records, config)
+        targets = zone.records
+        start = time.time()
+        for i in xrange(mutations):
+            (attr, value) = writes[i % len(writes)]
+            setattr(targets[i % records], attr, value)
+        mutate_times.append(time.time() - start)
+
+        start = time.time()
+        for r in targets:
+            r._parameterise()
+        parameterise_times.append(time.time() - start)
+    assert len(zone._pending) == min(mutations, records)
+
+    best = min(mutate_times)
+    print '%d mutations across %d records in %.3fs ' \
+      '(%d mutations/s, %.2fus/mutation, best of %d)' % (mutations,
+      records, best, mutations / best, best / mutations * 1e6, RUNS)
+    best = min(parameterise_times)
+    print '%d dirty records parameterised in %.3fs (%.1fus/record)' % (
+      records, best, best / records * 1e6)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,119 @@
+#!/usr/bin/env python
+
+"""Benchmark looking up the records of a zone that match several
+substrings, or that are of some types only.
+
+Usage: python benchmarks/patterns.py [records]
+
+Starts a small stand-in for PowerDNS on Rails in a child process,
+serving one zone of ``records`` RRs (default: 50000), named for 100
+rooms and alternately of type ``A``, ``TXT`` and ``MX``.  Every request
+takes ``LATENCY`` seconds on the server, as a stand-in for the work
+Rails does.  Then fetches the RRs of rooms 40 to 49, room 41 and rooms
+50 to 59, the second covered by the first:
+
+``separate``
+  with one ``Zone.lookup()`` per substring;
+``patterns``
+  with one ``Zone.lookup()`` given all three;
+
+and the ``MX`` RRs of the whole zone:
+
+``filtered``
+  with ``Zone.lookup()`` and a filter over the ``Record`` instances;
+``types``
+  with ``Zone.lookup(types=['MX'])``.
+
+Each runs on a new ``pdorclient.Client`` of its own.  Reports requests
+sent, bytes received, the ``Record`` instances built and the best wall
+time of ``ROUNDS`` rounds.  Run with a ``pdorclient.conf`` in the
+current directory; its ``url`` is ignored.
+
+"""
+
+import itertools
+import pdorclient
+import standin
+import sys
+import time
+import urlparse
+
+LATENCY = 0.05
+ROUNDS = 3
+
+PATTERNS = ['r04', 'r041', 'r05']
+
+class Handler(standin.Handler):
+    def do_GET(self):
+        url = urlparse.urlsplit(self.path)
+        if url.path == '/stats':
+            standin.Handler.do_GET(self)
+            return
+
+        time.sleep(LATENCY)
+        if url.path == '/search/results':
+            standin.Handler.do_GET(self)
+        else:
+            match = urlparse.parse_qs(url.query).get('record', [''])[0]
+            self.reply(standin.zone(map(lambda (name, r): r,
+              filter(lambda (name, r): match in name, self.server.records))))
+
+def main(argv):
+    records = 50000
+    if len(argv) > 1:
+        records = int(argv[1])
+
+    rrs = []
+    for i in xrange(records):
+        name = 'r%03d-host%d.bench.example' % (i % 100, i)
+        (rtype, content) = (('A', '192.0.2.%d' % (i % 250)),
+          ('TXT', 'asset tag %d' % i), ('MX', 'mail.bench.example'))[i % 3]
+        rrs.append((name, standin.record(i + 1, name, content, rtype)))
+
+    def separate(client):
+        return sum(map(lambda p: len(client.lookup('bench.example',
+          match=p).records), PATTERNS))
+
+    def patterns(client):
+        return len(client.lookup('bench.example', match=PATTERNS).records)
+
+    def filtered(client):
+        return len(filter(lambda r: r.type == pdorclient.Record.TYPE_MX,
+          client.lookup('bench.example').records))
+
+    def types(client):
+        return len(client.lookup('bench.example', types=['MX']).records)
+
+    (pid, url) = standin.serve(Handler, records=rrs)
+    try:
+        for (name, func) in (('separate', separate), ('patterns', patterns),
+          ('filtered', filtered), ('types', types)):
+            times = []
+            before = standin.stats(url)
+            # Records are built in several threads at once.
+            built = itertools.count()
+            init = pdorclient.Record.__init__
+            def counted(self, *args, **kwargs):
+                built.next()
+                init(self, *args, **kwargs)
+            pdorclient.Record.__init__ = counted
+            try:
+                for i in range(ROUNDS):
+                    client = pdorclient.Client()
+                    client.url = url
+                    start = time.time()
+                    kept = func(client)
+                    times.append(time.time() - start)
+            finally:
+                pdorclient.Record.__init__ = init
+            after = standin.stats(url)
+            print '%-8s %2d requests, %9d bytes, %6d records built, ' \
+              '%6d kept, best %.3fs' % (name,
+              (after['GET'] - before['GET']) / ROUNDS,
+              (after['bytes'] - before['bytes']) / ROUNDS,
+              built.next() / ROUNDS, kept, min(times))
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,85 @@
+#!/usr/bin/env python
+
+"""Benchmark the refresh of newly created, templated zones.
+
+Usage: python benchmarks/refresh.py [zones] [records]
+
+Feeds ``Zone._refresh()`` the response the server sends after creating
+a zone from a template of ``records`` RRs (default: 20), once for each
+of ``zones`` new zones (default: 2000).  This is the client-side work
+``Zone.save()`` does for each zone after the request itself.  No
+server is needed.
+
+"""
+
+import pdorclient
+import sys
+import time
+
+RUNS = 5
+
+RECORD = (
+  '<record type="%(type)s">'
+    '<change-date type="integer">1306134000</change-date>'
+    '<content>%(content)s</content>'
+    '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+    '<domain-id type="integer">1</domain-id>'
+    '<id type="integer">%(id)d</id>'
+    '<name>%(name)s</name>'
+    '<prio type="integer" nil="true"></prio>'
+    '<ttl type="integer">3600</ttl>'
+    '<type>%(type)s</type>'
+    '<updated-at type="datetime">2011-05-23T07:00:00Z</updated-at>'
+  '</record>'
+)
+
+ZONE = (
+  '<?xml version="1.0" encoding="UTF-8"?>'
+  '<domain>'
+    '<account nil="true"></account>'
+    '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+    '<id type="integer">1</id>'
+    '<last-check type="integer" nil="true"></last-check>'
+    '<master nil="true"></master>'
+    '<name>bench.example</name>'
+    '<notes nil="true"></notes>'
+    '<notified-serial type="integer" nil="true"></notified-serial>'
+    '<ttl type="integer">3600</ttl>'
+    '<type>MASTER</type>'
+    '<updated-at type="datetime">2011-05-23T07:00:00Z</updated-at>'
+    '<zone-template-name>bench</zone-template-name>'
+    '<records type="array">%s</records>'
+  '</domain>'
+)
+
+def main(argv):
+    zones = 2000
+    records = 20
+    if len(argv) > 1:
+        zones = int(argv[1])
+    if len(argv) > 2:
+        records = int(argv[2])
+
+    config = pdorclient.Config()
+    response = unicode(ZONE % ''.join(map(lambda i: RECORD % {
+      'id': i, 'type': 'A', 'name': 'host%d.bench.example' % i,
+      'content': '192.0.2.%d' % (i % 250)}, xrange(records))))
+
+    times = []
+    for run in range(RUNS):
+        new = map(lambda i: pdorclient.Zone(name='bench.example',
+          type=pdorclient.Zone.TYPE_MASTER, template='bench',
+          config=config), xrange(zones))
+        start = time.time()
+        for zone in new:
+            zone._refresh(response)
+        times.append(time.time() - start)
+    assert len(new[0].records) == records
+
+    best = min(times)
+    print '%d zones of %d records refreshed in %.3fs ' \
+      '(%d zones/s, %.0fus/zone, best of %d)' % (zones, records, best,
+      zones / best, best / zones * 1e6, RUNS)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+
+"""Benchmark checking a few records of a big zone after writing them.
+
+Usage: python benchmarks/reload.py [records] [changed]
+
+Starts a small stand-in for PowerDNS on Rails in a child process,
+serving one zone of ``records`` RRs (default: 50000), looks it up once,
+then brings ``changed`` of its records (default: 10) up to date:
+
+``lookup``
+  by looking the whole zone up again with ``Zone.lookup()``;
+``reload``
+  by fetching just those records with ``Resource.reload_many()``.
+
+Reports the best wall time and the bytes received over ``ROUNDS``
+rounds.  Run with a ``pdorclient.conf`` in the current directory; its
+``url`` is ignored.
+
+"""
+
+import pdorclient
+import re
+import standin
+import sys
+import time
+import urlparse
+
+ROUNDS = 3
+
+class Handler(standin.Handler):
+    def do_GET(self):
+        m = re.match(r'^/domains/1/records/(\d+)$',
+          urlparse.urlsplit(self.path).path)
+        if m:
+            self.reply('<?xml version="1.0" encoding="UTF-8"?>' +
+              standin.record(int(m.group(1)), timestamps=True))
+        else:
+            standin.Handler.do_GET(self)
+
+def main(argv):
+    records = 50000
+    changed = 10
+    if len(argv) > 1:
+        records = int(argv[1])
+    if len(argv) > 2:
+        changed = int(argv[2])
+
+    (pid, url) = standin.serve(Handler, xml=standin.zone(map(lambda i:
+      standin.record(i + 1, timestamps=True), xrange(records))))
+    try:
+        client = pdorclient.Client()
+        client.url = url
+        zone = client.lookup('bench.example')
+        step = max(1, records / changed)
+        stale = zone.records[::step][:changed]
+
+        for (name, check) in (
+          ('lookup', lambda: client.lookup('bench.example')),
+          ('reload', lambda: pdorclient.Resource.reload_many(stale))):
+            times = []
+            before = standin.stats(url)['bytes']
+            for i in range(ROUNDS):
+                start = time.time()
+                check()
+                times.append(time.time() - start)
+            print '%-6s %d of %d records: best %.3fs, %d bytes per round' % (
+              name, changed, records, min(times),
+              (standin.stats(url)['bytes'] - before) / ROUNDS)
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+
+"""Benchmark a stampede of identical lookups.
+
+Usage: python benchmarks/stampede.py [threads] [records]
+
+Starts a small stand-in for PowerDNS on Rails in a child process,
+serving one zone of ``records`` RRs (default: 2000).  Every request
+takes ``LATENCY`` seconds on the server, as a stand-in for the work
+Rails does.  ``threads`` threads (default: 32) are then released at
+once to look the zone up by name, ``ROUNDS`` times over:
+
+``separate``
+  each thread with a ``pdorclient.Client`` of its own, so that every
+  lookup is sent;
+``shared``
+  all threads sharing one ``pdorclient.Client``, so that concurrent
+  lookups are coalesced.
+
+Reports requests sent and the wall time of a round.  Run with a
+``pdorclient.conf`` in the current directory; its ``url`` is ignored.
+
+"""
+
+import pdorclient
+import standin
+import sys
+import threading
+import time
+import urlparse
+
+LATENCY = 0.05
+ROUNDS = 3
+
+class Handler(standin.Handler):
+    def do_GET(self):
+        if urlparse.urlsplit(self.path).path != '/stats':
+            time.sleep(LATENCY)
+        standin.Handler.do_GET(self)
+
+def stampede(clients):
+    """Release one thread per client to look the zone up and return
+    the wall time until all are done."""
+    go = threading.Event()
+    errors = []
+
+    def work(client):
+        go.wait()
+        try:
+            zone = client.lookup('bench.example')
+            assert zone.records[0]._parent() is zone
+        except Exception, e:
+            errors.append(e)
+
+    workers = map(lambda c: threading.Thread(target=work, args=(c,)),
+      clients)
+    for w in workers:
+        w.start()
+    start = time.time()
+    go.set()
+    for w in workers:
+        w.join()
+    assert errors == [], errors
+    return time.time() - start
+
+def main(argv):
+    threads = 32
+    records = 2000
+    if len(argv) > 1:
+        threads = int(argv[1])
+    if len(argv) > 2:
+        records = int(argv[2])
+
+    (pid, url) = standin.serve(Handler, xml=standin.zone(map(lambda i:
+      standin.record(i + 1), xrange(records))))
+    try:
+        def client():
+            c = pdorclient.Client()
+            c.url = url
+            return c
+
+        shared = client()
+        for (name, clients) in (
+          ('separate', map(lambda i: client(), range(threads))),
+          ('shared', [shared] * threads)):
+            before = standin.stats(url)['GET']
+            seconds = min(map(lambda i: stampede(clients), range(ROUNDS)))
+            print '%-8s %d threads: %4d requests per round, %.3fs' % (
+              name, threads, (standin.stats(url)['GET'] - before) / ROUNDS,
+              seconds)
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
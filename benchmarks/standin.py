@@ -0,0 +1,147 @@
+"""A small stand-in for PowerDNS on Rails, shared by the benchmarks.
+
+``serve()`` starts a server in a child process.  The default
+``Handler`` answers zone searches with ``SEARCH``, ``/stats`` with the
+requests and bytes it has sent so far, and any other ``GET`` with the
+server's ``xml``.  Benchmarks subclass it to add their own ``do_*``
+methods::
+
+    class Handler(standin.Handler):
+        def do_DELETE(self):
+            self.reply('')
+
+    (pid, url) = standin.serve(Handler, xml=standin.zone(records))
+    try:
+        ...
+    finally:
+        standin.stop(pid)
+
+"""
+
+import BaseHTTPServer
+import SocketServer
+import httplib
+import os
+import signal
+import simplejson
+import threading
+import urlparse
+
+RECORD = (
+  '<record>'
+    '<content>%(content)s</content>'
+    '%(created_at)s'
+    '<domain-id type="integer">%(zone)d</domain-id>'
+    '<id type="integer">%(id)d</id>'
+    '<name>%(name)s</name>'
+    '%(prio)s'
+    '<ttl type="integer">%(ttl)d</ttl>'
+    '<type>%(type)s</type>'
+    '%(updated_at)s'
+  '</record>'
+)
+
+ZONE = (
+  '<?xml version="1.0" encoding="UTF-8"?>'
+  '<domain>'
+    '<id type="integer">%(id)d</id>'
+    '<name>%(name)s</name>'
+    '<type>MASTER</type>'
+    '<records type="array">%(records)s</records>'
+  '</domain>'
+)
+
+SEARCH = '[{"domain": {"id": 1, "name": "bench.example"}}]'
+
+TIMESTAMP = '<%s type="datetime">2011-05-23T07:00:00Z</%s>'
+
+def record(id, name=None, content=None, type='A', ttl=3600, prio=None,
+  zone=1, timestamps=False):
+    """Return the XML of one RR.  ``name`` defaults to
+    ``host<id>.bench.example`` and ``content`` to an address in
+    ``192.0.2.0/24``.  Supply ``timestamps=True`` to include
+    ``created-at`` and ``updated-at``."""
+    if name is None:
+        name = 'host%d.bench.example' % id
+    if content is None:
+        content = '192.0.2.%d' % ((id - 1) % 250)
+    stamp = lambda tag: timestamps and TIMESTAMP % (tag, tag) or ''
+    return RECORD % {'content': content, 'created_at': stamp('created-at'),
+      'id': id, 'name': name, 'prio': prio is not None and
+      '<prio type="integer">%d</prio>' % prio or '', 'ttl': ttl,
+      'type': type, 'updated_at': stamp('updated-at'), 'zone': zone}
+
+def zone(records, id=1, name='bench.example'):
+    """Return the XML of a zone holding ``records``, a list of RR XML
+    from ``record()``."""
+    return ZONE % {'id': id, 'name': name, 'records': ''.join(records)}
+
+class Server(SocketServer.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+    daemon_threads = True
+    request_queue_size = 256
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    # Headers and body go out in separate writes; don't let Nagle hold
+    # the body back for a delayed ACK.
+    disable_nagle_algorithm = True
+
+    def do_GET(self):
+        path = urlparse.urlsplit(self.path).path
+        if path == '/stats':
+            with self.server.lock:
+                body = simplejson.dumps(self.server.stats)
+            self.reply(body, 'application/json', counted=False)
+        elif path == '/search/results':
+            self.reply(SEARCH, 'application/json')
+        else:
+            self.reply(self.server.xml)
+
+    def log_message(self, *args):
+        pass
+
+    def reply(self, body, content_type='application/xml', counted=True):
+        """Send ``body``, counting it in ``stats()`` unless
+        ``counted=False``."""
+        if counted:
+            with self.server.lock:
+                stats = self.server.stats
+                stats[self.command] = stats.get(self.command, 0) + 1
+                stats['bytes'] += len(body)
+        self.send_response(200)
+        self.send_header('Content-Type', '%s; charset=utf-8' % content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+def serve(handler=Handler, **attrs):
+    """Start a server whose requests ``handler`` answers in a child
+    process and return ``(pid, url)``.  ``attrs``, such as ``xml``, are
+    set on the server for the handler to use."""
+    server = Server(('127.0.0.1', 0), handler)
+    server.lock = threading.Lock()
+    server.stats = dict.fromkeys(('DELETE', 'GET', 'POST', 'PUT', 'bytes'),
+      0)
+    server.xml = None
+    for (name, value) in attrs.iteritems():
+        setattr(server, name, value)
+    pid = os.fork()
+    if pid == 0:
+        server.serve_forever()
+        os._exit(0)
+    server.socket.close()
+    return (pid, 'http://127.0.0.1:%d' % server.server_address[1])
+
+def stats(url):
+    """Return a dict mapping each HTTP method to the number of requests
+    the server at ``url`` has answered, and ``bytes`` to the bytes of
+    body it has sent."""
+    conn = httplib.HTTPConnection(urlparse.urlsplit(url).netloc)
+    conn.request('GET', '/stats')
+    return simplejson.loads(conn.getresponse().read())
+
+def stop(pid):
+    """Stop the server started as ``pid`` by ``serve()``."""
+    os.kill(pid, signal.SIGTERM)
+    os.waitpid(pid, 0)
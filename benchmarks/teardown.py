@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+
+"""Benchmark tearing down a big zone.
+
+Usage: python benchmarks/teardown.py [records]
+
+Starts a small stand-in for PowerDNS on Rails in a child process,
+serving one zone of ``records`` RRs (default: 10000).  Every ``DELETE``
+takes ``LATENCY`` seconds on the server, as a stand-in for the work
+Rails does.  The zone is looked up afresh and deleted four ways:
+
+``cascade``
+  ``zone.delete()``, which deletes every record and then the zone;
+``no cascade``
+  ``zone.delete(cascade=False)``, which only deletes the zone;
+``records/1``, ``records/8``
+  ``zone.delete_records()`` on every record, over one and eight
+  threads.
+
+Reports requests sent and wall time for each.  Run with a
+``pdorclient.conf`` in the current directory; its ``url`` is ignored.
+
+"""
+
+import pdorclient
+import standin
+import sys
+import time
+
+LATENCY = 0.002
+
+class Handler(standin.Handler):
+    def do_DELETE(self):
+        time.sleep(LATENCY)
+        self.reply('')
+
+def main(argv):
+    records = 10000
+    if len(argv) > 1:
+        records = int(argv[1])
+
+    (pid, url) = standin.serve(Handler, xml=standin.zone(map(lambda i:
+      standin.record(i + 1), xrange(records))))
+    try:
+        config = pdorclient.Config()
+        config.config.set('client', 'url', url)
+
+        for (name, teardown) in (
+          ('cascade', lambda zone: zone.delete()),
+          ('no cascade', lambda zone: zone.delete(cascade=False)),
+          ('records/1', lambda zone: zone.delete_records(lambda r: True,
+            concurrency=1)),
+          ('records/8', lambda zone: zone.delete_records(lambda r: True,
+            concurrency=8))):
+            zone = pdorclient.Zone.lookup(1, config=config)
+            assert len(zone.records) == records
+            before = standin.stats(url)['DELETE']
+            start = time.time()
+            result = teardown(zone)
+            seconds = time.time() - start
+            if result is not None:
+                assert result == (records, [])
+            print '%-10s %6d requests in %.3fs' % (name,
+              standin.stats(url)['DELETE'] - before, seconds)
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
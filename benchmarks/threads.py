@@ -0,0 +1,112 @@
+#!/usr/bin/env python
+
+"""Stress a shared ``Client`` from many threads.
+
+Usage: python benchmarks/threads.py [threads] [operations]
+
+Starts a small stand-in for PowerDNS on Rails in a child process,
+serving 256 zones of 20 RRs each, then runs ``operations`` (default:
+2000) read-modify-write cycles spread over 1, 8 and ``threads``
+(default: 64) threads sharing one ``pdorclient.Client``.  Each cycle
+looks a zone up, changes the TTL of one of its RRs and saves it.
+Every eighth cycle also changes one RR of a single zone that all
+threads share, under that zone's lock.
+
+Reports cycles per second and checks that the server saw exactly one
+``PUT`` for every change made.  Run with a ``pdorclient.conf`` in the
+current directory; its ``url`` is ignored.
+
+"""
+
+import pdorclient
+import simplejson
+import standin
+import sys
+import threading
+import time
+import urlparse
+
+ZONES = 256
+RECORDS = 20
+
+def record(zone, n):
+    return standin.record(zone * RECORDS + n,
+      'host%d.zone%d.bench' % (n, zone), '192.0.2.%d' % n, zone=zone)
+
+class Handler(standin.Handler):
+    def do_GET(self):
+        url = urlparse.urlsplit(self.path)
+        if url.path == '/search/results':
+            zone = int(urlparse.parse_qs(url.query)['q'][0][4:-6])
+            self.reply(simplejson.dumps([{'domain': {'id': zone,
+              'name': 'zone%d.bench' % zone}}]), 'application/json')
+        elif url.path == '/stats':
+            standin.Handler.do_GET(self)
+        else:
+            zone = int(url.path.split('/')[2])
+            self.reply(standin.zone(map(lambda n: record(zone, n),
+              range(RECORDS)), zone, 'zone%d.bench' % zone))
+
+    def do_PUT(self):
+        (zone, id) = map(int, self.path.split('?')[0].split('/')[2::2])
+        self.reply(record(zone, id - zone * RECORDS))
+
+def run(client, shared, threads, operations):
+    """Run ``operations`` cycles over ``threads`` threads and return
+    ``(seconds, changes, errors)``."""
+    changes = [0] * threads
+    errors = []
+
+    def work(t):
+        try:
+            for k in range(t, operations, threads):
+                zone = client.lookup('zone%d.bench' % (k % ZONES))
+                zone.records[k % RECORDS].ttl = 60 + k
+                zone.save()
+                changes[t] += 1
+                if k % 8 == 0:
+                    with shared.lock():
+                        shared.records[k % RECORDS].ttl = 60 + k
+                        shared.save()
+                    changes[t] += 1
+        except Exception, e:
+            errors.append(e)
+
+    workers = map(lambda t: threading.Thread(target=work, args=(t,)),
+      range(threads))
+    start = time.time()
+    for w in workers:
+        w.start()
+    for w in workers:
+        w.join()
+    return (time.time() - start, sum(changes), errors)
+
+def main(argv):
+    threads = 64
+    operations = 2000
+    if len(argv) > 1:
+        threads = int(argv[1])
+    if len(argv) > 2:
+        operations = int(argv[2])
+
+    (pid, url) = standin.serve(Handler)
+    try:
+        client = pdorclient.Client()
+        client.url = url
+        shared = client.lookup('zone0.bench')
+
+        for n in sorted(set((1, 8, threads))):
+            before = standin.stats(url)['PUT']
+            (seconds, changes, errors) = run(client, shared, n,
+              operations)
+            seen = standin.stats(url)['PUT'] - before
+            print '%2d threads: %d cycles in %.3fs (%d cycles/s), ' \
+              '%d changes, %d PUTs, %d errors' % (n, operations, seconds,
+              operations / seconds, changes, seen, len(errors))
+            assert errors == [], errors
+            assert seen == changes
+    finally:
+        standin.stop(pid)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+
+"""Benchmark decoding ``created-at`` and ``updated-at`` timestamps.
+
+Usage: python benchmarks/timestamps.py [timestamps] [records]
+
+Decodes ``timestamps`` timestamps (default: 1000000) in the server's
+format three ways:
+
+``time.strptime``
+  ``datetime.datetime(*(time.strptime(...)[0:6]))``, as this library
+  used to;
+``distinct``
+  ``pdorclient.utils.strptime()`` on timestamps that are all different,
+  so that every one misses the memo;
+``bulk``
+  ``pdorclient.utils.strptime()`` on timestamps drawn from 100 values,
+  as records created by a few bulk imports would be.
+
+Then decodes a zone of ``records`` RRs (default: 100000), each with
+two timestamps of its own, from XML with ``timestamps`` set to ``eager``
+and to ``lazy``.  No server is needed.  Run with a ``pdorclient.conf``
+in the current directory.
+
+"""
+
+import datetime
+import pdorclient
+import pdorclient.utils
+import sys
+import time
+
+RUNS = 3
+
+FMT = pdorclient.Resource.ENCODED_DATE_FMT
+
+RECORD = (
+  '<record>'
+    '<content>192.0.2.%(octet)d</content>'
+    '<created-at type="datetime">%(ts)s</created-at>'
+    '<domain-id type="integer">1</domain-id>'
+    '<id type="integer">%(id)d</id>'
+    '<name>host%(id)d.bench.example</name>'
+    '<ttl type="integer">3600</ttl>'
+    '<type>A</type>'
+    '<updated-at type="datetime">%(updated)s</updated-at>'
+  '</record>'
+)
+
+ZONE = (
+  '<?xml version="1.0" encoding="UTF-8"?>'
+  '<domain>'
+    '<id type="integer">1</id>'
+    '<name>bench.example</name>'
+    '<type>MASTER</type>'
+    '<records type="array">%s</records>'
+  '</domain>'
+)
+
+def stamps(n, distinct):
+    epoch = datetime.datetime(2011, 5, 23, 7, 0, 0)
+    return map(lambda i: (epoch + datetime.timedelta(
+      seconds=i % distinct)).strftime(FMT), xrange(n))
+
+def best(func):
+    times = []
+    for run in range(RUNS):
+        pdorclient.utils._strptime_memo.clear()
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+def main(argv):
+    n = 1000000
+    records = 100000
+    if len(argv) > 1:
+        n = int(argv[1])
+    if len(argv) > 2:
+        records = int(argv[2])
+
+    distinct = stamps(n, n)
+    bulk = stamps(n, 100)
+    for (name, func) in (
+      ('time.strptime', lambda: map(lambda v: datetime.datetime(
+        *(time.strptime(v, FMT)[0:6])), distinct)),
+      ('distinct', lambda: map(lambda v: pdorclient.utils.strptime(v,
+        FMT), distinct)),
+      ('bulk', lambda: map(lambda v: pdorclient.utils.strptime(v, FMT),
+        bulk))):
+        seconds = best(func)
+        print '%-13s %d timestamps in %.3fs (%.2fus/timestamp)' % (name,
+          n, seconds, seconds / n * 1e6)
+
+    xml = ZONE % ''.join(map(lambda (i, (ts, updated)): RECORD % {
+      'id': i, 'octet': i % 250, 'ts': ts, 'updated': updated},
+      enumerate(zip(stamps(records, records),
+      stamps(records * 2, records * 2)[records:]))))
+    config = pdorclient.Config()
+    for timestamps in pdorclient.Config.TIMESTAMPS:
+        config.config.set('client', 'timestamps', timestamps)
+        seconds = best(lambda: pdorclient.Zone._decode(xml, True, config))
+        print '%-13s %d records decoded in %.3fs (%.2fus/record)' % (
+          timestamps, records, seconds, seconds / records * 1e6)
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,154 @@
+#!/usr/bin/env python
+
+"""Benchmark fetching and decoding a big zone over HTTP.
+
+Usage: python benchmarks/transfer.py [records]
+
+Serves the XML for a zone of ``records`` RRs (default: 100000) from a
+local HTTP server, gzip-compressed when the client asks for it, and
+fetches it into an lxml tree three ways, each in a fresh Python process
+of its own:
+
+``buffered``
+  through ``restclient`` and httplib2 without compression, as this
+  library used to;
+``httplib2``
+  through ``restclient`` and httplib2 with compression, which reads and
+  inflates the whole body before parsing it;
+``streamed``
+  through ``Resource.RestClient.stream()``, which inflates and parses
+  the body as it arrives.
+
+Reports bytes on the wire, wall time, time spent decompressing and
+parsing, and the fetching process's peak RSS.  Run with a
+``pdorclient.conf`` in the current directory; its ``url`` is ignored.
+
+"""
+
+import BaseHTTPServer
+import gzip
+import io
+import os
+import pdorclient
+import pdorclient.utils
+import subprocess
+import sys
+import threading
+import time
+
+RECORD = (
+  '<record>'
+    '<change-date type="integer">1306134000</change-date>'
+    '<content>192.0.2.%(octet)d</content>'
+    '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+    '<domain-id type="integer">1</domain-id>'
+    '<id type="integer">%(id)d</id>'
+    '<name>host%(id)d.bench.example</name>'
+    '<prio type="integer" nil="true"></prio>'
+    '<ttl type="integer">3600</ttl>'
+    '<type>A</type>'
+    '<updated-at type="datetime">2011-05-23T07:00:00Z</updated-at>'
+  '</record>'
+)
+
+ZONE = (
+  '<?xml version="1.0" encoding="UTF-8"?>'
+  '<domain>'
+    '<id type="integer">1</id>'
+    '<name>bench.example</name>'
+    '<type>MASTER</type>'
+    '<records type="array">%s</records>'
+  '</domain>'
+)
+
+class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        if 'gzip' in self.headers.get('accept-encoding', ''):
+            body = self.server.gzipped
+            encoding = 'gzip'
+        else:
+            body = self.server.plain
+            encoding = 'identity'
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/xml; charset=utf-8')
+        self.send_header('Content-Encoding', encoding)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+        self.server.sent += len(body)
+
+    def log_message(self, *args):
+        pass
+
+def serve(xml):
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    server.plain = xml
+    server.sent = 0
+    f = io.BytesIO()
+    g = gzip.GzipFile(fileobj=f, mode='wb')
+    g.write(xml)
+    g.close()
+    server.gzipped = f.getvalue()
+    t = threading.Thread(target=server.serve_forever)
+    t.daemon = True
+    t.start()
+    return server
+
+def fetch(mode, url, records):
+    """Fetch the zone from ``url`` and print the wall time and the
+    time spent decoding."""
+    config = pdorclient.Config()
+    config.config.set('client', 'url', url)
+    rc = pdorclient.Resource.RestClient(config)
+
+    start = time.time()
+    if mode == 'streamed':
+        body = rc.stream('/domains/1',
+          headers={'Accept': 'application/xml'})
+        root = body.xmlparse()
+        decode_seconds = body.decode_seconds
+    else:
+        headers = {'Accept': 'application/xml'}
+        if mode == 'buffered':
+            headers['Accept-Encoding'] = 'identity'
+        response = rc.get('/domains/1', headers=headers)
+        decode_start = time.time()
+        root = pdorclient.utils.xmlparse(response)
+        decode_seconds = time.time() - decode_start
+    elapsed = time.time() - start
+
+    assert len(root.find('records')) == records
+    print '%f %f' % (elapsed, decode_seconds)
+
+def main(argv):
+    if len(argv) == 5 and argv[1] == '--fetch':
+        fetch(argv[2], argv[3], int(argv[4]))
+        return
+
+    records = 100000
+    if len(argv) > 1:
+        records = int(argv[1])
+
+    xml = ZONE % ''.join(map(lambda i: RECORD % {'id': i,
+      'octet': i % 250}, xrange(records)))
+    server = serve(xml)
+    url = 'http://127.0.0.1:%d' % server.server_address[1]
+
+    print '%d records, %d bytes of XML' % (records, len(xml))
+    for mode in ('buffered', 'httplib2', 'streamed'):
+        server.sent = 0
+        p = subprocess.Popen([sys.executable, __file__, '--fetch', mode,
+          url, str(records)], stdout=subprocess.PIPE)
+        result = p.stdout.read().split()
+        (pid, status, usage) = os.wait4(p.pid, 0)
+        assert status == 0, '%s failed' % mode
+        (elapsed, decode_seconds) = map(float, result)
+        print '%-8s %10d bytes on the wire, %.3fs, %.3fs decoding, ' \
+          '%dMB peak RSS' % (mode, server.sent, elapsed, decode_seconds,
+          usage.ru_maxrss / 1024)
+    server.shutdown()
+
+if __name__ == '__main__':
+    main(sys.argv)
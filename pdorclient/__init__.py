@@ -1,14 +1,17 @@
-import ConfigParser
+import base64
+import collections
 import datetime
 import logging
 import os
 import pdorclient.errors
 import pdorclient.utils
-import restclient
-import simplejson
+import socket
 import stat
+import threading
 import time
 import urllib
+import urlparse
+import weakref
 
 # Our version.
 __version__ = '0.4.4'
@@ -18,13 +21,33 @@ __pdor_compat__ = 'b26990cc5e1cca7782eda512128fa7994395323b'
 
 logger = logging.getLogger(__name__)
 
+# ``ConfigParser``, ``httplib``, ``restclient`` (and with it httplib2), 
+# ``simplejson`` and lxml are imported where they are first needed, so 
+# that one-shot scripts only pay for what they use.  See 
+# tests/test_imports.py.
+
+# httplib2, and therefore ``restclient``, is not thread-safe.  Keep one
+# ``restclient.RestClient`` per thread and server so that persistent
+# connections are reused without ever being shared between threads.  The
+# ``httplib`` connections behind streamed responses are kept the same
+# way.
+_rest_clients = threading.local()
+
+_null_lock = pdorclient.utils.NullLock()
+
 class Config(object):
     """Stores client configuration."""
     CONFIG = 'pdorclient.conf'
     GLOBAL_CONFIG = os.path.join('/', 'etc', CONFIG)
 
+    # Ways of sending ``POST`` and ``PUT`` parameters.
+    REQUEST_BODIES = ('query', 'form', 'xml')
+
+    # Ways of decoding ``created-at`` and ``updated-at``.
+    TIMESTAMPS = ('eager', 'lazy')
+
     def __getattr__(self, name):
-        if name in ('credentials', 'url'):
+        if name in ('credentials', 'request_body', 'timestamps', 'url'):
             return eval('self._%s()' % name)
         raise AttributeError()
 
@@ -39,6 +62,7 @@ class Config(object):
         system.
 
         """
+        import ConfigParser
         self.config = ConfigParser.ConfigParser()
 
         paths = [self.CONFIG, self.GLOBAL_CONFIG]
@@ -71,6 +95,55 @@ class Config(object):
         return (self.config.get('client', 'username'),
           self.config.get('client', 'password'),)
 
+    def _request_body(self):
+        """Return an ``(encoding, gzip)`` tuple describing how ``POST``
+        and ``PUT`` parameters should be sent, as read from the
+        optional ``body`` and ``body_gzip`` settings in
+        ``/etc/pdorclient.conf``.
+
+        ``encoding`` is one of ``REQUEST_BODIES``.  The default,
+        ``'query'``, sends parameters in the query string and nothing in
+        the body; ``gzip`` is then ignored.
+
+        Will raise ``InvalidConfigurationError`` on unknown settings.
+
+        """
+        encoding = 'query'
+        if self.config.has_option('client', 'body'):
+            encoding = self.config.get('client', 'body').strip().lower()
+            if encoding not in self.REQUEST_BODIES:
+                raise pdorclient.errors.InvalidConfigurationError('body',
+                  encoding)
+
+        gzip = False
+        if self.config.has_option('client', 'body_gzip'):
+            try:
+                gzip = self.config.getboolean('client', 'body_gzip')
+            except ValueError:
+                raise pdorclient.errors.InvalidConfigurationError(
+                  'body_gzip', self.config.get('client', 'body_gzip'))
+        return (encoding, gzip)
+
+    def _timestamps(self):
+        """Return one of ``TIMESTAMPS``, as read from the optional
+        ``timestamps`` setting in ``/etc/pdorclient.conf``.
+
+        ``'eager'``, the default, decodes timestamps into
+        ``datetime.datetime`` instances along with everything else.
+        ``'lazy'`` keeps them as the strings the server sent until they
+        are first read.
+
+        Will raise ``InvalidConfigurationError`` on unknown settings.
+
+        """
+        if not self.config.has_option('client', 'timestamps'):
+            return 'eager'
+        timestamps = self.config.get('client', 'timestamps').strip().lower()
+        if timestamps not in self.TIMESTAMPS:
+            raise pdorclient.errors.InvalidConfigurationError('timestamps',
+              timestamps)
+        return timestamps
+
     def _url(self):
         """Return the server's URL as read from
         ``/etc/pdorclient.conf``.
@@ -78,6 +151,89 @@ class Config(object):
         """
         return self.config.get('client', 'url').rstrip('/')
 
+class Client(Config):
+    """A handle on one PowerDNS on Rails server that any number of
+    threads may share.
+
+    A ``Client`` is a ``Config`` whose settings are read once, when it
+    is created, and never change afterwards.  It owns its own
+    persistent connections (one per thread, as ever), its own zone ID
+    and miss caches and its own table of lookups in flight; see
+    ``Zone.lookup_id()`` and ``Zone.lookup()``.  Pass it wherever a
+    ``config`` is accepted, or use the shortcuts below; resources looked
+    up or created through a client stay bound to it::
+
+        client = pdorclient.Client()
+        zone = client.lookup('example.net')
+        zone.records.append(client.record(name='www.example.net',
+          type=pdorclient.Record.TYPE_A, content='192.0.2.1'))
+        zone.save()
+
+    Threads may look up, change and save different zones freely.
+    Changes to one zone are serialised by that zone's lock; see
+    ``Resource.lock()``.
+
+    Supply ``identity_map=True`` to keep at most one instance of each
+    zone and record on the server for as long as something refers to
+    it.  Looking a zone up again then returns the same ``Zone``, its
+    records updated from the server and any records new to it added;
+    attributes changed but not yet saved are left alone.  A zone
+    looked up with different ``match`` arguments gathers the records
+    of every lookup.
+
+    """
+    def __init__(self, path=None, identity_map=False):
+        Config.__init__(self, path)
+        self.url = self._url()
+        self.credentials = self._credentials()
+        self.request_body = self._request_body()
+        self.timestamps = self._timestamps()
+        self.connections = threading.local()
+        self.id_cache = pdorclient.utils.TtlCache(Zone.ID_CACHE_SIZE,
+          Zone.ID_CACHE_TTL)
+        self.miss_cache = Resource._new_misses()
+        self.flights = pdorclient.utils.SingleFlight()
+        self.identities = None
+        if identity_map:
+            self.identities = pdorclient.utils.IdentityMap()
+
+    def ilookup_many(self, names, match=None, concurrency=8, types=None):
+        """See ``Zone.ilookup_many()``."""
+        return Zone.ilookup_many(names, match, concurrency, config=self,
+          types=types)
+
+    def irecords(self, name, match=None, types=None):
+        """See ``Zone.irecords()``."""
+        return Zone.irecords(name, match, config=self, types=types)
+
+    def lookup(self, name, match=None, processes=1, types=None):
+        """See ``Zone.lookup()``."""
+        return Zone.lookup(name, match, config=self, processes=processes,
+          types=types)
+
+    def lookup_id(self, name, cache=True):
+        """See ``Zone.lookup_id()``.  The ID and miss caches are used
+        by default."""
+        return Zone.lookup_id(name, config=self, cache=cache)
+
+    def lookup_many(self, names, match=None, concurrency=8, types=None):
+        """See ``Zone.lookup_many()``."""
+        return Zone.lookup_many(names, match, concurrency, config=self,
+          types=types)
+
+    def record(self, **kwargs):
+        """Return a new ``Record`` bound to this client."""
+        return Record(config=self, **kwargs)
+
+    def template(self, name, cache=True):
+        """See ``Template.lookup()``.  The miss cache is used by
+        default."""
+        return Template.lookup(name, config=self, cache=cache)
+
+    def zone(self, **kwargs):
+        """Return a new ``Zone`` bound to this client."""
+        return Zone(config=self, **kwargs)
+
 class Resource(object):
     ATTRS = {
       # Attribute : Converter in | Converter out | Default | Emit?
@@ -89,19 +245,136 @@ class Resource(object):
 
     ENCODED_DATE_FMT = '%Y-%m-%dT%H:%M:%SZ'
 
+    # Attributes that may be held as raw strings until first read; see
+    # ``Config.timestamps``.
+    TIMESTAMP_ATTRS = frozenset(('created_at', 'updated_at'))
+
     STATE_AT_REST = 0
     STATE_DELETED = 1
     STATE_DIRTY   = 2
     STATE_NEW     = 3
 
+    # Names that were looked up and not found.  Zones and templates may 
+    # be created elsewhere at any time, so misses are only remembered 
+    # briefly.  Keyed on ``(url, class, name)``.  Every miss cache in 
+    # the process, the process-wide one and each ``Client``'s, is 
+    # registered in ``_miss_caches`` so that a save through any of them 
+    # can drop the name from all.
+    MISS_CACHE_SIZE = 4096
+    MISS_CACHE_TTL  = 30
+    _miss_cache = pdorclient.utils.TtlCache(MISS_CACHE_SIZE, MISS_CACHE_TTL)
+    _miss_caches = weakref.WeakSet([_miss_cache])
+    _miss_caches_lock = threading.Lock()
+
+    class Children(list):
+        """A list of child resources that tells its owner about every
+        child added to or removed from it.
+
+        Children are matched by identity, not equality; ``Record``
+        instances with the same name and type compare equal.
+
+        """
+        def __init__(self, owner, children=()):
+            list.__init__(self)
+            self._owner = weakref.ref(owner)
+            self.extend(children)
+
+        def __delitem__(self, index):
+            with self._owner()._guard():
+                if isinstance(index, slice):
+                    removed = list.__getitem__(self, index)
+                else:
+                    removed = [list.__getitem__(self, index)]
+                list.__delitem__(self, index)
+                self._removed(removed)
+
+        def __delslice__(self, i, j):
+            self.__delitem__(slice(max(i, 0), max(j, 0)))
+
+        def __iadd__(self, children):
+            self.extend(children)
+            return self
+
+        def __setitem__(self, index, value):
+            with self._owner()._guard():
+                if isinstance(index, slice):
+                    removed = list.__getitem__(self, index)
+                    value = list(value)
+                    added = value
+                else:
+                    removed = [list.__getitem__(self, index)]
+                    added = [value]
+                list.__setitem__(self, index, value)
+                self._removed(removed)
+                self._added(added)
+
+        def __setslice__(self, i, j, value):
+            self.__setitem__(slice(max(i, 0), max(j, 0)), value)
+
+        def _added(self, children):
+            owner = self._owner()
+            for c in children:
+                owner._child_added(c)
+
+        def _removed(self, children):
+            owner = self._owner()
+            # The same child may legitimately appear twice.
+            present = set(map(id, self))
+            for c in children:
+                if id(c) not in present:
+                    owner._child_removed(c)
+
+        def append(self, child):
+            with self._owner()._guard():
+                list.append(self, child)
+                self._added([child])
+
+        def discard(self, children):
+            """Remove every one of ``children`` in a single pass.
+            Children that are not in the list are ignored."""
+            doomed = set(map(id, children))
+            with self._owner()._guard():
+                removed = filter(lambda c: id(c) in doomed, self)
+                list.__setitem__(self, slice(None),
+                  filter(lambda c: id(c) not in doomed, self))
+                self._removed(removed)
+
+        def extend(self, children):
+            children = list(children)
+            with self._owner()._guard():
+                list.extend(self, children)
+                self._added(children)
+
+        def insert(self, index, child):
+            with self._owner()._guard():
+                list.insert(self, index, child)
+                self._added([child])
+
+        def pop(self, index=-1):
+            with self._owner()._guard():
+                child = list.pop(self, index)
+                self._removed([child])
+                return child
+
+        def remove(self, child):
+            with self._owner()._guard():
+                for (i, c) in enumerate(self):
+                    if c is child:
+                        del self[i]
+                        return
+            raise ValueError('list.remove(x): x not in list')
+
     class RestClient(object):
         def __init__(self, config):
             assert isinstance(config, Config)
             self.config = config
-            self.rc = restclient.RestClient()
-            self.rc.transport.add_credentials(*self.config.credentials)
 
         def __getattr__(self, name):
+            # Streamed requests never touch ``restclient``; only fetch 
+            # (and import) it for the other verbs.
+            if name == 'rc':
+                self.rc = Resource.RestClient._pooled(self.config)
+                return self.rc
             return getattr(self.rc, name) # pragma: no cover
 
         def __repr__(self):
@@ -109,16 +382,50 @@ class Resource(object):
               self.__module__, self.__class__.__name__, self.config)
 
         def __setattr__(self, name, value):
-            if name in self.__dict__.keys() + ['config', 'rc']:
+            if name in ('config', 'rc') or name in self.__dict__:
                 object.__setattr__(self, name, value)
             else: # pragma: no cover
                 self.rc.name = value
 
+        @staticmethod
+        def _local(config):
+            """Return the ``threading.local`` holding this thread's
+            connections for ``config``: a ``Client``'s own, or the
+            process-wide one."""
+            return getattr(config, 'connections', _rest_clients)
+
+        @staticmethod
+        def _pooled(config):
+            """Return this thread's ``restclient.RestClient`` for the
+            server described by ``config``."""
+            credentials = config.credentials
+            key = (config.url,) + credentials
+            local = Resource.RestClient._local(config)
+            try:
+                pool = local.pool
+            except AttributeError:
+                pool = local.pool = {}
+            rc = pool.get(key)
+            if rc is None:
+                # ``restclient`` otherwise hands every instance the same 
+                # process-wide transport.
+                import restclient
+                rc = restclient.RestClient(
+                  transport=restclient.HTTPLib2Transport())
+                rc.transport.add_credentials(*credentials)
+                pool[key] = rc
+            return rc
+
         def delete(self, path, *args, **kwargs):
             logging.debug('HTTP DELETE: %r' % path)
             return self.rc.delete('%s%s' % (self.config.url, path),
               *args, **kwargs)
 
+        def get(self, path, *args, **kwargs):
+            logging.debug('HTTP GET: %r' % path)
+            return self.rc.get('%s%s' % (self.config.url, path),
+              *args, **kwargs)
+
         def post(self, path, *args, **kwargs):
             logging.debug('HTTP POST: %r' % path)
             return self.rc.post('%s%s' % (self.config.url, path),
@@ -129,6 +436,134 @@ class Resource(object):
             return self.rc.put('%s%s' % (self.config.url, path),
               *args, **kwargs)
 
+        def stream(self, path, headers=None):
+            """Send a ``GET`` for ``path`` and return its body as a
+            ``pdorclient.utils.ResponseBody``, to be read and decoded
+            as it arrives.
+
+            ``gzip`` and ``deflate`` content encodings are negotiated.
+            httplib2 always reads and decompresses whole responses, so
+            streamed requests go through a persistent ``httplib``
+            connection of this thread's own instead.  That connection
+            only speaks Basic authentication, and only once the server
+            has asked for it; redirects and other challenges are handed
+            to httplib2, whose bodies are read whole.
+
+            Raises the same ``restclient`` errors as ``get()``.
+
+            """
+            logging.debug('HTTP GET (streamed): %r' % path)
+            url = urlparse.urlsplit(self.config.url)
+            local = Resource.RestClient._local(self.config)
+            try:
+                basic = local.basic
+            except AttributeError:
+                basic = local.basic = set()
+            key = (self.config.url,) + self.config.credentials
+
+            sent = key in basic
+            response = self._request(url, path, headers, sent)
+            challenge = response.getheader('www-authenticate') or ''
+            if response.status == 401 and not sent and \
+              challenge.lower().startswith('basic'):
+                response.read()
+                basic.add(key)
+                sent = True
+                response = self._request(url, path, headers, sent)
+            if 300 <= response.status < 400 or \
+              (response.status == 401 and not sent):
+                response.read()
+                return self._fetch(path, headers)
+
+            if not 200 <= response.status < 300:
+                Resource.RestClient._check(response.status,
+                  response.read(), response)
+            return pdorclient.utils.ResponseBody(response,
+              response.getheader('content-encoding'), path)
+
+        def _request(self, url, path, headers, basic):
+            """Send a ``GET`` for ``path`` on this thread's connection to
+            the server at the ``urlparse.SplitResult`` ``url`` and return
+            the ``httplib.HTTPResponse``.  Supply ``basic=True`` to send
+            Basic credentials."""
+            import httplib
+            headers = dict(headers or {})
+            headers['Accept-Encoding'] = 'gzip, deflate'
+            if basic:
+                headers['Authorization'] = 'Basic %s' % base64.b64encode(
+                  '%s:%s' % self.config.credentials)
+
+            # A connection whose last response was not read to the end, 
+            # or that the server has since closed, is replaced once.
+            for attempt in (True, False):
+                conn = Resource.RestClient._connection(self.config, url)
+                try:
+                    conn.request('GET', url.path + path, headers=headers)
+                    return conn.getresponse()
+                except (httplib.HTTPException, socket.error), e:
+                    Resource.RestClient._connection(self.config, url,
+                      drop=True)
+                    if not attempt:
+                        import restclient
+                        raise restclient.RequestError(str(e))
+
+        def _fetch(self, path, headers):
+            """Send a ``GET`` for ``path`` through httplib2, which follows
+            redirects and answers any challenge it knows, and return its
+            whole body as a ``pdorclient.utils.ResponseBody``."""
+            logging.debug('HTTP GET (through httplib2): %r' % path)
+            import StringIO
+            import restclient
+            try:
+                (response, data) = self.rc.transport.request('%s%s' % (
+                  self.config.url, path), headers=dict(headers or {}))
+            except restclient.TransportError, e:
+                raise restclient.RequestError(str(e))
+            if not 200 <= response.status < 300:
+                Resource.RestClient._check(response.status, data, response)
+            return pdorclient.utils.ResponseBody(StringIO.StringIO(data),
+              None, path)
+
+        @staticmethod
+        def _check(status, data, response):
+            """Raise the ``restclient`` error ``restclient`` would for a
+            response with ``status`` and the body ``data``."""
+            import restclient
+            if status == 404:
+                raise restclient.ResourceNotFound(data, http_code=404,
+                  response=response)
+            elif status in (401, 403):
+                raise restclient.Unauthorized(data, http_code=status,
+                  response=response)
+            raise restclient.RequestFailed(data, http_code=status,
+              response=response)
+
+        @staticmethod
+        def _connection(config, url, drop=False):
+            """Return this thread's ``httplib`` connection to the server
+            at the ``urlparse.SplitResult`` ``url``.  Supply ``drop=True``
+            to close and forget it instead."""
+            key = (url.scheme, url.netloc)
+            local = Resource.RestClient._local(config)
+            try:
+                connections = local.connections
+            except AttributeError:
+                connections = local.connections = {}
+            if drop:
+                conn = connections.pop(key, None)
+                if conn is not None:
+                    conn.close()
+                return None
+            conn = connections.get(key)
+            if conn is None:
+                import httplib
+                if url.scheme == 'https':
+                    conn = httplib.HTTPSConnection(url.netloc)
+                else:
+                    conn = httplib.HTTPConnection(url.netloc)
+                connections[key] = conn
+            return conn
+
     def __getattr__(self, name):
 
         # External indentifier representation should probably be ints.
@@ -146,8 +581,13 @@ class Resource(object):
         if name == 'rtype':
             return self._resolve_type()
 
-        if name in self._repr.keys():
-            return self._repr[name]
+        if name in self._repr:
+            value = self._repr[name]
+            if value.__class__ is str and name in self.TIMESTAMP_ATTRS:
+                value = pdorclient.utils.strptime(value,
+                  self.ENCODED_DATE_FMT)
+                self._repr[name] = value
+            return value
 
         raise AttributeError()
 
@@ -155,74 +595,88 @@ class Resource(object):
       state=None, dirty_repr=None, qp_hash_base=None, children=None,
       config=None):
 
-        self._enforcing = False
-
-        self._r_type = dict(map(
-          lambda y: (getattr(self, y), y.replace('TYPE_', '')),
-          filter(lambda x: x.startswith('TYPE_'), dir(self))))
-
-        # Optional, because sub-resources may not know their path at 
-        # create time.
-        if path is not None:
-            self._path = path
-        else:
-            self._path = None
-
         # Treat all identifiers as strings internally.
         if id is not None:
-            self._id = str(id)
-        else:
-            self._id = None
+            id = str(id)
 
         if repr is None:
-            self._repr = {}
-        else: # pragma: no cover
-            self._repr = repr
+            repr = {}
 
+        # Read-only and dirty attributes are checked on every attribute 
+        # write, so both are sets.
         if ro_attrs is None:
-            self._ro_attrs = []
-        else: # pragma: no cover
-            self._ro_attrs = ro_attrs
+            ro_attrs = set()
+        else:
+            ro_attrs = set(ro_attrs)
 
         if state is None:
-            if self._id is not None:
-                self._state = self.STATE_AT_REST
+            if id is not None:
+                state = self.STATE_AT_REST
             else:
-                self._state = self.STATE_NEW
-        else: # pragma: no cover
-            self._state = state
+                state = self.STATE_NEW
 
         if dirty_repr is None:
-            self._dirty_repr = []
-        else: # pragma: no cover
-            self._dirty_repr = dirty_repr
-
-        # PDOR takes its query parameters as a list of hash keys like 
-        # this::
-        #
-        #     ?blah[foo]=1&blah[bar]=2
-        #
-        # ``qp_hash_base`` in the example above would be 'blah'.  Set 
-        # ``qp_hash_base`` to ``None`` to use regular query parameters.
-        self._qp_hash_base = qp_hash_base
-
-        if isinstance(children, list): # pragma: no cover
-            self._children = children
+            dirty_repr = set()
         else:
-            self._children = []
+            dirty_repr = set(dirty_repr)
 
-        if isinstance(config, Config):
-            self._config = config
-        else:
-            self._config = Config()
+        if not isinstance(config, Config):
+            config = Config()
 
-        if self._state == self.STATE_NEW:
+        if state == self.STATE_NEW:
             # New objects can not know what their identities will be 
             # until they are persisted.
-            assert self._id == None
+            assert id == None
         else:
             # All other objects should know their identities.
-            assert self._id != None
+            assert id != None
+
+        # Private state bypasses ``__setattr__``; resources are created 
+        # in bulk when zones are looked up.
+        self.__dict__.update({
+          '_enforcing': False,
+          '_r_type': self._type_names(),
+
+          # Optional, because sub-resources may not know their path at 
+          # create time.
+          '_path': path,
+
+          '_id': id,
+          '_repr': repr,
+          '_ro_attrs': ro_attrs,
+          '_state': state,
+          '_dirty_repr': dirty_repr,
+
+          # PDOR takes its query parameters as a list of hash keys like 
+          # this::
+          #
+          #     ?blah[foo]=1&blah[bar]=2
+          #
+          # ``qp_hash_base`` in the example above would be 'blah'.  Set 
+          # ``qp_hash_base`` to ``None`` to use regular query 
+          # parameters.
+          '_qp_hash_base': qp_hash_base,
+
+          # Children that the next ``save()`` must create or update, and 
+          # children that were dropped from ``_children`` and must be 
+          # deleted.  Both are keyed on ``id()`` and are only allocated 
+          # once there is something to track; most resources never have 
+          # children.
+          '_pending': None,
+          '_removed': None,
+          '_parent': None,
+
+          # Resources that own children have a lock of their own; see 
+          # ``lock()``.
+          '_lock': None,
+
+          '_config': config,
+        })
+
+        if isinstance(children, list): # pragma: no cover
+            self._children = Resource.Children(self, children)
+        else:
+            self._children = Resource.Children(self)
 
     def __repr__(self):
         return '%s.%s(path=%r, id=%r, repr=%r, ro_attrs=%r, ' \
@@ -233,39 +687,163 @@ class Resource(object):
           self._config)
 
     def __setattr__(self, name, value):
-        if name in self.__dict__.keys() or name.startswith('_'):
+        if name[0] == '_' or name in self.__dict__:
             object.__setattr__(self, name, value)
+        elif not self._enforcing:
+            self._repr[name] = value
         else:
-            if self._enforcing:
-                if name in self._ro_attrs or name == 'id':
-                    raise pdorclient.errors.ReadOnlyAttributeError(name)
+            if name in self._ro_attrs or name == 'id':
+                raise pdorclient.errors.ReadOnlyAttributeError(name)
 
             self._repr[name] = value
-
-            if self._enforcing:
-                if name not in self._dirty_repr:
-                    self._dirty_repr.append(name)
+            self._dirty_repr.add(name)
+            if self._state == self.STATE_AT_REST:
                 object.__setattr__(self, '_state', self.STATE_DIRTY)
+                self._notify_parent()
+
+    def _adopt(self, child):
+        """Prepare ``child`` for life under this resource."""
+        pass
+
+    def _child_added(self, child):
+        child._parent = weakref.ref(self)
+        if self._removed:
+            self._removed.pop(id(child), None)
+        self._adopt(child)
+        self._child_changed(child)
+
+    def _child_changed(self, child):
+        with self._guard():
+            if child._state in (self.STATE_NEW, self.STATE_DIRTY):
+                if self._pending is None:
+                    self._pending = collections.OrderedDict()
+                self._pending[id(child)] = child
+            elif self._pending:
+                self._pending.pop(id(child), None)
+
+    def _child_removed(self, child):
+        child._parent = None
+        if self._pending:
+            self._pending.pop(id(child), None)
+        if child._id is not None and child._state != self.STATE_DELETED:
+            if self._removed is None:
+                self._removed = collections.OrderedDict()
+            self._removed[id(child)] = child
+
+    def _copy(self):
+        """Return a copy of this resource, and of each of its
+        children, that shares nothing with it but immutable values."""
+        copy = object.__new__(self.__class__)
+        copy.__dict__.update(self.__dict__)
+        copy.__dict__.update({
+          '_repr': dict(self._repr),
+          '_ro_attrs': set(self._ro_attrs),
+          '_dirty_repr': set(self._dirty_repr),
+          '_pending': None,
+          '_removed': None,
+          '_parent': None,
+          '_lock': self._lock and threading.RLock(),
+        })
+        copy._children = Resource.Children(copy,
+          map(lambda c: c._copy(), self._children))
+        return copy
+
+    def _rebind(self, config):
+        """Make this resource, and each of its children, use
+        ``config``."""
+        self._config = config
+        for c in self._children:
+            c._rebind(config)
+
+    @staticmethod
+    def _identities(config):
+        """Return the identity map to use with ``config``, or ``None``;
+        see ``Client``."""
+        return getattr(config, 'identities', None)
+
+    @staticmethod
+    def _misses(config):
+        """Return the cache of names not found to use with ``config``: a
+        ``Client``'s own, or the process-wide one."""
+        return getattr(config, 'miss_cache', Resource._miss_cache)
+
+    @staticmethod
+    def _new_misses():
+        """Return a new, registered cache of names not found."""
+        cache = pdorclient.utils.TtlCache(Resource.MISS_CACHE_SIZE,
+          Resource.MISS_CACHE_TTL)
+        with Resource._miss_caches_lock:
+            Resource._miss_caches.add(cache)
+        return cache
+
+    @staticmethod
+    def _forget_miss(key):
+        """Drop ``key`` from every cache of names not found in this
+        process."""
+        with Resource._miss_caches_lock:
+            caches = list(Resource._miss_caches)
+        for cache in caches:
+            cache.discard(key)
+
+    def _guard(self):
+        """Return the lock that serialises changes to this resource:
+        its own, its parent's, or a ``NullLock`` for a resource that
+        belongs to nothing."""
+        if self._lock is not None:
+            return self._lock
+        if self._parent is not None:
+            parent = self._parent()
+            if parent is not None and parent._lock is not None:
+                return parent._lock
+        return _null_lock
+
+    def _notify_parent(self):
+        if self._parent is not None:
+            parent = self._parent()
+            if parent is not None:
+                parent._child_changed(self)
+
+    def _set_children(self, children):
+        old = self._children
+        self._children = Resource.Children(self, children)
+        kept = set(map(id, self._children))
+        for c in old:
+            if id(c) not in kept:
+                self._child_removed(c)
 
     def _create(self):
-        rc = Resource.RestClient(self._config)
-        qp = self._parameterise()
-        response = rc.post('%s?%s' % (self._path, '&'.join(qp)),
-          headers={'Accept': 'application/xml'})
-        return response
+        return Resource._send(self._config, *self._operation())
 
     def _delete(self):
-        rc = Resource.RestClient(self._config)
-        response = rc.delete('%s/%s' % (self._path, self._id),
-          headers={'Accept': 'application/xml'})
-        return response
+        return Resource._send(self._config, *self._operation(delete=True))
+
+    def _operation(self, delete=False):
+        """Return the ``(method, path, qp)`` tuple of the request that
+        would persist this resource, or ``None`` if there is nothing to
+        persist.
+
+        Supply ``delete=True`` to describe deleting this resource
+        instead.
+
+        """
+        if delete:
+            return ('DELETE', '%s/%s' % (self._path, self._id), [])
+        if self._state == self.STATE_NEW:
+            return ('POST', self._path, self._parameterise())
+        if self._state == self.STATE_DIRTY:
+            return ('PUT', '%s/%s' % (self._path, self._id),
+              self._parameterise())
+        return None
 
     def _parameterise(self):
         if self._state == self.STATE_NEW:
             attrs = self._repr
         else:
-            attrs = self._dirty_repr
+            # Keep the query string stable whatever order attributes 
+            # were changed in.
+            attrs = sorted(self._dirty_repr)
 
+        converters = self._converters()
         qp = []
         for attr_kw in attrs:
             attr = attr_kw.replace('_', '-')
@@ -276,9 +854,7 @@ class Resource(object):
             if self._repr[attr_kw] is None:
                 continue
 
-            typed_value = self._repr[attr_kw]
-            interp = conv_out.replace('#', 'typed_value')
-            raw_value = eval(interp)
+            raw_value = converters[attr][1](self._repr[attr_kw])
 
             if self._qp_hash_base is not None:
                 qp.append('%s[%s]=%s' %
@@ -289,28 +865,38 @@ class Resource(object):
         return qp
 
     def _refresh(self, xml):
+        """Update this resource's identity and read-only attributes
+        from ``xml``, the server's response to a create or update.
+
+        ``xml`` may be a string or an already parsed lxml element;
+        subclasses that read more out of the response should parse it
+        once and pass the element on.
+
+        """
         if xml is None:
             return # _create/_save was a no-op
 
-        xmlobj = pdorclient.utils.xmlobjify(xml)
+        fields = dict(pdorclient.utils.xmlitems(
+          pdorclient.utils.xmlparse(xml)))
+        plan = self._decode_plan()
 
         attrs = {}
         for attr in self.ATTRS.keys():
-            attr_kw = attr.replace('-', '_')
-            (conv_in, conv_out, default, emit) = self.ATTRS[attr]
+            (attr_kw, conv_in, default) = plan[attr]
 
             if attr in ('id',):
                 attr_kw = '_%s' % attr
             elif attr_kw not in self._ro_attrs:
                 continue
 
-            raw_value = getattr(xmlobj, attr, None)
+            raw_value = fields.get(attr)
             if raw_value == '':
                 raw_value = default
+            elif isinstance(raw_value, unicode):
+                raw_value = raw_value.encode('utf-8')
 
             if raw_value != None:
-                interp = conv_in.replace('#', "'%s'" % raw_value)
-                typed_value = eval(interp)
+                typed_value = conv_in(raw_value)
             else:
                 typed_value = None
 
@@ -318,10 +904,32 @@ class Resource(object):
               (self.__class__.__name__, attr_kw, typed_value))
             attrs[attr_kw] = typed_value
 
-        self._enforcing = False
-        for attr_kw in attrs.keys():
-            setattr(self, attr_kw, attrs[attr_kw])
-        self._enforcing = True
+        # Write straight through rather than turning enforcement off 
+        # and on again, which another thread could observe.
+        self.__dict__['_id'] = attrs.pop('_id')
+        self._repr.update(attrs)
+
+        identities = Resource._identities(self._config)
+        if identities is not None and self._id is not None:
+            identities.setdefault((self.__class__, self._id), self)
+
+    def _update(self, attrs):
+        """Update this resource from ``attrs``, constructor arguments
+        decoded from the server; see ``_build()``.  Attributes changed
+        but not yet saved are left alone."""
+        # Let the constructor normalise the values, as it would for a 
+        # new instance.
+        fresh = self.__class__(config=self._config, **attrs)._repr
+        with self._guard():
+            for (attr_kw, conv_in, default) in \
+              self._decode_plan().itervalues():
+                if attr_kw != 'id' and attr_kw not in self._dirty_repr:
+                    self._repr[attr_kw] = fresh.get(attr_kw)
+
+    def _reload_path(self):
+        """Return the path of this resource's XML on the server; see
+        ``reload()``."""
+        return '%s/%s' % (self._path, self._id)
 
     def _resolve_type(self):
         """Return a pretty-printed, humanised representation of this
@@ -329,70 +937,448 @@ class Resource(object):
         return self._r_type[self.type]
 
     def _save(self):
-        rc = Resource.RestClient(self._config)
-        qp = self._parameterise()
-        response = rc.put('%s/%s?%s' % (self._path, self._id,
-          '&'.join(qp)), headers={'Accept': 'application/xml'})
-        return response
+        return Resource._send(self._config, *self._operation())
+
+    def _save_children(self, journal=None):
+        # Only children with outstanding changes are visited.
+        removed = (self._removed or {}).values()
+        pending = (self._pending or {}).values()
+
+        if journal is not None:
+            seqs = map(lambda c: journal.plan(c._operation(delete=True)),
+              removed)
+            seqs.extend(map(lambda c: journal.plan(c._operation()),
+              pending))
+            journal.sync()
+        else:
+            seqs = [None] * (len(removed) + len(pending))
 
-    def delete(self):
-        for c in self._children:
-            logging.debug('Deleting child: %r' % c)
+        for (c, seq) in zip(removed, seqs):
+            logging.debug('Deleting removed child: %r' % c)
             c.delete()
+            del self._removed[id(c)]
+            if seq is not None:
+                journal.done(seq)
+        for (c, seq) in zip(pending, seqs[len(removed):]):
+            logging.debug('Persisting child: %r' % c)
+            c.save()
+            if seq is not None:
+                journal.done(seq, c._id)
+
+    @staticmethod
+    def _send(config, method, path, qp=None):
+        """Send a single request to the server and return the
+        response."""
+        rc = Resource.RestClient(config)
+        headers = {'Accept': 'application/xml'}
+        if not qp:
+            return getattr(rc, method.lower())(path, headers=headers)
+
+        (encoding, gzip) = config.request_body
+        if encoding == 'query' or method not in ('POST', 'PUT'):
+            return getattr(rc, method.lower())(
+              '%s?%s' % (path, '&'.join(qp)), headers=headers)
+
+        (body, body_headers) = pdorclient.utils.encode_body(qp, encoding,
+          gzip)
+        headers.update(body_headers)
+        return getattr(rc, method.lower())(path, body=body,
+          headers=headers)
+
+    def delete(self, journal=None, cascade=True):
+        """Delete this resource and all of its children.
+
+        ``journal``, if supplied, should be an instance of
+        ``pdorclient.journal.Journal``.  Every delete is recorded in the
+        journal before it is sent and again once it has completed, so
+        that an interrupted cascade may be finished with
+        ``Journal.resume()``.
+
+        Supply ``cascade=False`` if the server deletes the children
+        along with this resource.  Only this resource is deleted, in a
+        single request.  Its children are then marked as deleted
+        without contacting the server.
+
+        """
+        with self._guard():
+            if cascade:
+                children = list(self._children)
+            else:
+                children = []
+            if journal is not None:
+                seqs = map(lambda c: journal.plan(c._operation(delete=True)),
+                  children)
+                seq = journal.plan(self._operation(delete=True))
+                journal.sync()
+            else:
+                seqs = [None] * len(children)
+
+            for (c, child_seq) in zip(children, seqs):
+                logging.debug('Deleting child: %r' % c)
+                c.delete()
+                if child_seq is not None:
+                    journal.done(child_seq)
+            self._removed = None
+
+            response = self._delete()
+            logging.debug('Response from remote: %r' % response)
+            if journal is not None:
+                journal.done(seq)
+                journal.sync()
+            if not cascade:
+                for c in self._children:
+                    c._id = None
+                    c._state = self.STATE_DELETED
+                self._pending = None
+            self._id = None
+            self._state = self.STATE_DELETED
+            self._notify_parent()
+
+    def lock(self):
+        """Return the lock that serialises changes to this resource.
+
+        Each zone has a reentrant lock of its own, which its records
+        share; ``save()``, ``delete()`` and changes to a zone's
+        ``records`` hold it, so that threads working on different zones
+        never wait for one another.  Hold it yourself to make a series
+        of changes atomic::
+
+            with zone.lock():
+                zone.records[0].ttl = 300
+                zone.save()
+
+        """
+        return self._guard()
+
+    def pending_changes(self):
+        """Return a list of ``(action, child)`` tuples describing what
+        the next ``save()`` will do to this resource's children.
+
+        ``action`` is one of ``'create'``, ``'update'`` or ``'delete'``.
+        Children removed from this resource are deleted on ``save()``.
+
+        """
+        changes = map(lambda c: ('delete', c),
+          (self._removed or {}).values())
+        for c in (self._pending or {}).values():
+            if c._state == self.STATE_NEW:
+                changes.append(('create', c))
+            else:
+                changes.append(('update', c))
+        return changes
+
+    def reload(self):
+        """Fetch this resource, and only this resource, from the server
+        again and update it in place.
 
-        response = self._delete()
-        logging.debug('Response from remote: %r' % response)
-        self._id = None
-        self._state = self.STATE_DELETED
+        Attributes changed but not yet saved are left alone, as are this
+        resource's children; reloading a zone does not fetch its RRs.
 
-    def save(self):
+        Will raise ``PrematurePersistError`` if this resource has never
+        been saved.  The ``restclient`` error raised for a resource that
+        no longer exists on the server is passed on.
+
+        """
+        if self._path is None or self._id is None:
+            raise pdorclient.errors.PrematurePersistError()
+
+        body = Resource.RestClient(self._config).stream(self._reload_path(),
+          headers={'Accept': 'application/xml'})
+        self._update(self._decode_xml(body.xmlparse(),
+          Resource._lazy(self._config)))
+
+    def save(self, journal=None):
+        """Persist this resource and any pending changes to its
+        children.
+
+        ``journal``, if supplied, should be an instance of
+        ``pdorclient.journal.Journal``.  Every operation is recorded in
+        the journal before it is sent and again once it has completed,
+        so that an interrupted save may be finished with
+        ``Journal.resume()`` instead of starting over.
+
+        """
         if self._path is None:
             raise pdorclient.errors.PrematurePersistError()
 
-        response = None
-        if self._state == self.STATE_NEW:
-            response = self._create()
-        elif self._state == self.STATE_DIRTY:
-            response = self._save()
-        logging.debug('Response from remote: %r' % response)
+        with self._guard():
+            seq = None
+            if journal is not None:
+                seq = journal.plan(self._operation())
+                journal.sync()
+
+            response = None
+            if self._state == self.STATE_NEW:
+                response = self._create()
+            elif self._state == self.STATE_DIRTY:
+                response = self._save()
+            logging.debug('Response from remote: %r' % response)
+            # The server now holds every change; later reloads may 
+            # overwrite them.
+            self._dirty_repr.clear()
+
+            self._refresh(response)
+            if seq is not None:
+                journal.done(seq, self._id)
+
+            self._save_children(journal)
+            if journal is not None:
+                journal.sync()
+
+            self._state = self.STATE_AT_REST
+            self._notify_parent()
 
-        self._refresh(response)
+    @classmethod
+    def _converters(klass):
+        """Return a ``{attr: (conv_in, conv_out)}`` dict of this class's
+        ``ATTRS`` converters, compiled to functions.
 
-        for c in self._children:
-            logging.debug('Persisting child: %r' % c)
-            c.save()
+        The converters are compiled once per class.
 
-        self._state = self.STATE_AT_REST
+        """
+        if '_compiled_converters' not in klass.__dict__:
+            converters = {}
+            for (attr, (conv_in, conv_out, default, emit)) in \
+              klass.ATTRS.iteritems():
+                converters[attr] = (
+                  eval('lambda raw: %s' % conv_in.replace('#', 'raw')),
+                  eval('lambda typed: %s' % conv_out.replace('#', 'typed')))
+            if 'type' in converters:
+                # The ``type`` converters look names up with ``eval()`` 
+                # and ``dir()``; a dict does the same job.
+                types = klass._type_names()
+                names = dict(map(lambda (k, v): (v, k), types.iteritems()))
+                converters['type'] = (
+                  lambda raw: names[str(raw).upper()], types.__getitem__)
+            klass._compiled_converters = converters
+        return klass._compiled_converters
 
     @classmethod
-    def from_xml(klass, xml, config=None):
-        xmlobj = pdorclient.utils.xmlobjify(xml)
+    def _decode_plan(klass, lazy=False):
+        """Return a ``{attr: (attr_kw, conv_in, default)}`` dict of this
+        class's ``ATTRS``.  If ``lazy`` is true, ``TIMESTAMP_ATTRS`` are
+        left as strings.
+
+        The plans are built once per class.
+
+        """
+        if '_compiled_decode_plans' not in klass.__dict__:
+            converters = klass._converters()
+            plan = dict(map(
+              lambda (attr, spec): (attr, (attr.replace('-', '_'),
+                converters[attr][0], spec[2])),
+              klass.ATTRS.iteritems()))
+            lazy_plan = dict(map(
+              lambda (attr, (attr_kw, conv_in, default)): (attr, (attr_kw,
+                attr_kw in klass.TIMESTAMP_ATTRS and str or conv_in,
+                default)),
+              plan.iteritems()))
+            klass._compiled_decode_plans = (plan, lazy_plan)
+        return klass._compiled_decode_plans[bool(lazy)]
 
+    @staticmethod
+    def _lazy(config):
+        """Return true if ``config``, an instance of ``Config``, keeps
+        timestamps as strings."""
+        return config.timestamps == 'lazy'
+
+    @classmethod
+    def _decode_dict(klass, d, lazy=False):
+        """Return the constructor arguments for ``d``; see
+        ``from_dict()``."""
         attrs = {}
-        for attr in klass.ATTRS.keys():
-            attr_kw = attr.replace('-', '_')
-            (conv_in, conv_out, default, emit) = klass.ATTRS[attr]
+        for (attr_kw, conv_in, default) in \
+          klass._decode_plan(lazy).values():
+            value = d.get(attr_kw)
+            if value == '':
+                value = default
+            if value is None:
+                continue
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            if not isinstance(value, list):
+                value = conv_in(value)
+            attrs[attr_kw] = value
+        return attrs
 
-            if attr in xmlobj.attrib.keys():
-                raw_value = xmlobj.attrib[attr]
+    @classmethod
+    def from_dict(klass, d, config=None, lazy=None):
+        """Return a new instance of this class from ``d``, a dict as
+        returned by ``to_dict()``.
+
+        Values may be typed, as ``to_dict()`` returns them, or raw
+        strings, as the server encodes them.  Keys that are not
+        attributes of this class are ignored.
+
+        ``lazy``, if supplied, overrides the ``timestamps`` setting of
+        ``config``; see ``Config.timestamps``.
+
+        """
+        if not isinstance(config, Config):
+            config = Config()
+        if lazy is None:
+            lazy = Resource._lazy(config)
+        return klass(config=config, **klass._decode_dict(d, lazy))
+
+    @staticmethod
+    def save_many(resources, concurrency=8, journal=None):
+        """Save each of ``resources`` using up to ``concurrency`` worker
+        threads.
+
+        ``resources`` may be any iterable, such as a generator; it is
+        consumed lazily, so memory use does not grow with its length.
+
+        ``journal``, if supplied, should be an instance of
+        ``pdorclient.journal.Journal``; see ``save()``.
+
+        Return a ``(saved, errors)`` tuple.  ``saved`` is the number of
+        resources saved; ``errors`` is a list of ``(resource, error)``
+        tuples for the resources that could not be saved.  A failure to
+        save one resource never aborts the others.
+
+        """
+        saved = 0
+        errors = []
+        for (r, result, error) in pdorclient.utils.imap_unordered(
+          lambda r: r.save(journal=journal), resources, concurrency):
+            if error is None:
+                saved += 1
             else:
-                raw_value = getattr(xmlobj, attr, None)
-            if raw_value == '':
-                raw_value = default
+                errors.append((r, error))
+        return (saved, errors)
 
-            if raw_value != None:
-                interp = conv_in.replace('#', "'%s'" % raw_value)
-                typed_value = eval(interp)
+    @staticmethod
+    def reload_many(resources, concurrency=8):
+        """Reload each of ``resources`` using up to ``concurrency``
+        worker threads; see ``reload()``.
+
+        Return a ``(reloaded, errors)`` tuple, as ``save_many()`` does.
+        A failure to reload one resource never aborts the others.
+
+        """
+        reloaded = 0
+        errors = []
+        for (r, result, error) in pdorclient.utils.imap_unordered(
+          lambda r: r.reload(), resources, concurrency):
+            if error is None:
+                reloaded += 1
+            else:
+                errors.append((r, error))
+        return (reloaded, errors)
+
+    def to_dict(self):
+        """Return a dict of this resource's attributes, keyed on
+        attribute name, that may be serialised as JSON.
+
+        Values are typed as ``ATTRS`` describes them: numbers are
+        integers, types are given by name and dates are strings in
+        ``ENCODED_DATE_FMT``.
+
+        """
+        types = self._type_names()
+        d = {}
+        for attr in self.ATTRS.keys():
+            attr_kw = attr.replace('-', '_')
+            if attr == 'id':
+                value = self.id
             else:
+                value = self._repr.get(attr_kw)
+            if value is None:
+                pass
+            elif attr == 'type':
+                value = types[value]
+            elif isinstance(value, datetime.datetime):
+                value = value.strftime(self.ENCODED_DATE_FMT)
+            elif 'id' in attr.split('-'):
+                value = int(value)
+            d[attr_kw] = value
+        return d
+
+    @classmethod
+    def _type_names(klass):
+        """Return a ``{type: name}`` dict of this class's ``TYPE_*``
+        constants.
+
+        The dict is built once per class; ``dir()`` is expensive, and
+        more so on instances.
+
+        """
+        if '_compiled_type_names' not in klass.__dict__:
+            klass._compiled_type_names = dict(map(
+              lambda y: (getattr(klass, y), y.replace('TYPE_', '')),
+              filter(lambda x: x.startswith('TYPE_'), dir(klass))))
+        return klass._compiled_type_names
+
+    @classmethod
+    def _decode_xml(klass, xml, lazy=False, shared=None):
+        """Return the constructor arguments for ``xml``; see
+        ``from_xml()``."""
+        plan = klass._decode_plan(lazy)
+        attrs = {}
+        for (tag, value) in pdorclient.utils.xmlitems(
+          pdorclient.utils.xmlparse(xml)):
+            try:
+                (attr_kw, conv_in, default) = plan[tag]
+            except KeyError:
                 continue
+            if value == '':
+                value = default
+                if value is None:
+                    attrs.pop(attr_kw, None)
+                    continue
+            elif isinstance(value, unicode):
+                value = value.encode('utf-8')
+            value = conv_in(value)
+            if shared is not None and attr_kw != 'id':
+                value = shared.setdefault(value, value)
+            attrs[attr_kw] = value
+        return attrs
 
-            logging.debug('%s.from_xml() found %r=%r' %
-              (klass.__name__, attr_kw, typed_value))
-            attrs[attr_kw] = typed_value
+    @classmethod
+    def from_xml(klass, xml, config=None, lazy=None, shared=None):
+        """Return an instance of this class from ``xml``, a string or
+        lxml element as sent by the server.  The instance is new unless
+        ``config`` has an identity map; see ``_build()``.
 
-        attrs['config'] = config
+        The element's attributes and children are decoded in a single
+        pass, straight into constructor arguments.  Attributes take
+        precedence over child elements of the same name.
 
-        return klass(**attrs)
+        ``lazy``, if supplied, overrides the ``timestamps`` setting of
+        ``config``; see ``Config.timestamps``.
+
+        ``shared``, if supplied, is a dict of values already decoded for
+        other instances.  Values equal to one in ``shared`` are replaced
+        by it, so that instances decoded together hold one copy of each
+        repeated name, content, TTL and the like.  New values are added
+        to it.  Identifiers are never shared.
+
+        """
+        if not isinstance(config, Config):
+            config = Config()
+        if lazy is None:
+            lazy = Resource._lazy(config)
+        return klass._build(klass._decode_xml(xml, lazy, shared), config,
+          Resource._identities(config))
+
+    @classmethod
+    def _build(klass, attrs, config, identities=None):
+        """Return an instance of this class for ``attrs``, constructor
+        arguments decoded from the server.
+
+        If ``identities``, an identity map, already holds an instance
+        with the same ID, that instance is updated and returned instead
+        of a new one; see ``Client``.
+
+        """
+        if identities is None or attrs.get('id') is None:
+            return klass(config=config, **attrs)
+        key = (klass, str(attrs['id']))
+        existing = identities.get(key)
+        if existing is not None:
+            existing._update(attrs)
+            return existing
+        return identities.setdefault(key, klass(config=config, **attrs))
 
 class Record(Resource):
     # http://wiki.powerdns.com/trac/wiki/fields
@@ -402,8 +1388,7 @@ class Record(Resource):
       'change-date': ( 'int(#)', 'str(#)',          None, True),
       'content':     ( '#',      'urllib.quote(#)', None, True),
       'created-at':  (
-        'datetime.datetime('
-          '*(time.strptime(#, Record.ENCODED_DATE_FMT)[0:6]))',
+        'pdorclient.utils.strptime(#, Record.ENCODED_DATE_FMT)',
         '#.strftime(Record.ENCODED_DATE_FMT)',
         None,
         False
@@ -422,8 +1407,7 @@ class Record(Resource):
         True
       ),
       'updated-at':  (
-        'datetime.datetime('
-          '*(time.strptime(#, Record.ENCODED_DATE_FMT)[0:6]))',
+        'pdorclient.utils.strptime(#, Record.ENCODED_DATE_FMT)',
         '#.strftime(Record.ENCODED_DATE_FMT)',
         None,
         False
@@ -466,8 +1450,7 @@ class Record(Resource):
         # The following attributes are core PowerDNS attributes.  The 
         # ``pdns`` nameserver daemon requires them to function.
 
-        assert type in map(lambda y: getattr(Record, y),
-          filter(lambda x: x.startswith('TYPE_'), dir(Record)))
+        assert type in Record._type_names()
         assert isinstance(content, str)
 
         # Record TTLs are normally mandatory.  PowerDNS on Rails adds a 
@@ -489,40 +1472,71 @@ class Record(Resource):
         # attributes.
 
         if created_at is not None:
-            assert isinstance(created_at, datetime.datetime)
+            assert isinstance(created_at, (datetime.datetime, str))
         if updated_at is not None:
-            assert isinstance(updated_at, datetime.datetime)
+            assert isinstance(updated_at, (datetime.datetime, str))
 
         if domain_id is not None:
+            domain_id = str(domain_id)
             Resource.__init__(self,
-              path='/domains/%s/records' % str(domain_id),
+              path='/domains/%s/records' % domain_id,
               id=id, qp_hash_base='record', config=config)
-            self.domain_id = str(domain_id)
         else:
             Resource.__init__(self, path=None, id=id,
               qp_hash_base='record', config=config)
-            self.domain_id = None
-
-        self.change_date = change_date
-        self.content = content
-        self.created_at = created_at
-        self.name = pdorclient.utils.rfc952ify(name)
-        self.prio = prio
-        self.ttl = ttl
-        self.type = type
-        self.updated_at = updated_at
 
-        self._ro_attrs.append('created_at')
-        self._ro_attrs.append('domain_id')
-        self._ro_attrs.append('updated_at')
+        # Nothing is enforced yet, so attributes may be written straight 
+        # to ``_repr``.
+        self._repr.update({
+          'change_date': change_date,
+          'content': content,
+          'created_at': created_at,
+          'domain_id': domain_id,
+          'name': pdorclient.utils.rfc952ify(name),
+          'prio': prio,
+          'ttl': ttl,
+          'type': type,
+          'updated_at': updated_at,
+        })
+
+        self._ro_attrs.update(('created_at', 'domain_id', 'updated_at'))
 
         self._enforcing = True
 
+    @staticmethod
+    def _of_types(elements, types):
+        """Yield those of ``elements``, the server's ``record`` elements,
+        whose type is named in ``types``, a set from ``_types()``.  All
+        are yielded if ``types`` is ``None``.  Elements are filtered
+        before they are decoded."""
+        if types is None:
+            for r in elements:
+                yield r
+            return
+        for r in elements:
+            # As ``_decode_xml()`` reads it: an attribute takes 
+            # precedence over a child element, and case is ignored.
+            rtype = r.get('type')
+            if rtype is None:
+                rtype = r.findtext('type')
+            if rtype is not None and rtype.upper() in types:
+                yield r
+
+    @staticmethod
+    def _types(types):
+        """Return a frozenset of the names of ``types``, an iterable of
+        ``TYPE_*`` values or type names, or ``None`` if ``types`` is
+        ``None``."""
+        if types is None:
+            return None
+        names = Record._type_names()
+        return frozenset(map(lambda t: isinstance(t, int) and names[t] or
+          str(t).upper(), types))
+
 class Template(Resource):
     ATTRS = {
       'created-at':  (
-        'datetime.datetime('
-          '*(time.strptime(#, Record.ENCODED_DATE_FMT)[0:6]))',
+        'pdorclient.utils.strptime(#, Record.ENCODED_DATE_FMT)',
         '#.strftime(Record.ENCODED_DATE_FMT)',
         None,
         False
@@ -531,8 +1545,7 @@ class Template(Resource):
       'name':        ( '#',      'urllib.quote(#)', None, True),
       'ttl':         ( 'int(#)', 'str(#)',          None, True),
       'updated-at':  (
-        'datetime.datetime('
-          '*(time.strptime(#, Record.ENCODED_DATE_FMT)[0:6]))',
+        'pdorclient.utils.strptime(#, Record.ENCODED_DATE_FMT)',
         '#.strftime(Record.ENCODED_DATE_FMT)',
         None,
         False
@@ -547,9 +1560,9 @@ class Template(Resource):
 
         assert isinstance(ttl, int)
         if created_at is not None:
-            assert isinstance(created_at, datetime.datetime)
+            assert isinstance(created_at, (datetime.datetime, str))
         if updated_at is not None:
-            assert isinstance(updated_at, datetime.datetime)
+            assert isinstance(updated_at, (datetime.datetime, str))
 
         Resource.__init__(self, path='/zone_templates', id=id,
           qp_hash_base='template', config=config)
@@ -559,8 +1572,7 @@ class Template(Resource):
         self.ttl = ttl
         self.updated_at = updated_at
 
-        self._ro_attrs.append('created_at')
-        self._ro_attrs.append('updated_at')
+        self._ro_attrs.update(('created_at', 'updated_at'))
 
         self._enforcing = True
 
@@ -580,11 +1592,15 @@ class Template(Resource):
         raise NotImplementedError()
 
     @staticmethod
-    def lookup(name, config=None):
+    def lookup(name, config=None, cache=False):
         """Lookup and return a ``Template`` object for ``name``.
 
         ``config``, if supplied, should be an instance of ``Config``.
 
+        Supply ``cache=True`` to answer from the in-process miss cache
+        when possible.  Names that were not found are remembered for
+        ``Resource.MISS_CACHE_TTL`` seconds.
+
         Will raise ``NameNotFoundError`` if an exact match on ``name``
         does not exist.
 
@@ -592,18 +1608,20 @@ class Template(Resource):
         if not isinstance(config, Config):
             config = Config()
 
-        rc = restclient.RestClient()
-        rc.transport.add_credentials(*config.credentials)
+        if cache and Resource._misses(config).get((config.url, Template,
+          name)):
+            raise pdorclient.errors.NameNotFoundError(name)
 
-        response = rc.get('%s/zone_templates' % config.url,
-          headers={'Accept': 'application/xml'})
-        xmlobj = pdorclient.utils.xmlobjify(response)
+        rc = Resource.RestClient(config)
+        root = rc.stream('/zone_templates',
+          headers={'Accept': 'application/xml'}).xmlparse()
 
-        for t in xmlobj.iterchildren():
+        for t in root.iterchildren():
             template = Template.from_xml(t, config)
             if template.name == name:
                 return template
 
+        Resource._misses(config).set((config.url, Template, name), True)
         raise pdorclient.errors.NameNotFoundError(name)
 
 class Zone(Resource):
@@ -612,8 +1630,7 @@ class Zone(Resource):
     ATTRS = {
       'account':         ( '#',      '#',               None, False),
       'created-at':      (
-        'datetime.datetime('
-          '*(time.strptime(#, Record.ENCODED_DATE_FMT)[0:6]))',
+        'pdorclient.utils.strptime(#, Record.ENCODED_DATE_FMT)',
         '#.strftime(Zone.ENCODED_DATE_FMT)',
         None,
         False
@@ -639,8 +1656,7 @@ class Zone(Resource):
         True
        ),
       'updated-at':      (
-        'datetime.datetime('
-          '*(time.strptime(#, Record.ENCODED_DATE_FMT)[0:6]))',
+        'pdorclient.utils.strptime(#, Record.ENCODED_DATE_FMT)',
         '#.strftime(Zone.ENCODED_DATE_FMT)',
         None,
         False
@@ -653,11 +1669,40 @@ class Zone(Resource):
     TYPE_SLAVE      = 2
     TYPE_SUPERSLAVE = 3                          # Not supported by PDOR
 
+    # Zone IDs are stable for the life of a zone, so a name to ID mapping
+    # may be safely remembered for a while.  Keyed on ``(url, name)``.
+    ID_CACHE_SIZE = 4096
+    ID_CACHE_TTL  = 300
+    _id_cache = pdorclient.utils.TtlCache(ID_CACHE_SIZE, ID_CACHE_TTL)
+
+    # Lookups and searches in flight, so that concurrent identical ones 
+    # are sent once.  Keyed on ``(url, username, password, path, ...)``.
+    _in_flight = pdorclient.utils.SingleFlight()
+
     def __getattr__(self, name):
         if name == 'records':
             return self._children
         return Resource.__getattr__(self, name)
 
+    @staticmethod
+    def _ids(config):
+        """Return the zone ID cache to use with ``config``: a
+        ``Client``'s own, or the process-wide one."""
+        return getattr(config, 'id_cache', Zone._id_cache)
+
+    @staticmethod
+    def _flights(config):
+        """Return the table of lookups in flight to use with ``config``:
+        a ``Client``'s own, or the process-wide one."""
+        return getattr(config, 'flights', Zone._in_flight)
+
+    @staticmethod
+    def _miss_key(name, config):
+        """Return the key of the zone ``name`` in the caches of names not
+        found.  Names that differ only in case or trailing periods, as
+        ``rfc952ify()`` sees them, share a key."""
+        return (config.url, Zone, str(name).lower().rstrip('.'))
+
     def __init__(self, name, type, master=None, last_check=None,
       id=None, notified_serial=None, account=None, created_at=None,
       updated_at=None, notes=None, ttl=None, template=None,
@@ -666,8 +1711,7 @@ class Zone(Resource):
         # The following attributes are core PowerDNS attributes.  The 
         # ``pdns`` nameserver daemon requires them to function.
 
-        assert type in map(lambda y: getattr(Zone, y),
-          filter(lambda x: x.startswith('TYPE_'), dir(Zone)))
+        assert type in Zone._type_names()
         if isinstance(master, str):
             master = master.split(',')
         if master is not None:
@@ -691,9 +1735,9 @@ class Zone(Resource):
         # attributes.
 
         if created_at is not None:
-            assert isinstance(created_at, datetime.datetime)
+            assert isinstance(created_at, (datetime.datetime, str))
         if updated_at is not None:
-            assert isinstance(updated_at, datetime.datetime)
+            assert isinstance(updated_at, (datetime.datetime, str))
         if notes is not None:
             assert isinstance(notes, str)
         if ttl is not None:
@@ -716,43 +1760,141 @@ class Zone(Resource):
         self.updated_at = updated_at
         self.zone_template_name = template
 
-        self._ro_attrs.append('account')
-        self._ro_attrs.append('created_at')
-        self._ro_attrs.append('last_check')
-        self._ro_attrs.append('notified_serial')
-        self._ro_attrs.append('updated_at')
-        self._ro_attrs.append('zone_template_name')
+        self._ro_attrs.update(('account', 'created_at', 'last_check',
+          'notified_serial', 'updated_at', 'zone_template_name'))
 
+        self._lock = threading.RLock()
         self._enforcing = True
 
     def __setattr__(self, name, value):
         if name == 'records':
-            self._children = value
+            self._set_children(value)
         else:
             Resource.__setattr__(self, name, value)
 
+    def _adopt(self, record):
+        # Records added to a persisted zone may be persisted straight 
+        # away.  Records added to a new zone are adopted in ``_refresh``.  
+        # Records read from the server already belong here.
+        if self._id is not None and \
+          record._repr.get('domain_id') != self._id:
+            record._path = '/domains/%s/records' % self._id
+            record._repr['domain_id'] = self._id
+
+    def _reload_path(self):
+        # Leave the RRs behind; see ``_path()``.
+        return Zone._path(int(self._id), False, self._config)
+
     def _refresh(self, xml):
+        if xml is not None:
+            xml = pdorclient.utils.xmlparse(xml)
         Resource._refresh(self, xml)
 
         if xml is not None:
-            xmlobj = pdorclient.utils.xmlobjify(xml)
-
-            if hasattr(xmlobj, 'records') and \
-              xmlobj.records.countchildren() > 0:
-                # This zone has been created from a template.  
-                # Instantiate RRs from what the server is telling us we 
-                # should have.
-                for r in xmlobj.records.iterchildren():
-                    r = Record.from_xml(r, self._config)
-                    self.records.append(r)
-
-        # Update children's domain-id and resource paths so that 
-        # they, too, may be persisted.
-        for r in self.records:
-            r._enforcing = False
-            r._path = '/domains/%s/records' % str(self.id)
-            r.domain_id = str(self.id)
-            r._enforcing = True
+            # If this zone has been created from a template, instantiate 
+            # RRs from what the server is telling us we should have.
+            lazy = Resource._lazy(self._config)
+            self.records.extend(Record.from_xml(r, self._config, lazy)
+              for r in xml.iterfind('records/record'))
+
+        if self._id is not None:
+            Zone._ids(self._config).set((self._config.url, self.name),
+              self.id)
+            Resource._forget_miss(Zone._miss_key(self.name, self._config))
+
+        # A newly created zone now knows its ID.  Update children's 
+        # domain-id and resource paths so that they, too, may be 
+        # persisted.
+        if self._state == self.STATE_NEW:
+            for r in self.records:
+                self._adopt(r)
+
+    def delete(self, journal=None, cascade=True):
+        """Delete this zone and all of its records.
+
+        PowerDNS on Rails deletes a zone's records along with the zone.
+        Supply ``cascade=False`` to delete the zone in a single request
+        rather than deleting each record first; see
+        ``Resource.delete()``.
+
+        """
+        name = self.name
+        Resource.delete(self, journal, cascade)
+        Zone._ids(self._config).discard((self._config.url, name))
+
+    def delete_records(self, predicate, concurrency=8, journal=None):
+        """Delete every record of this zone for which ``predicate``
+        returns true.
+
+        Return a ``(deleted, errors)`` tuple; see
+        ``idelete_records()``.
+
+        """
+        deleted = 0
+        errors = []
+        for (r, result, error) in self.idelete_records(predicate,
+          concurrency, journal):
+            if error is None:
+                deleted += 1
+            else:
+                errors.append((r, error))
+        return (deleted, errors)
+
+    def idelete_records(self, predicate, concurrency=8, journal=None):
+        """Delete every record of this zone for which ``predicate``
+        returns true and yield ``(record, None, error)`` tuples as each
+        delete completes.
+
+        ``predicate`` is called with each ``Record`` instance in
+        ``records``.  The matching records are removed from ``records``
+        straight away and deleted by up to ``concurrency`` worker
+        threads.  ``error`` is ``None`` on success.  Otherwise it is
+        the exception raised while deleting ``record``.  A failure on
+        one record never aborts the others.  Records that could not be
+        deleted remain pending, and the next ``save()`` tries them
+        again.  Records that were never saved are simply dropped, and
+        are not yielded.
+
+        ``journal``, if supplied, should be an instance of
+        ``pdorclient.journal.Journal``; see ``Resource.delete()``.
+
+        """
+        with self._guard():
+            doomed = filter(predicate, self.records)
+            self.records.discard(doomed)
+            # The workers delete these.  A ``save()`` in the meantime
+            # must not delete them again.
+            if self._removed:
+                for r in doomed:
+                    self._removed.pop(id(r), None)
+
+        for (r, result, error) in pdorclient.utils.imap_unordered(
+          lambda r: r.delete(journal=journal),
+          filter(lambda r: r._id is not None, doomed), concurrency):
+            if error is not None:
+                with self._guard():
+                    self._child_removed(r)
+            yield (r, result, error)
+
+    @classmethod
+    def from_dict(klass, d, config=None, lazy=None):
+        d = dict(d)
+        template = d.pop('zone_template_name', None)
+        zone = super(Zone, klass).from_dict(d, config, lazy)
+        zone._repr['zone_template_name'] = template
+        return zone
+
+    @staticmethod
+    def from_snapshot(path, config=None):
+        """Load and return a ``Zone`` instance, with all of its
+        ``Record`` instances, from a snapshot written by
+        ``to_snapshot()``.
+
+        See ``pdorclient.snapshot``.
+
+        """
+        import pdorclient.snapshot
+        return pdorclient.snapshot.load(path, config)
 
     @staticmethod
     def from_template(name, template, type, config=None):
@@ -774,8 +1916,17 @@ class Zone(Resource):
         return Zone(name=name, type=type, template=template,
           config=config)
 
+    def to_snapshot(self, path):
+        """Write this zone and its records to a snapshot at ``path``.
+
+        See ``pdorclient.snapshot``.
+
+        """
+        import pdorclient.snapshot
+        pdorclient.snapshot.dump(self, path)
+
     @staticmethod
-    def lookup(name, match=None, config=None):
+    def lookup(name, match=None, config=None, processes=1, types=None):
         """Lookup and return a ``Zone`` instance for ``name``.
 
         By default, this method will query for *all* DNS resource
@@ -790,8 +1941,31 @@ class Zone(Resource):
         Alternatively, supply ``match=False`` to ignore all RRs.  The
         returned ``Zone`` instance will contain no ``Record`` instances.
 
+        ``match`` may also be a list of substrings, to fetch the RRs that
+        match any of them.  Substrings that contain another are dropped,
+        as the shorter one matches all of their RRs already; the rest are
+        fetched in parallel.  RRs matched by more than one substring are
+        returned once::
+
+            Zone.lookup('example.com', match=['r404-', 'r405-'])
+
+        Unlike a single ``match``, substrings in a list need not be valid
+        names; they are only lower cased.
+
+        ``types``, if supplied, limits the RRs returned to those of the
+        given types, either ``Record.TYPE_*`` values or names such as
+        ``'MX'``.  RRs of other types are skipped as they are read and
+        never decoded.
+
         ``config``, if supplied, should be an instance of ``Config``.
 
+        ``processes``, if greater than one, is the number of worker
+        processes to decode RRs in; see ``pdorclient.fanout``.
+
+        Identical lookups made by several threads at once are sent to
+        the server, and decoded, only once.  Every thread is returned a
+        ``Zone`` instance of its own.
+
         Will raise ``NameNotFoundError`` if an exact match on ``name``
         does not exist.
 
@@ -805,14 +1979,132 @@ class Zone(Resource):
         if not isinstance(config, Config):
             config = Config()
 
-        if isinstance(name, int): # pragma: no cover
+        if isinstance(match, (list, tuple, set, frozenset)) and not match:
+            match = False
+        paths = Zone._paths(name, match, config)
+        records = not (isinstance(match, bool) and match is False)
+        types = Record._types(types)
+        complete = (match is None or match is True) and types is None
+
+        def fetch(path):
+            body = Resource.RestClient(config).stream(path,
+              headers={'Accept': 'application/xml'})
+            if records and processes > 1:
+                import pdorclient.fanout
+                return pdorclient.fanout.decode_zone(body.read(), config,
+                  processes, complete, types)
+            return Zone._decode(body.xmlparse(), records, config, complete,
+              types)
+
+        def fetch_all():
+            if len(paths) == 1:
+                return fetch(paths[0])
+            zones = {}
+            errors = []
+            for (path, zone, error) in pdorclient.utils.imap_unordered(
+              fetch, paths, len(paths)):
+                if error is not None:
+                    errors.append(error)
+                zones[path] = zone
+            if errors:
+                raise errors[0]
+
+            # Keep the first of each RR matched by several substrings.  
+            # With an identity map, every response was merged into the 
+            # same instance already.
+            zone = zones[paths[0]]
+            seen = set(map(lambda r: r._id, zone.records))
+            for other in map(zones.get, paths[1:]):
+                if other is zone:
+                    continue
+                fresh = filter(lambda r: r._id not in seen, other.records)
+                seen.update(map(lambda r: r._id, fresh))
+                zone._merge(fresh)
+            return zone
+
+        # With an identity map, every caller is meant to get the same 
+        # instance.
+        copy = lambda zone: zone._copy()
+        if Resource._identities(config) is not None:
+            copy = None
+        zone = Zone._flights(config).do((config.url,) + config.credentials +
+          (Resource._lazy(config), tuple(paths), records, types), fetch_all,
+          copy)
+        # The zone, or the one it was copied from, may have been decoded
+        # for another caller.
+        if copy is not None and zone._config is not config:
+            zone._rebind(config)
+        return zone
+
+    @staticmethod
+    def _decode(xml, records, config, complete=False, types=None):
+        """Return a ``Zone`` instance for the server's zone XML, with a
+        ``Record`` instance for each of its RRs if ``records`` is
+        true.  ``complete`` is as for ``_merge()`` and ``types`` as for
+        ``Record._of_types()``."""
+        root = pdorclient.utils.xmlparse(xml)
+        lazy = Resource._lazy(config)
+        zone = Zone.from_xml(root, config, lazy)
+        if records:
+            # Names, contents and TTLs repeat throughout a zone.  Let its
+            # records share one copy of each.
+            shared = {}
+            zone._merge((Record.from_xml(r, config, lazy, shared)
+              for r in Record._of_types(root.iterfind('records/record'),
+              types)), complete)
+        return zone
+
+    def _merge(self, records, complete=False):
+        """Add ``records``, just decoded from the server, to this
+        zone's records.
+
+        Without an identity map, ``records`` are new and are simply
+        appended.  With one, records this zone already holds have been
+        updated in place; only the others are added, and records removed
+        from this zone but not yet deleted stay removed.  If ``complete``
+        is true, ``records`` are all the zone's RRs: records at rest
+        that are not among them were deleted elsewhere, and are dropped
+        and marked as deleted.
+
+        """
+        if Resource._identities(self._config) is None:
+            self.records.extend(records)
+            return
+
+        records = list(records)
+        with self._guard():
+            held = set(map(id, self.records))
+            held.update(self._removed or ())
+            if complete:
+                fresh = set(map(id, records))
+                gone = filter(lambda r: r._state == self.STATE_AT_REST and
+                  id(r) not in fresh, self.records)
+                self.records.discard(gone)
+                for r in gone:
+                    self._removed.pop(id(r), None)
+                    r._id = None
+                    r._state = self.STATE_DELETED
+            self.records.extend(filter(lambda r: id(r) not in held,
+              records))
+
+    @staticmethod
+    def _fetch(name, match, config):
+        """Return the server's XML for the zone ``name``, with the RRs
+        selected by ``match``, as an unread
+        ``pdorclient.utils.ResponseBody``; see ``lookup()``."""
+        return Resource.RestClient(config).stream(
+          Zone._path(name, match, config),
+          headers={'Accept': 'application/xml'})
+
+    @staticmethod
+    def _path(name, match, config):
+        """Return the path of the server's XML for the zone ``name``,
+        with the RRs selected by ``match``; see ``lookup()``."""
+        if isinstance(name, int):
             id = name
         else:
             id = Zone.lookup_id(name, config)
 
-        rc = restclient.RestClient()
-        rc.transport.add_credentials(*config.credentials)
-
         # We can either query for all RRs or a subset of RRs.  There is 
         # presently no way to tell PDOR that we do not want any RRs.  
         # For now, query for RRs that are unlikely to exist (to keep 
@@ -825,30 +2117,69 @@ class Zone(Resource):
             match_normalised = None # Fetch all RRs
 
         if match_normalised is not None:
-            response = rc.get('%s/domains/%d?record=%s' %
-              (config.url, id, match_normalised),
-              headers={'Accept': 'application/xml'})
-        else:
-            response = rc.get('%s/domains/%d' % (config.url, id),
-              headers={'Accept': 'application/xml'})
-        logging.debug('Response from remote: %r' % response)
-        xmlobj = pdorclient.utils.xmlobjify(response)
+            return '/domains/%d?record=%s' % (id, match_normalised)
+        return '/domains/%d' % id
 
-        name = Zone.from_xml(xmlobj, config)
+    @staticmethod
+    def _paths(name, match, config):
+        """Return a list of the paths that together select the RRs
+        selected by ``match``, one per substring if it is a list; see
+        ``lookup()``.  The zone's ID is looked up once."""
+        if not isinstance(match, (list, tuple, set, frozenset)):
+            return [Zone._path(name, match, config)]
+        patterns = Zone._patterns(match)
+        if not patterns:
+            return [Zone._path(name, False, config)]
+        if not isinstance(name, int):
+            name = Zone.lookup_id(name, config)
+        return map(lambda p: '/domains/%d?record=%s' % (name,
+          urllib.quote(p)), patterns)
 
-        if not (isinstance(match, bool) and match is False):
-            for r in xmlobj.records.iterchildren():
-                r = Record.from_xml(r, config)
-                name.records.append(r)
+    @staticmethod
+    def _patterns(match):
+        """Return a sorted list of the substrings in ``match``, lower
+        cased and stripped, that are not already covered by a shorter
+        one.  Substrings are not names and are not checked as such."""
+        kept = []
+        for pattern in sorted(set(filter(None, map(lambda m:
+          str(m).strip().lower(), match))), key=len):
+            if not filter(lambda k: k in pattern, kept):
+                kept.append(pattern)
+        return sorted(kept)
+
+    @staticmethod
+    def irecords(name, match=None, config=None, types=None):
+        """Yield a ``Record`` instance for each RR in the zone ``name``.
 
-        return name
+        Unlike ``lookup()``, no ``Zone`` instance is built and each
+        ``Record`` is created only as it is consumed; memory use does
+        not grow with the number of RRs held by the caller.
+
+        ``match`` and ``config`` are as for ``lookup()``, although
+        ``match`` may not be a list.  So is ``types``.
+
+        """
+        if not isinstance(config, Config):
+            config = Config()
+
+        lazy = Resource._lazy(config)
+        for r in Record._of_types(Zone._fetch(name, match,
+          config).xmliterparse('record'), Record._types(types)):
+            yield Record.from_xml(r, config, lazy)
 
     @staticmethod
-    def lookup_id(name, config=None):
+    def lookup_id(name, config=None, cache=False):
         """Return the PDNS-internal domain ID for ``name``.
 
         ``config``, if supplied, should be an instance of ``Config``.
 
+        Supply ``cache=True`` to answer from the in-process ID and miss
+        caches when possible.  Cached IDs expire after
+        ``Zone.ID_CACHE_TTL`` seconds and are dropped when the zone is
+        deleted through this library.  Names that were not found are
+        remembered for ``Resource.MISS_CACHE_TTL`` seconds, or until a
+        zone of that name is saved through this library.
+
         Will raise ``NameNotFoundError`` if an exact match on ``name``
         does not exist.
 
@@ -858,19 +2189,229 @@ class Zone(Resource):
         if not isinstance(config, Config):
             config = Config()
 
-        rc = restclient.RestClient()
-        rc.transport.add_credentials(*config.credentials)
+        if cache:
+            id = Zone._ids(config).get((config.url, name))
+            if id is not None:
+                return id
+            if Resource._misses(config).get(Zone._miss_key(name, config)):
+                raise pdorclient.errors.NameNotFoundError(name)
 
-        # This is the only REST verb in PowerDNS on Rails that spits out 
-        # a JSON-encoded response.  The rest of the stuff uses XML.
-        response = simplejson.loads(rc.get(
-          '%s/search/results?q=%s' %
-          (config.url, pdorclient.utils.rfc952ify(name)),
-          headers={'Accept': 'application/json'}))
-        logging.debug('Response from remote: %r' % response)
-
-        for z in response:
-            if z['domain']['name'] == name:
-                return int(z['domain']['id'])
+        for (found, id) in Zone._search(pdorclient.utils.rfc952ify(name),
+          config):
+            if found == name:
+                Zone._ids(config).set((config.url, name), id)
+                return id
 
+        Resource._misses(config).set(Zone._miss_key(name, config), True)
         raise pdorclient.errors.NameNotFoundError(name)
+
+    @staticmethod
+    def lookup_ids(names, config=None, cache=False, concurrency=1,
+      errors=None):
+        """Return the PDNS-internal domain IDs for many names at once.
+
+        Return an ``(ids, misses)`` tuple.  ``ids`` maps each name that
+        was found to its ID; ``misses`` is a sorted list of the names
+        that do not exist.
+
+        PowerDNS on Rails searches by substring, so names that share a
+        parent (``1.10.in-addr.arpa`` and ``2.10.in-addr.arpa``) are
+        resolved together with a single search for the parent.  Names
+        that were not found that way are searched for individually, in
+        case the server truncated a large result set.  Up to
+        ``concurrency`` searches are run in parallel.
+
+        ``config`` and ``cache`` are as for ``lookup_id()``.
+
+        A search that fails is retried for each of the names it covered.
+        ``errors``, if supplied, should be a dict; names whose own search
+        failed too are mapped in it to the error and are neither found
+        nor missing.  Otherwise the first such error is raised.
+
+        Will raise ``Rfc952ViolationError`` if any name is nonsense.
+
+        """
+        if not isinstance(config, Config):
+            config = Config()
+
+        wanted = set()
+        for name in names:
+            pdorclient.utils.rfc952ify(name)
+            wanted.add(name)
+
+        ids = {}
+        missing = set()
+        if cache:
+            for name in wanted:
+                id = Zone._ids(config).get((config.url, name))
+                if id is not None:
+                    ids[name] = id
+                elif Resource._misses(config).get(Zone._miss_key(name,
+                  config)):
+                    missing.add(name)
+            wanted -= missing
+
+        searched = set()
+        failed = {}
+        def resolve(terms):
+            terms = filter(lambda t: t not in searched and
+              any(t in n for n in wanted if n not in ids), terms)
+            searched.update(terms)
+            for (term, results, error) in pdorclient.utils.imap_unordered(
+              lambda t: Zone._search(t, config), terms, concurrency):
+                if error is not None:
+                    # Leave the names it covered to their own searches.
+                    searched.discard(term)
+                    failed[term] = error
+                    continue
+                failed.pop(term, None)
+                for (found, id) in results:
+                    if found in wanted and found not in ids:
+                        Zone._ids(config).set((config.url, found), id)
+                        ids[found] = id
+
+        resolve(Zone._search_terms(wanted - set(ids)))
+        failed.clear()
+        resolve(sorted(map(pdorclient.utils.rfc952ify, wanted - set(ids))))
+
+        for name in wanted - set(ids):
+            error = failed.get(pdorclient.utils.rfc952ify(name))
+            if error is None:
+                Resource._misses(config).set(Zone._miss_key(name, config),
+                  True)
+                missing.add(name)
+            elif errors is None:
+                raise error
+            else:
+                errors[name] = error
+        return (ids, sorted(missing))
+
+    @staticmethod
+    def _search(term, config):
+        """Return a list of ``(name, id)`` tuples for every zone whose
+        name contains ``term``.
+
+        Identical searches made by several threads at once are sent to
+        the server only once.
+
+        """
+        import simplejson
+        path = '/search/results?q=%s' % term
+
+        def search():
+            rc = Resource.RestClient(config)
+
+            # This is the only REST verb in PowerDNS on Rails that spits 
+            # out a JSON-encoded response.  The rest of the stuff uses 
+            # XML.
+            response = simplejson.loads(rc.stream(path,
+              headers={'Accept': 'application/json'}).read())
+            logging.debug('Response from remote: %r' % response)
+
+            return map(lambda z: (z['domain']['name'],
+              int(z['domain']['id'])), response)
+
+        return Zone._flights(config).do((config.url,) +
+          config.credentials + (path,), search, copy=list)
+
+    @staticmethod
+    def _search_terms(names):
+        """Return a sorted list of search terms that together cover
+        ``names``.
+
+        Names are grouped by their parent.  Groups with more than one
+        member are represented by their parent; everything else by the
+        name itself.  Parents of a single label (``com``) would match far
+        too much to be worth it.
+
+        """
+        groups = {}
+        for name in names:
+            normalised = pdorclient.utils.rfc952ify(name)
+            parent = normalised.partition('.')[2]
+            if '.' not in parent:
+                parent = normalised
+            groups.setdefault(parent, set()).add(normalised)
+
+        terms = set()
+        for (parent, members) in groups.iteritems():
+            if len(members) > 1:
+                terms.add(parent)
+            else:
+                terms.update(members)
+        return sorted(terms)
+
+    @staticmethod
+    def lookup_many(names, match=None, concurrency=8, config=None,
+      types=None):
+        """Lookup many zones at once.
+
+        Return a ``(zones, errors)`` tuple of dicts.  ``zones`` maps
+        each name that was found to its ``Zone`` instance; ``errors``
+        maps each name that could not be fetched to the exception that
+        was raised for it.  A failure on one name never aborts the
+        lookup of the others.
+
+        See ``ilookup_many()`` for a description of the arguments.
+
+        """
+        zones = {}
+        errors = {}
+        for (name, zone, error) in Zone.ilookup_many(names, match=match,
+          concurrency=concurrency, config=config, types=types):
+            if error is None:
+                zones[name] = zone
+            else:
+                errors[name] = error
+        return (zones, errors)
+
+    @staticmethod
+    def ilookup_many(names, match=None, concurrency=8, config=None,
+      types=None):
+        """Lookup many zones at once and yield ``(name, zone, error)``
+        tuples as each lookup completes.
+
+        Zone IDs are resolved in one batch with ``lookup_ids()``, and
+        from the in-process ID cache where possible.  Up to
+        ``concurrency`` zones are fetched in parallel; each worker
+        thread reuses its own persistent connection to the server.
+
+        ``match`` and ``types`` are applied to every zone; see
+        ``lookup()``.
+
+        ``config``, if supplied, should be an instance of ``Config``.
+
+        ``error`` is ``None`` on success.  Otherwise, ``zone`` is
+        ``None`` and ``error`` is the exception raised while looking up
+        ``name`` (typically ``NameNotFoundError``).
+
+        """
+        if not isinstance(config, Config):
+            config = Config()
+
+        unique = []
+        seen = set()
+        for name in names:
+            if name in seen:
+                continue
+            seen.add(name)
+            try:
+                pdorclient.utils.rfc952ify(name)
+            except pdorclient.errors.Rfc952ViolationError, e:
+                yield (name, None, e)
+                continue
+            unique.append(name)
+
+        errors = {}
+        (ids, misses) = Zone.lookup_ids(unique, config, cache=True,
+          concurrency=concurrency, errors=errors)
+        for name in misses:
+            yield (name, None, pdorclient.errors.NameNotFoundError(name))
+        for (name, error) in sorted(errors.iteritems()):
+            yield (name, None, error)
+
+        fetch = lambda name: Zone.lookup(ids[name], match=match,
+          config=config, types=types)
+        for result in pdorclient.utils.imap_unordered(fetch,
+          filter(lambda name: name in ids, unique), concurrency):
+            yield result
@@ -0,0 +1,358 @@
+"""BIND (RFC 1035) master file import and export.
+
+Both directions stream.  ``parse()`` reads a master file one line at a
+time and yields ``Record`` instances as it goes, and ``iterlines()``
+yields a zone's master file one line at a time.  Neither ever holds the
+whole text of a zone in memory, so zone files of millions of lines may
+be converted in constant memory::
+
+    >>> from pdorclient import bind
+    >>> zone = Zone.lookup('example.net')
+    >>> bind.dump(zone, open('/var/tmp/example.net.zone', 'w'))
+    >>> bind.load(zone, open('/var/tmp/example.org.zone'))
+
+Only the ``IN`` class is understood.  ``$ORIGIN`` and ``$TTL`` are
+honoured; ``$INCLUDE`` and ``$GENERATE`` are not supported.
+
+PowerDNS stores names without their trailing period, and stores the
+preference of ``MX`` and ``SRV`` records in ``prio`` rather than in
+``content``.  Names are converted on the way in and out.
+
+"""
+
+import logging
+import pdorclient
+import pdorclient.errors
+import re
+
+logger = logging.getLogger(__name__)
+
+CLASSES = ('IN', 'CH', 'HS', 'CS')
+
+# Record types whose data is a single domain name.
+NAME_TYPES = ('CNAME', 'NS', 'PTR')
+
+# Record types whose data is one or more character strings.
+TEXT_TYPES = ('SPF', 'TXT')
+
+# A single character string may not be longer than this.
+MAX_STRING = 255
+
+_SPECIALS = re.compile(r'[";()\\]')
+_TTL_UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+_TTL = re.compile(r'^(?:\d+[smhdw]?)+$', re.I)
+_TTL_PART = re.compile(r'(\d+)([smhdw]?)', re.I)
+
+def _seconds(token):
+    """Return ``token`` as a number of seconds, or ``None`` if it is not
+    a TTL.  BIND-style units (``1h30m``) are understood."""
+    if token.isdigit():
+        return int(token)
+    if _TTL.match(token) is None:
+        return None
+    return sum(map(lambda (n, unit): int(n) * _TTL_UNITS[unit.lower() or 's'],
+      _TTL_PART.findall(token)))
+
+def _tokenise(line):
+    """Split ``line`` into tokens.
+
+    Return a ``(tokens, depth)`` tuple; ``depth`` is the change in
+    parenthesis nesting.  Quoted strings are returned with their quotes
+    so that they may be told apart from bare words.
+
+    """
+    if _SPECIALS.search(line) is None:
+        return (line.split(), 0)
+
+    tokens = []
+    depth = 0
+    token = []
+    quoted = False
+    i = 0
+    n = len(line)
+    while i < n:
+        c = line[i]
+        if quoted:
+            token.append(c)
+            if c == '\\' and i + 1 < n:
+                i += 1
+                token.append(line[i])
+            elif c == '"':
+                quoted = False
+                tokens.append(''.join(token))
+                token = []
+        elif c == '"':
+            if token:
+                tokens.append(''.join(token))
+            token = [c]
+            quoted = True
+        elif c == ';':
+            break
+        elif c in ' \t\r\n()':
+            if token:
+                tokens.append(''.join(token))
+                token = []
+            if c == '(':
+                depth += 1
+            elif c == ')':
+                depth -= 1
+        else:
+            if c == '\\' and i + 1 < n:
+                token.append(c)
+                i += 1
+                c = line[i]
+            token.append(c)
+        i += 1
+    if quoted:
+        raise ValueError('Unterminated quoted string')
+    if token:
+        tokens.append(''.join(token))
+    return (tokens, depth)
+
+def _entries(lines):
+    """Yield a ``(lineno, line, inherits_owner, tokens)`` tuple for each
+    logical line in ``lines``, joining lines split with parentheses."""
+    pending = None
+    depth = 0
+    for (lineno, line) in enumerate(lines, 1):
+        try:
+            (tokens, change) = _tokenise(line)
+        except ValueError, e:
+            raise pdorclient.errors.ZoneFileParseError(lineno, line, str(e))
+        if pending is None:
+            if not tokens:
+                continue
+            pending = (lineno, line, line[0] in ' \t', tokens)
+        else:
+            pending[3].extend(tokens)
+        depth += change
+        if depth < 0:
+            raise pdorclient.errors.ZoneFileParseError(lineno, line,
+              'Unbalanced parentheses')
+        if depth == 0:
+            yield pending
+            pending = None
+    if pending is not None:
+        raise pdorclient.errors.ZoneFileParseError(pending[0], pending[1],
+          'Unbalanced parentheses')
+
+def _absolute(name, origin):
+    """Return ``name`` made absolute against ``origin``, without its
+    trailing period."""
+    if name == '@':
+        if origin is None:
+            raise ValueError('No origin for relative name %r' % name)
+        return origin
+    if name.endswith('.'):
+        return name[:-1]
+    if origin is None:
+        raise ValueError('No origin for relative name %r' % name)
+    return '%s.%s' % (name, origin)
+
+def _relative(name, origin):
+    """Return ``name`` as it should be written in a master file whose
+    origin is ``origin``."""
+    if name == origin:
+        return '@'
+    if name.endswith('.' + origin):
+        return name[:-len(origin) - 1]
+    return name + '.'
+
+def _unquote(token):
+    if token.startswith('"'):
+        token = token[1:-1]
+    return re.sub(r'\\(.)', r'\1', token)
+
+def _quote(text):
+    text = text.replace('\\', '\\\\').replace('"', '\\"')
+    if len(text) <= MAX_STRING:
+        return '"%s"' % text
+    return ' '.join(map(lambda i: '"%s"' % text[i:i + MAX_STRING],
+      range(0, len(text), MAX_STRING)))
+
+def _rdata(type_name, rdata, origin):
+    """Return a ``(content, prio)`` tuple for the ``rdata`` tokens of a
+    record of type ``type_name``."""
+    prio = None
+    if type_name in NAME_TYPES:
+        (target,) = rdata
+        content = _absolute(target, origin)
+    elif type_name == 'MX':
+        (prio, target) = rdata
+        content = _absolute(target, origin)
+    elif type_name == 'SRV':
+        (prio, weight, port, target) = rdata
+        content = '%s %s %s' % (weight, port, _absolute(target, origin))
+    elif type_name == 'SOA':
+        (primary, contact) = rdata[:2]
+        timers = map(_seconds, rdata[2:])
+        if len(timers) != 5 or None in timers:
+            raise ValueError('Bad SOA timers')
+        content = ' '.join([_absolute(primary, origin),
+          _absolute(contact, origin)] + map(str, timers))
+    elif type_name in TEXT_TYPES:
+        content = ''.join(map(_unquote, rdata))
+    else:
+        content = ' '.join(rdata)
+    if prio is not None:
+        prio = int(prio)
+    return (content, prio)
+
+def parse(lines, origin=None, ttl=None, domain_id=None, config=None):
+    """Parse the master file ``lines`` and yield a ``Record`` instance
+    for each resource record, in file order.
+
+    ``lines`` may be any iterable of lines, such as an open file.  It is
+    consumed lazily.
+
+    ``origin`` is the initial ``$ORIGIN`` and ``ttl`` the initial
+    ``$TTL``.  Records without a TTL of their own, parsed while no
+    ``$TTL`` is in effect, get the zone's default TTL on the server.
+
+    ``domain_id``, if supplied, is given to every record so that it may
+    be saved straight away.
+
+    ``config``, if supplied, should be an instance of
+    ``pdorclient.Config``.
+
+    Will raise ``ZoneFileParseError`` on the first line that cannot be
+    parsed, or that describes a record this library cannot represent.
+
+    """
+    if not isinstance(config, pdorclient.Config):
+        config = pdorclient.Config()
+
+    types = dict(map(lambda (k, v): (v, k),
+      pdorclient.Record._type_names().iteritems()))
+    if origin is not None:
+        origin = origin.rstrip('.').lower()
+    owner = None
+
+    for (lineno, line, inherits_owner, tokens) in _entries(lines):
+        try:
+            if tokens[0].startswith('$'):
+                directive = tokens[0].upper()
+                if directive == '$ORIGIN':
+                    origin = _absolute(tokens[1], origin).lower()
+                elif directive == '$TTL':
+                    ttl = _seconds(tokens[1])
+                    if ttl is None:
+                        raise ValueError('Bad TTL %r' % tokens[1])
+                else:
+                    raise ValueError('Unsupported directive %s' % directive)
+                continue
+
+            if inherits_owner:
+                if owner is None:
+                    raise ValueError('No previous owner name')
+            else:
+                owner = _absolute(tokens.pop(0), origin)
+
+            # The TTL and class may appear in either order, and either
+            # may be omitted.
+            record_ttl = ttl
+            while tokens:
+                upper = tokens[0].upper()
+                if upper in CLASSES:
+                    if upper != 'IN':
+                        raise ValueError('Unsupported class %s' % upper)
+                elif _seconds(tokens[0]) is not None:
+                    record_ttl = _seconds(tokens[0])
+                else:
+                    break
+                tokens.pop(0)
+
+            if not tokens:
+                raise ValueError('Missing record type')
+            type_name = tokens[0].upper()
+            if type_name not in types:
+                raise ValueError('Unsupported record type %s' % type_name)
+            (content, prio) = _rdata(type_name, tokens[1:], origin)
+
+            yield pdorclient.Record(name=owner, type=types[type_name],
+              content=content, ttl=record_ttl, prio=prio,
+              domain_id=domain_id, config=config)
+        except (ValueError, pdorclient.errors.PdorClientLocalError), e:
+            raise pdorclient.errors.ZoneFileParseError(lineno, line,
+              str(e) or repr(e))
+
+def iterlines(zone):
+    """Yield the master file for ``zone`` one line at a time.
+
+    The ``SOA`` record, if any, is written first, followed by the
+    other records in the order of ``zone.records``.
+
+    """
+    origin = zone.name
+    types = pdorclient.Record._type_names()
+
+    yield '$ORIGIN %s.\n' % origin
+    if zone.ttl is not None:
+        yield '$TTL %d\n' % zone.ttl
+
+    soa = pdorclient.Record.TYPE_SOA
+    for first in (True, False):
+        for r in zone.records:
+            if (r.type == soa) != first:
+                continue
+            type_name = types[r.type]
+            content = r.content
+            if type_name in NAME_TYPES:
+                content = '%s.' % content.rstrip('.')
+            elif type_name == 'MX':
+                content = '%d %s.' % (r.prio or 0, content.rstrip('.'))
+            elif type_name == 'SRV':
+                (weight, port, target) = content.split()
+                content = '%d %s %s %s.' % (r.prio or 0, weight, port,
+                  target.rstrip('.'))
+            elif type_name == 'SOA':
+                fields = content.split()
+                content = ' '.join(map(lambda f: '%s.' % f.rstrip('.'),
+                  fields[:2]) + fields[2:])
+            elif type_name in TEXT_TYPES:
+                content = _quote(content)
+
+            if r.ttl is None:
+                ttl = ''
+            else:
+                ttl = str(r.ttl)
+            yield '%s\t%s\tIN\t%s\t%s\n' % (_relative(r.name, origin), ttl,
+              type_name, content)
+
+def dump(zone, f):
+    """Write the master file for ``zone`` to the file object ``f``."""
+    f.writelines(iterlines(zone))
+
+def load(zone, lines, concurrency=8, journal=None):
+    """Parse the master file ``lines`` and save each of its records to
+    ``zone``, which must already have been saved.
+
+    Records are saved as they are parsed, by up to ``concurrency``
+    worker threads, and are not added to ``zone.records``; memory use
+    does not grow with the size of the master file.  An ``SOA`` record
+    is skipped if the zone already has one on the server.
+
+    See ``Resource.save_many()`` for ``concurrency``, ``journal`` and
+    the return value.  Will raise ``ZoneFileParseError`` on the first
+    line that cannot be parsed.
+
+    """
+    if zone.id is None:
+        raise pdorclient.errors.PrematurePersistError()
+
+    def records():
+        skip_soa = None
+        for r in parse(lines, origin=zone.name, domain_id=zone.id,
+          config=zone._config):
+            if r.type == pdorclient.Record.TYPE_SOA:
+                # ``zone.records`` may hold only some of the zone's RRs, 
+                # so ask the server, once and only if there is an SOA.
+                if skip_soa is None:
+                    skip_soa = len(pdorclient.Zone.lookup(zone.id,
+                      config=zone._config, types=['SOA']).records) > 0
+                if skip_soa:
+                    logging.debug('Skipping SOA record: %r' % r)
+                    continue
+            yield r
+
+    return pdorclient.Resource.save_many(records(), concurrency, journal)
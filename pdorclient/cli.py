@@ -0,0 +1,342 @@
+"""The ``pdorclient`` command-line tool.
+
+Records are read and written as JSON lines, one record per line, in
+the format of ``pdorclient.jsonl``.  Only ``zone``, ``name``, ``type``
+and ``content`` are required on input::
+
+    {"zone": "example.net", "name": "www.example.net", "type": "A",
+     "content": "192.0.2.1", "ttl": 300}
+
+(shown folded here).  ``delete-records`` deletes the records matching
+every field given on a line, which must include ``id`` or ``name``.
+The output of ``dump`` is valid input for every
+other subcommand::
+
+    pdorclient dump example.net example.org > records.json
+    pdorclient diff < records.json
+    pdorclient sync --jobs 16 < records.json
+    pdorclient load < new-records.json
+    pdorclient delete-records < unwanted-records.json
+
+Work is spread over ``--jobs`` worker threads.  Each worker keeps its
+own persistent connection to the server, and a single ``Config`` is
+loaded for the whole run.  Progress is reported on standard error,
+followed by a summary of throughput and failures.  The exit status is
+non-zero if anything failed.
+
+"""
+
+import argparse
+import collections
+import logging
+import pdorclient
+import pdorclient.errors
+import pdorclient.utils
+import simplejson
+import sys
+import time
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_JOBS = 8
+
+# Fields that identify a record within its zone.  Records that differ in
+# anything else (the TTL) are updated in place by ``sync``.
+IDENTITY = ('name', 'type', 'content', 'prio')
+
+class Progress(object):
+    """Counts completed and failed units of work and reports on them."""
+    INTERVAL = 1.0
+
+    def __init__(self, command, unit, stream=sys.stderr, quiet=False):
+        self.command = command
+        self.unit = unit
+        self.stream = stream
+        self.quiet = quiet
+
+        self.failed = 0
+        self.ok = 0
+        self.start = time.time()
+        self._reported = self.start
+
+    def _rate(self):
+        elapsed = max(time.time() - self.start, 1e-6)
+        return (elapsed, (self.ok + self.failed) / elapsed)
+
+    def done(self, count=1):
+        self.ok += count
+        self.report()
+
+    def fail(self, item, error):
+        self.failed += 1
+        self.stream.write('%s: %s: %r\n' % (self.command, item, error))
+        self.report()
+
+    def report(self):
+        if self.quiet or not self.stream.isatty():
+            return
+        now = time.time()
+        if now - self._reported < self.INTERVAL:
+            return
+        self._reported = now
+        self.stream.write('\r%s: %d %s done, %d failed (%.0f/s)' % (
+          self.command, self.ok, self.unit, self.failed, self._rate()[1]))
+        self.stream.flush()
+
+    def summary(self):
+        if self.quiet:
+            return
+        (elapsed, rate) = self._rate()
+        if self.stream.isatty():
+            self.stream.write('\r')
+        self.stream.write('%s: %d %s done, %d failed in %.1fs (%.0f/s)\n' % (
+          self.command, self.ok, self.unit, self.failed, elapsed, rate))
+
+def record_to_dict(zone_name, record):
+    """Return a JSON-serialisable dict describing ``record``, which
+    belongs to the zone ``zone_name``."""
+    d = record.to_dict()
+    d['zone'] = zone_name
+    return d
+
+def record_from_dict(d, domain_id=None, config=None):
+    """Return a new ``Record`` instance described by ``d``, as returned
+    by ``record_to_dict()``.  Any ``id`` in ``d`` is ignored."""
+    d = dict(d, id=None, domain_id=domain_id)
+    d['type'] = str(d['type']).upper()
+    return pdorclient.Record.from_dict(d, config)
+
+def _normalise(d):
+    """Return a copy of the record dict ``d`` with the fields it has
+    normalised the way the server stores them."""
+    d = dict(d)
+    if 'name' in d:
+        d['name'] = pdorclient.utils.rfc952ify(d['name'])
+    if 'type' in d:
+        d['type'] = str(d['type']).upper()
+    if 'prio' in d:
+        d['prio'] = d['prio'] or 0
+    return d
+
+def _identity(d):
+    d = _normalise(d)
+    d.setdefault('prio', 0)
+    return tuple(map(lambda k: d.get(k), IDENTITY))
+
+def _label(d):
+    return ' '.join(map(lambda k: str(d.get(k)), ('zone',) + IDENTITY[:3]))
+
+def _read(f):
+    """Yield each JSON document in the JSON-lines stream ``f``."""
+    for (lineno, line) in enumerate(f, 1):
+        if not line.strip():
+            continue
+        try:
+            d = simplejson.loads(line)
+        except ValueError, e:
+            raise ValueError('line %d: %s' % (lineno, e))
+        if not isinstance(d, dict) or 'zone' not in d:
+            raise ValueError('line %d: not a record' % lineno)
+        d['zone'] = str(d['zone'])
+        yield d
+
+def _write(out, d):
+    out.write(simplejson.dumps(d, sort_keys=True) + '\n')
+
+def _by_zone(f):
+    """Return an ``OrderedDict`` mapping each zone named in the
+    JSON-lines stream ``f`` to a list of its records."""
+    zones = collections.OrderedDict()
+    for d in _read(f):
+        zones.setdefault(d['zone'], []).append(d)
+    return zones
+
+def _changes(zone, desired):
+    """Return a list of ``(action, record_dict, record)`` tuples that
+    would turn ``zone``'s records into the ``desired`` record dicts.
+
+    ``record`` is the existing ``Record`` for ``'update'`` and
+    ``'delete'`` actions and ``None`` for ``'create'``.
+
+    """
+    existing = collections.defaultdict(list)
+    for r in zone.records:
+        d = record_to_dict(zone.name, r)
+        existing[_identity(d)].append((d, r))
+
+    changes = []
+    for d in desired:
+        matches = existing.get(_identity(d))
+        if not matches:
+            changes.append(('create', d, None))
+            continue
+        (current, r) = matches.pop(0)
+        if d.get('ttl') is not None and d['ttl'] != current['ttl']:
+            current = dict(current, ttl=d['ttl'])
+            changes.append(('update', current, r))
+    for matches in existing.values():
+        for (current, r) in matches:
+            changes.append(('delete', current, r))
+    return changes
+
+def dump(args, config, progress, out):
+    names = args.zones or map(str.strip, filter(str.strip, sys.stdin))
+    for (name, zone, error) in pdorclient.Zone.ilookup_many(names,
+      concurrency=args.jobs, config=config):
+        if error is not None:
+            progress.fail(name, error)
+            continue
+        for r in zone.records:
+            _write(out, record_to_dict(name, r))
+        progress.done()
+
+def load(args, config, progress, out):
+    def create(d):
+        domain_id = pdorclient.Zone.lookup_id(d['zone'], config,
+          cache=True)
+        r = record_from_dict(d, domain_id, config)
+        r.save()
+        return record_to_dict(d['zone'], r)
+
+    for (d, result, error) in pdorclient.utils.imap_unordered(create,
+      _read(args.input), args.jobs):
+        if error is not None:
+            progress.fail(_label(d), error)
+            continue
+        _write(out, result)
+        progress.done()
+
+def _diff(args, config, progress, out, apply):
+    zones = _by_zone(args.input)
+
+    def diff(name):
+        zone = pdorclient.Zone.lookup(name, config=config)
+        changes = _changes(zone, zones[name])
+        if apply:
+            for (action, d, r) in changes:
+                if action == 'create':
+                    zone.records.append(record_from_dict(d, config=config))
+                elif action == 'update':
+                    r.ttl = d['ttl']
+                else:
+                    zone.records.remove(r)
+            zone.save()
+        return changes
+
+    for (name, changes, error) in pdorclient.utils.imap_unordered(diff,
+      zones.keys(), args.jobs):
+        if error is not None:
+            progress.fail(name, error)
+            continue
+        for (action, d, r) in changes:
+            _write(out, dict(d, action=action))
+        progress.done()
+
+def diff(args, config, progress, out):
+    _diff(args, config, progress, out, apply=False)
+
+def sync(args, config, progress, out):
+    _diff(args, config, progress, out, apply=True)
+
+def delete_records(args, config, progress, out):
+    fields = ('id',) + IDENTITY + ('ttl',)
+
+    def delete(d):
+        # A line that names no record, or only a type, would match every
+        # one (of that type) in its zone.
+        if d.get('id') is None and d.get('name') is None:
+            raise ValueError('no id or name to match records on')
+        zone = pdorclient.Zone.lookup(d['zone'], match=d.get('name'),
+          config=config)
+        wanted = _normalise(d)
+        deleted = []
+        for r in list(zone.records):
+            current = record_to_dict(d['zone'], r)
+            if any(map(lambda k: k in wanted and
+              wanted[k] != _normalise(current)[k], fields)):
+                continue
+            r.delete()
+            deleted.append(current)
+        return deleted
+
+    for (d, deleted, error) in pdorclient.utils.imap_unordered(delete,
+      _read(args.input), args.jobs):
+        if error is not None:
+            progress.fail(_label(d), error)
+            continue
+        for current in deleted:
+            _write(out, current)
+        progress.done(len(deleted))
+
+COMMANDS = (
+  ('dump', dump, 'zones',
+    'write the records of each zone as JSON lines'),
+  ('load', load, 'records',
+    'create each record read as JSON lines'),
+  ('diff', diff, 'zones',
+    'show the changes sync would make'),
+  ('sync', sync, 'zones',
+    'make each zone read as JSON lines hold exactly those records'),
+  ('delete-records', delete_records, 'records',
+    'delete each record read as JSON lines'),
+)
+
+def parser():
+    """Return the ``argparse.ArgumentParser`` for the tool."""
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('-c', '--config', metavar='PATH',
+      help='read configuration from PATH')
+    common.add_argument('-j', '--jobs', type=int, default=DEFAULT_JOBS,
+      metavar='N', help='run N workers in parallel (default: %(default)s)')
+    common.add_argument('-q', '--quiet', action='store_true',
+      help='do not report progress or print a summary')
+    common.add_argument('-v', '--verbose', action='store_true',
+      help='log debugging information')
+
+    p = argparse.ArgumentParser(prog='pdorclient',
+      description='Bulk operations against PowerDNS on Rails.')
+    p.add_argument('--version', action='version',
+      version='%(prog)s ' + pdorclient.__version__)
+
+    subparsers = p.add_subparsers(title='commands', dest='command')
+    for (name, func, unit, help) in COMMANDS:
+        sp = subparsers.add_parser(name, parents=[common], help=help,
+          description=help)
+        sp.set_defaults(func=func, unit=unit)
+        if name == 'dump':
+            sp.add_argument('zones', nargs='*', metavar='ZONE',
+              help='zone names (default: read from standard input)')
+        else:
+            sp.add_argument('input', nargs='?', metavar='FILE',
+              type=argparse.FileType('r'), default=sys.stdin,
+              help='JSON lines (default: standard input)')
+    return p
+
+def main(argv=None, out=sys.stdout):
+    """Run the tool and return its exit status."""
+    args = parser().parse_args(argv)
+    if args.verbose:
+        logging.basicConfig(level=logging.DEBUG)
+    if args.jobs < 1:
+        args.jobs = 1
+
+    try:
+        config = pdorclient.Client(path=args.config)
+    except pdorclient.errors.PdorClientError, e:
+        sys.stderr.write('pdorclient: %s\n' % e)
+        return 2
+
+    progress = Progress(args.command, args.unit, quiet=args.quiet)
+    try:
+        args.func(args, config, progress, out)
+    except ValueError, e:
+        sys.stderr.write('pdorclient: %s: %s\n' % (args.command, e))
+        return 2
+    finally:
+        progress.summary()
+    if progress.failed > 0:
+        return 1
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main())
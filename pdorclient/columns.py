@@ -0,0 +1,231 @@
+"""Columnar, read-only views of records for analysis.
+
+Reports over many records (TTL distributions, counts by type, records
+grouped by content) only read a few attributes of each, and going
+through a ``Record`` instance for every one of them is slow.  A
+``Columns`` view holds the records of a zone as parallel columns
+instead: ``id``, ``type``, ``ttl`` and ``prio`` in ``array.array``
+buffers, and ``name`` and ``content`` in lists of strings::
+
+    >>> from pdorclient import columns
+    >>> view = columns.lookup('example.net')
+    >>> view.count('ttl')
+    {300: 12, 3600: 48211}
+    >>> view.filter(type='MX', ttl=lambda ttl: ttl < 3600).count('content')
+    {'mail.example.net': 2}
+
+``lookup()`` builds a view straight from the server's response as it
+is streamed, without building a ``Zone`` or any ``Record`` instances.
+Views cannot be saved; use ``Zone.lookup()`` to change records.
+
+The numeric columns may be handed to NumPy without copying::
+
+    >>> numpy.frombuffer(view.ttl, view.ttl.typecode)
+
+"""
+
+import array
+import itertools
+import logging
+import pdorclient
+
+logger = logging.getLogger(__name__)
+
+# ``array.array`` type codes of the numeric columns.
+NUMERIC = (('id', 'l'), ('type', 'b'), ('ttl', 'l'), ('prio', 'l'))
+STRINGS = ('name', 'content')
+COLUMNS = tuple(map(lambda (column, typecode): column, NUMERIC)) + STRINGS
+
+class Columns(object):
+    """The records of a view, one column per attribute; see the module
+    documentation.
+
+    ``columns``, if supplied, maps the names in ``COLUMNS`` to
+    sequences of equal length.  Views are usually built with
+    ``lookup()`` or ``from_records()`` instead.
+
+    ``type`` holds ``Record.TYPE_*`` values.  ``ttl`` holds the TTL
+    the server applies: the zone's, for records without one of their
+    own.  ``prio`` is 0 for records without one; ``id`` is 0 for
+    records never saved.
+
+    """
+    def __init__(self, columns=None):
+        columns = columns or {}
+        for (column, typecode) in NUMERIC:
+            setattr(self, column, array.array(typecode,
+              columns.get(column, ())))
+        for column in STRINGS:
+            setattr(self, column, list(columns.get(column, ())))
+
+    def __len__(self):
+        return len(self.id)
+
+    def __repr__(self):
+        return '%s.%s(<%d records>)' % (self.__module__,
+          self.__class__.__name__, len(self))
+
+    def _append(self, id, type, ttl, prio, name, content):
+        self.id.append(id)
+        self.type.append(type)
+        self.ttl.append(ttl)
+        self.prio.append(prio)
+        self.name.append(name)
+        self.content.append(content)
+
+    def _take(self, indices):
+        """Return a new view of the rows at ``indices``."""
+        return Columns(dict(map(lambda column: (column,
+          map(getattr(self, column).__getitem__, indices)), COLUMNS)))
+
+    def _test(self, column, condition):
+        """Return a function of one value of ``column`` that is true
+        where ``condition`` holds; see ``filter()``."""
+        if callable(condition):
+            return condition
+        if isinstance(condition, (list, tuple, set, frozenset)):
+            values = frozenset(condition)
+        else:
+            values = frozenset([condition])
+        if column == 'type':
+            names = dict(map(lambda (code, name): (name, code),
+              pdorclient.Record._type_names().iteritems()))
+            values = frozenset(map(lambda v: names.get(str(v).upper(), v)
+              if isinstance(v, basestring) else v, values))
+        return values.__contains__
+
+    def count(self, column):
+        """Return a dict mapping each value of ``column`` to the number
+        of records that have it."""
+        counts = {}
+        for value in getattr(self, column):
+            counts[value] = counts.get(value, 0) + 1
+        return counts
+
+    def filter(self, **conditions):
+        """Return a new view of the records that meet every one of
+        ``conditions``, keyed on column name.
+
+        A condition may be a value, which the column must equal; a list
+        or set of values, one of which it must equal; or a function of
+        one value, which must return true.  Types may also be given by
+        name::
+
+            view.filter(type=['A', 'AAAA'], ttl=lambda ttl: ttl < 300)
+
+        """
+        indices = None
+        for (column, condition) in conditions.iteritems():
+            values = getattr(self, column)
+            test = self._test(column, condition)
+            if indices is None:
+                indices = list(itertools.compress(xrange(len(values)),
+                  itertools.imap(test, values)))
+            else:
+                indices = filter(lambda i: test(values[i]), indices)
+        if indices is None:
+            indices = range(len(self))
+        return self._take(indices)
+
+    def group(self, column):
+        """Return a dict mapping each value of ``column`` to a view of
+        the records that have it."""
+        groups = {}
+        for (i, value) in enumerate(getattr(self, column)):
+            groups.setdefault(value, []).append(i)
+        return dict(map(lambda (value, indices): (value,
+          self._take(indices)), groups.iteritems()))
+
+    def rows(self):
+        """Yield a tuple of each record's values, in the order of
+        ``COLUMNS``."""
+        return itertools.izip(*map(lambda column: getattr(self, column),
+          COLUMNS))
+
+def _default_ttl(zone_ttl, ttl, record):
+    """Return the TTL of ``record``, which has none of its own: its
+    zone's ``zone_ttl`` if known, or else ``ttl``."""
+    if zone_ttl is not None:
+        return zone_ttl
+    if ttl is not None:
+        return ttl
+    raise ValueError('%r has no TTL of its own and its zone\'s is not '
+      'known' % record)
+
+def from_records(records, ttl=None):
+    """Return a view of ``records``, an iterable of ``Record``
+    instances.
+
+    Records without a TTL of their own are given their zone's, or
+    ``ttl`` if they belong to no zone that has one.  Will raise
+    ``ValueError`` if neither is known.
+
+    """
+    view = Columns()
+    for r in records:
+        rttl = r._repr.get('ttl')
+        if rttl is None:
+            zone = r._parent() if r._parent is not None else None
+            rttl = _default_ttl(zone is not None and zone._repr.get('ttl')
+              or None, ttl, r)
+        view._append(int(r._id or 0), r._repr.get('type'), rttl,
+          r._repr.get('prio') or 0, r._repr.get('name'),
+          r._repr.get('content'))
+    return view
+
+def from_xml(elements, ttl=None):
+    """Return a view of ``elements``, the server's ``record`` elements,
+    decoding only the fields the view holds.  Repeated names and
+    contents are held once.
+
+    Records without a TTL of their own are given their zone's, read
+    from the ``domain`` element that holds them, or ``ttl`` for
+    elements that are not part of a zone's XML.  Will raise
+    ``ValueError`` if neither is known.
+
+    """
+    codes = dict(map(lambda (code, name): (name, code),
+      pdorclient.Record._type_names().iteritems()))
+    shared = {}
+    zone_ttls = {}
+    view = Columns()
+    for r in elements:
+        fields = {}
+        for (field, value) in pdorclient.utils.xmlitems(r):
+            if isinstance(value, unicode):
+                value = value.encode('utf-8')
+            fields[field] = value
+        rttl = fields.get('ttl')
+        if rttl:
+            rttl = int(rttl)
+        else:
+            # Streamed records are cleared as they are read, but the 
+            # zone's own fields, which come first, are still there.
+            records = r.getparent()
+            domain = records.getparent() if records is not None else None
+            if domain not in zone_ttls:
+                zone_ttl = domain is not None and \
+                  domain.findtext('ttl') or None
+                zone_ttls[domain] = zone_ttl and int(zone_ttl)
+            rttl = _default_ttl(zone_ttls[domain], ttl, fields)
+        name = fields.get('name') or None
+        content = fields.get('content') or None
+        view._append(int(fields['id']), codes[fields['type'].upper()],
+          rttl, int(fields.get('prio') or 0),
+          shared.setdefault(name, name), shared.setdefault(content, content))
+    return view
+
+def lookup(name, match=None, config=None, types=None):
+    """Return a view of the RRs of the zone ``name``, decoded as they
+    are streamed from the server, without building a ``Zone`` or any
+    ``Record`` instances.
+
+    ``match``, ``config`` and ``types`` are as for ``Zone.lookup()``,
+    although ``match`` may not be a list.
+
+    """
+    if not isinstance(config, pdorclient.Config):
+        config = pdorclient.Config()
+    return from_xml(pdorclient.Record._of_types(
+      pdorclient.Zone._fetch(name, match, config).xmliterparse('record'),
+      pdorclient.Record._types(types)))
@@ -1,6 +1,17 @@
 import pdorclient
 
+def _restore(klass, state):
+    e = klass.__new__(klass)
+    e.__dict__.update(state)
+    return e
+
 class PdorClientError(Exception):
+    def __reduce__(self):
+        # Errors keep their fields in attributes, not ``args``; pickle
+        # them so that errors raised in worker processes may be raised
+        # again in the parent.  See ``pdorclient.fanout``.
+        return (_restore, (self.__class__, self.__dict__))
+
     def __repr__(self):
         return '%s.%s()' % (self.__module__, self.__class__.__name__)
 
@@ -14,6 +25,16 @@ class InsecureConfigurationError(PdorClientLocalError):
     def __str__(self):
         return 'Hint: chmod o-rw %s' % pdorclient.Config.GLOBAL_CONFIG
 
+class InvalidConfigurationError(PdorClientLocalError):
+    def __init__(self, option, value):
+        self.option = option
+        self.value = value
+
+    def __repr__(self):
+        return '%s.%s(option=%r, value=%r)' % (
+          self.__module__, self.__class__.__name__, self.option,
+          self.value)
+
 class IpV4ParseError(PdorClientLocalError):
     def __init__(self, ipv4):
         self.ipv4 = ipv4
@@ -45,6 +66,33 @@ class Rfc952ViolationError(PdorClientLocalError):
         return '%s.%s(name=%r)' % (
           self.__module__, self.__class__.__name__, self.name)
 
+class SnapshotFormatError(PdorClientLocalError):
+    def __init__(self, path):
+        self.path = path
+
+    def __repr__(self):
+        return '%s.%s(path=%r)' % (
+          self.__module__, self.__class__.__name__, self.path)
+
+class WorkerError(PdorClientLocalError):
+    def __init__(self, error):
+        self.error = error
+
+    def __repr__(self):
+        return '%s.%s(error=%r)' % (
+          self.__module__, self.__class__.__name__, self.error)
+
+class ZoneFileParseError(PdorClientLocalError):
+    def __init__(self, lineno, line, reason=None):
+        self.lineno = lineno
+        self.line = line
+        self.reason = reason
+
+    def __repr__(self):
+        return '%s.%s(lineno=%r, line=%r, reason=%r)' % (
+          self.__module__, self.__class__.__name__, self.lineno,
+          self.line, self.reason)
+
 class PdorClientRemoteError(PdorClientError):
     pass
 
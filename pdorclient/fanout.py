@@ -0,0 +1,184 @@
+"""Decoding of records in a pool of worker processes.
+
+Parsing and converting the records of a zone of a million RRs is
+CPU-bound and, under the GIL, runs on one core however many threads
+are used.  ``Zone.lookup()`` and ``pdorclient.jsonl`` take a
+``processes`` argument to spread that work over several cores::
+
+    >>> zone = Zone.lookup('example.net', processes=4)
+    >>> jsonl.load(zone, open('new-records.json'), processes=4)
+
+The records are split into chunks of ``CHUNK_SIZE`` without being
+parsed.  Each chunk is decoded into a list of compact tuples, one per
+record, by a pool of worker processes, and ``Record`` instances are
+built from the tuples in the calling process, in their original order.
+
+A pool is forked for every call, so fan-out only pays for itself on
+zones and files of tens of thousands of records.  The workers only
+decode: they make no requests and share no connections with the
+calling process.
+
+"""
+
+import cPickle
+import functools
+import itertools
+import logging
+import pdorclient
+import pdorclient.errors
+import re
+import time
+
+logger = logging.getLogger(__name__)
+
+CHUNK_SIZE = 2000
+
+# ``Record`` constructor arguments, in the order they are held in the
+# tuples passed back from worker processes.
+RECORD_FIELDS = ('change_date', 'content', 'created_at', 'domain_id', 'id',
+  'name', 'prio', 'ttl', 'type', 'updated_at')
+
+_RE_RECORDS = re.compile(r'<records[\s/>]')
+
+def _values(attrs):
+    return tuple(map(attrs.get, RECORD_FIELDS))
+
+def _decode_xml(chunk, lazy=False, types=None):
+    """Return a tuple of ``RECORD_FIELDS`` values for each ``record``
+    element in ``chunk``, a string of consecutive elements, of one of
+    ``types``; see ``Record._of_types()``."""
+    import lxml.etree
+    root = lxml.etree.fromstring('<records>%s</records>' % chunk)
+    return map(lambda r: _values(pdorclient.Record._decode_xml(r, lazy)),
+      pdorclient.Record._of_types(root.iterchildren('record'), types))
+
+def _decode_lines(lines, lazy=False):
+    """Return a tuple of ``RECORD_FIELDS`` values for each of ``lines``,
+    a list of JSON lines."""
+    import simplejson
+    return map(lambda line: _values(pdorclient.Record._decode_dict(
+      simplejson.loads(line), lazy)), lines)
+
+def _apply((func, chunk)):
+    try:
+        return func(chunk)
+    except Exception, e:
+        # An error that cannot be unpickled kills the pool's result
+        # handler and hangs the caller (Python issue 9400); send its
+        # repr instead.
+        try:
+            cPickle.loads(cPickle.dumps(e, cPickle.HIGHEST_PROTOCOL))
+        except Exception:
+            raise pdorclient.errors.WorkerError(repr(e))
+        raise
+
+def split_xml(xml, size=None):
+    """Split ``xml``, the server's XML for a zone, into the zone's XML
+    without its records and a generator of strings of ``size`` (or
+    fewer) consecutive ``record`` elements.  ``size`` defaults to
+    ``CHUNK_SIZE``.
+
+    ``xml`` is only searched, never parsed.
+
+    """
+    if size is None:
+        size = CHUNK_SIZE
+    m = _RE_RECORDS.search(xml)
+    if m is None:
+        return (xml, iter(()))
+    start = xml.index('>', m.start()) + 1
+    if xml[start - 2] == '/':
+        return (xml, iter(()))
+    end = xml.rindex('</records>')
+
+    def chunks():
+        tag = '</record>'
+        pos = start
+        while pos < end:
+            cut = pos
+            for i in xrange(size):
+                cut = xml.find(tag, cut, end)
+                if cut == -1:
+                    cut = end
+                    break
+                cut += len(tag)
+            yield xml[pos:cut]
+            pos = cut
+
+    return (xml[:start] + xml[end:], chunks())
+
+def split_lines(lines, size=None):
+    """Yield lists of ``size`` (or fewer) consecutive JSON lines from
+    ``lines``, skipping blank lines.  ``size`` defaults to
+    ``CHUNK_SIZE``."""
+    if size is None:
+        size = CHUNK_SIZE
+    lines = itertools.ifilter(lambda line: line.strip(), lines)
+    while True:
+        chunk = list(itertools.islice(lines, size))
+        if not chunk:
+            return
+        yield chunk
+
+def imap(func, chunks, processes):
+    """Yield ``func(chunk)`` for each of ``chunks``, in order, as
+    computed by a pool of ``processes`` worker processes.
+
+    ``func`` must be a module-level function.  An error raised by
+    ``func`` is raised again here, or replaced by ``WorkerError`` if it
+    cannot be pickled.
+
+    """
+    import multiprocessing
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(_apply,
+          itertools.imap(lambda chunk: (func, chunk), chunks)):
+            yield result
+        pool.close()
+    finally:
+        pool.terminate()
+        pool.join()
+
+def records(func, chunks, processes, config, shared=None, identities=None,
+  **overrides):
+    """Yield a ``Record`` instance for each tuple returned by ``func``
+    for each of ``chunks``; see ``imap()``.
+
+    ``func`` is also passed ``lazy``, as ``config`` decodes timestamps;
+    see ``Config.timestamps``.  ``shared`` is as for
+    ``Resource.from_xml()`` and ``identities`` as for
+    ``Resource._build()``.  ``overrides`` replace the decoded values of
+    the same names.
+
+    """
+    if not isinstance(config, pdorclient.Config):
+        config = pdorclient.Config()
+    func = functools.partial(func, lazy=pdorclient.Resource._lazy(config))
+
+    start = time.time()
+    n = 0
+    for values in imap(func, chunks, processes):
+        for v in values:
+            if shared is not None:
+                v = map(lambda field, value: field == 'id' and value or
+                  shared.setdefault(value, value), RECORD_FIELDS, v)
+            attrs = dict(zip(RECORD_FIELDS, v))
+            attrs.update(overrides)
+            yield pdorclient.Record._build(attrs, config, identities)
+        n += len(values)
+    logging.debug('Decoded %d records in %d processes in %.3fs' %
+      (n, processes, time.time() - start))
+
+def decode_zone(xml, config, processes, complete=False, types=None):
+    """Return a ``Zone`` instance for ``xml``, the server's XML for a
+    zone, with a ``Record`` instance for each of its RRs, decoding the
+    RRs in ``processes`` worker processes.  ``complete`` is as for
+    ``Zone._merge()``; RRs not of ``types`` are skipped in the workers,
+    as ``Record._of_types()`` does."""
+    (zone_xml, chunks) = split_xml(xml)
+    zone = pdorclient.Zone.from_xml(zone_xml, config)
+    zone._merge(records(functools.partial(_decode_xml, types=types),
+      chunks, processes, config, shared={},
+      identities=pdorclient.Resource._identities(config)), complete)
+    return zone
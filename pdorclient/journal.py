@@ -0,0 +1,176 @@
+import logging
+import os
+import pdorclient
+import pdorclient.utils
+import threading
+
+logger = logging.getLogger(__name__)
+
+class Journal(object):
+    """An append-only, on-disk record of the requests made by
+    ``Resource.save()`` and ``Resource.delete()``.
+
+    Each request is written to the journal as *planned* before it is
+    sent and as *done* once the server has accepted it.  If a large
+    save or delete is interrupted, ``resume()`` replays only the
+    planned requests that never completed::
+
+        journal = Journal('/var/tmp/example.net.journal')
+        zone.save(journal=journal)
+        journal.close()
+
+    and, after a crash::
+
+        journal = Journal('/var/tmp/example.net.journal')
+        journal.resume()
+        journal.close()
+
+    The journal is one JSON document per line.  Writes are flushed to
+    disk (``fsync``) in batches of ``sync_every`` entries, before any
+    planned request is sent, and on ``close()``.  Completed ``POST``
+    requests are flushed at once, since sending one again would create
+    a second resource; after a crash, up to ``sync_every`` completed
+    ``PUT`` and ``DELETE`` requests may be replayed, which is harmless.
+
+    """
+    DEFAULT_SYNC_EVERY = 64
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __init__(self, path, sync_every=DEFAULT_SYNC_EVERY):
+        self.path = path
+        self.sync_every = sync_every
+
+        self._lock = threading.Lock()
+        self._planned = {}
+        self._seq = 0
+        self._unsynced = 0
+
+        if os.path.exists(path):
+            self._load()
+        self._file = open(path, 'a')
+
+    def __repr__(self):
+        return '%s.%s(path=%r, sync_every=%r)' % (
+          self.__module__, self.__class__.__name__, self.path,
+          self.sync_every)
+
+    def _load(self):
+        import simplejson
+        for line in open(self.path):
+            if not line.endswith('\n'):
+                # A partial write from a crash.  It cannot have been
+                # synced, so nothing depends on it.
+                logging.debug('Ignoring truncated journal entry: %r' %
+                  line)
+                break
+            entry = simplejson.loads(line)
+            self._seq = max(self._seq, entry['seq'])
+            if entry['event'] == 'plan':
+                self._planned[entry['seq']] = entry
+            elif entry['event'] == 'done':
+                self._planned.pop(entry['seq'], None)
+
+    def _write(self, entry):
+        import simplejson
+        self._file.write(simplejson.dumps(entry) + '\n')
+        self._unsynced += 1
+        if self._unsynced >= self.sync_every:
+            self._sync()
+
+    def _sync(self):
+        if self._unsynced > 0:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        with self._lock:
+            if not self._file.closed:
+                self._sync()
+                self._file.close()
+
+    def done(self, seq, id=None):
+        """Record that the request planned as ``seq`` has completed.
+
+        ``id`` is the identifier the server assigned to a newly created
+        resource, if any.
+
+        """
+        entry = {'seq': seq, 'event': 'done'}
+        if id is not None:
+            entry['id'] = str(id)
+        with self._lock:
+            planned = self._planned.pop(seq, None)
+            self._write(entry)
+            if planned is not None and planned['method'] == 'POST':
+                self._sync()
+
+    def plan(self, operation):
+        """Record that the ``(method, path, qp)`` request described by
+        ``operation`` is about to be sent and return its sequence
+        number.
+
+        Return ``None`` if ``operation`` is ``None``.
+
+        """
+        if operation is None:
+            return None
+        (method, path, qp) = operation
+        with self._lock:
+            self._seq += 1
+            entry = {'seq': self._seq, 'event': 'plan', 'method': method,
+              'path': path, 'qp': list(qp or [])}
+            self._planned[self._seq] = entry
+            self._write(entry)
+            return self._seq
+
+    def resume(self, config=None):
+        """Send every planned request that never completed, in the
+        order in which they were planned, and return the number of
+        requests sent.
+
+        A ``DELETE`` of a resource that no longer exists is treated as
+        complete.
+
+        ``config``, if supplied, should be an instance of
+        ``pdorclient.Config``.
+
+        """
+        import restclient
+        if not isinstance(config, pdorclient.Config):
+            config = pdorclient.Config()
+
+        sent = 0
+        for entry in self.unfinished():
+            logging.debug('Resuming journal entry: %r' % entry)
+            id = None
+            try:
+                response = pdorclient.Resource._send(config,
+                  entry['method'], entry['path'], entry['qp'])
+            except restclient.ResourceNotFound:
+                if entry['method'] != 'DELETE':
+                    raise
+            else:
+                if entry['method'] == 'POST':
+                    id = pdorclient.utils.xmlparse(response).findtext('id')
+            self.done(entry['seq'], id)
+            sent += 1
+        self.sync()
+        return sent
+
+    def sync(self):
+        """Flush all journal entries to disk."""
+        with self._lock:
+            self._sync()
+
+    def unfinished(self):
+        """Return a list of the planned requests that never completed,
+        in the order in which they were planned."""
+        with self._lock:
+            return map(lambda seq: dict(self._planned[seq]),
+              sorted(self._planned.keys()))
@@ -0,0 +1,105 @@
+"""JSON lines export and import of records.
+
+Each line is one record, as returned by ``Resource.to_dict()``, with
+the name of its zone added::
+
+    {"change_date": null, "content": "192.0.2.1", "created_at":
+     "2011-05-23T07:00:00Z", "domain_id": 1, "id": 42, "name":
+     "www.example.net", "prio": null, "ttl": 300, "type": "A",
+     "updated_at": "2011-05-23T07:00:00Z", "zone": "example.net"}
+
+(shown folded here).  Both directions stream::
+
+    >>> from pdorclient import jsonl
+    >>> jsonl.export('example.net', open('example.net.json', 'w'))
+    >>> jsonl.load(zone, open('example.org.json'))
+
+"""
+
+import logging
+import pdorclient
+import pdorclient.errors
+import pdorclient.fanout
+import simplejson
+
+logger = logging.getLogger(__name__)
+
+def iterlines(records, zone=None):
+    """Yield one JSON line for each of ``records``.
+
+    ``zone``, if supplied, is the name of the zone the records belong
+    to.
+
+    """
+    for r in records:
+        d = r.to_dict()
+        if zone is not None:
+            d['zone'] = zone
+        yield simplejson.dumps(d, sort_keys=True) + '\n'
+
+def dump(records, f, zone=None):
+    """Write ``records`` to the file object ``f`` as JSON lines."""
+    f.writelines(iterlines(records, zone))
+
+def export(name, f, match=None, config=None):
+    """Write the RRs of the zone ``name`` to the file object ``f`` as
+    JSON lines, without building a ``Zone`` instance.
+
+    ``match`` and ``config`` are as for ``Zone.lookup()``.
+
+    """
+    dump(pdorclient.Zone.irecords(name, match, config), f, zone=name)
+
+def parse(lines, domain_id=None, config=None, processes=1):
+    """Yield a new ``Record`` instance for each JSON line in ``lines``.
+
+    ``lines`` may be any iterable of lines, such as an open file.  It is
+    consumed lazily.  Blank lines are skipped.
+
+    The records are new: any ``id`` is dropped, so that saving a record
+    creates it.  ``domain_id``, if supplied, replaces any ``domain_id``
+    in the input.
+
+    ``processes``, if greater than one, is the number of worker
+    processes to decode lines in; see ``pdorclient.fanout``.  Records
+    are still yielded in input order.
+
+    """
+    if not isinstance(config, pdorclient.Config):
+        config = pdorclient.Config()
+    lazy = pdorclient.Resource._lazy(config)
+
+    if processes > 1:
+        overrides = {'id': None}
+        if domain_id is not None:
+            overrides['domain_id'] = domain_id
+        for r in pdorclient.fanout.records(pdorclient.fanout._decode_lines,
+          pdorclient.fanout.split_lines(lines), processes, config,
+          **overrides):
+            yield r
+        return
+
+    for line in lines:
+        if not line.strip():
+            continue
+        d = simplejson.loads(line)
+        d['id'] = None
+        if domain_id is not None:
+            d['domain_id'] = domain_id
+        yield pdorclient.Record.from_dict(d, config, lazy)
+
+def load(zone, lines, concurrency=8, journal=None, processes=1):
+    """Create a record in ``zone``, which must already have been saved,
+    for each JSON line in ``lines``.
+
+    Records are saved as they are parsed and are not added to
+    ``zone.records``.  See ``Resource.save_many()`` for ``concurrency``,
+    ``journal`` and the return value, and ``parse()`` for
+    ``processes``.
+
+    """
+    if zone.id is None:
+        raise pdorclient.errors.PrematurePersistError()
+    return pdorclient.Resource.save_many(
+      parse(lines, domain_id=zone.id, config=zone._config,
+      processes=processes), concurrency, journal)
@@ -0,0 +1,243 @@
+"""Offline zone snapshots.
+
+A snapshot is a line-oriented text file holding one zone and all of its
+records::
+
+    PDORSNAP <tab> <version> <tab> <zone updated-at>
+    zone fields, tab separated
+    zone values, tab separated
+    record fields, tab separated
+    record values, tab separated (one line per record)
+    ...
+
+Values are written as the server encodes them in XML, with backslash
+escapes for tabs, newlines and backslashes.  ``\\N`` stands for a missing
+value.  Loading a snapshot never touches an XML parser, and ``scan()``
+reads records straight out of a read-only memory map.
+
+"""
+
+import logging
+import mmap
+import os
+import pdorclient
+import pdorclient.errors
+import urllib
+
+logger = logging.getLogger(__name__)
+
+MAGIC = 'PDORSNAP'
+VERSION = 1
+
+NULL = '\\N'
+
+RECORD_FIELDS = ('id', 'name', 'type', 'content', 'ttl', 'prio',
+  'change-date', 'created-at', 'updated-at')
+ZONE_FIELDS = tuple(sorted(pdorclient.Zone.ATTRS.keys()))
+
+def _decoder(klass, fields, lazy=False, shared=None):
+    """Return a function that turns a list of raw ``fields`` values into
+    keyword arguments for ``klass``.  If ``lazy`` is true, timestamps
+    are left as strings.  ``shared`` is as for
+    ``Resource.from_xml()``."""
+    converters = klass._converters()
+    types = dict(map(lambda (k, v): (v, k),
+      klass._type_names().iteritems()))
+    plan = []
+    for attr in fields:
+        if attr == 'type':
+            conv = lambda raw: types[raw.upper()]
+        elif attr == 'id':
+            conv = str
+        elif lazy and attr.replace('-', '_') in klass.TIMESTAMP_ATTRS:
+            conv = str
+        else:
+            conv = converters[attr][0]
+        plan.append((attr.replace('-', '_'), conv))
+
+    def decode(values):
+        kwargs = {}
+        for ((attr_kw, conv), raw) in zip(plan, values):
+            if raw == NULL:
+                continue
+            if '\\' in raw:
+                raw = raw.decode('string_escape')
+            value = conv(raw)
+            if shared is not None and attr_kw != 'id':
+                value = shared.setdefault(value, value)
+            kwargs[attr_kw] = value
+        return kwargs
+    return decode
+
+def _encoder(klass, fields):
+    """Return a function that turns a resource of type ``klass`` into a
+    list of raw ``fields`` values."""
+    converters = klass._converters()
+    types = klass._type_names()
+    plan = []
+    for attr in fields:
+        if attr == 'type':
+            conv = types.__getitem__
+        elif attr.replace('-', '_') in klass.TIMESTAMP_ATTRS:
+            # Timestamps may not have been decoded yet.
+            conv = lambda typed: typed if isinstance(typed, str) else \
+              typed.strftime(klass.ENCODED_DATE_FMT)
+        else:
+            conv_out = converters[attr][1]
+            conv = lambda typed, conv_out=conv_out: \
+              urllib.unquote(conv_out(typed))
+        plan.append((attr.replace('-', '_'), conv))
+
+    def encode(resource):
+        values = []
+        for (attr_kw, conv) in plan:
+            if attr_kw == 'id':
+                typed = resource._id
+            else:
+                typed = resource._repr.get(attr_kw)
+            if typed is None:
+                values.append(NULL)
+            else:
+                values.append(str(conv(typed)).encode('string_escape'))
+        return values
+    return encode
+
+def _read_header(f, path):
+    line = f.readline().rstrip('\n').split('\t')
+    if len(line) != 3 or line[0] != MAGIC:
+        raise pdorclient.errors.SnapshotFormatError(path)
+    if int(line[1]) != VERSION:
+        raise pdorclient.errors.SnapshotFormatError(path)
+    zone_fields = tuple(f.readline().rstrip('\n').split('\t'))
+    zone_values = f.readline().rstrip('\n').split('\t')
+    record_fields = tuple(f.readline().rstrip('\n').split('\t'))
+    if zone_fields != ZONE_FIELDS or record_fields != RECORD_FIELDS or \
+      len(zone_values) != len(zone_fields):
+        raise pdorclient.errors.SnapshotFormatError(path)
+    return (line[2], zone_values)
+
+def dump(zone, path):
+    """Write ``zone`` and its records to a snapshot at ``path``.
+
+    The snapshot is written to a temporary file first and renamed into
+    place, so readers never see a partial snapshot.
+
+    """
+    encode_zone = _encoder(pdorclient.Zone, ZONE_FIELDS)
+    encode_record = _encoder(pdorclient.Record, RECORD_FIELDS)
+
+    zone_values = encode_zone(zone)
+    tmp = '%s.%d~' % (path, os.getpid())
+    f = open(tmp, 'wb')
+    try:
+        f.write('%s\t%d\t%s\n' % (MAGIC, VERSION,
+          zone_values[ZONE_FIELDS.index('updated-at')]))
+        f.write('\t'.join(ZONE_FIELDS) + '\n')
+        f.write('\t'.join(zone_values) + '\n')
+        f.write('\t'.join(RECORD_FIELDS) + '\n')
+        f.writelines('\t'.join(encode_record(r)) + '\n'
+          for r in zone.records)
+        f.close()
+        os.rename(tmp, path)
+    except:
+        f.close()
+        os.unlink(tmp)
+        raise
+
+def load(path, config=None):
+    """Load and return a ``Zone`` instance, with all of its ``Record``
+    instances, from the snapshot at ``path``.
+
+    The returned resources are indistinguishable from those returned by
+    ``Zone.lookup()`` at the time the snapshot was taken.
+
+    Will raise ``SnapshotFormatError`` if ``path`` is not a snapshot
+    this version of the library understands.
+
+    """
+    if not isinstance(config, pdorclient.Config):
+        config = pdorclient.Config()
+
+    lazy = pdorclient.Resource._lazy(config)
+    decode_zone = _decoder(pdorclient.Zone, ZONE_FIELDS, lazy)
+    decode_record = _decoder(pdorclient.Record, RECORD_FIELDS, lazy,
+      shared={})
+
+    f = open(path, 'rb')
+    try:
+        (updated_at, zone_values) = _read_header(f, path)
+        attrs = decode_zone(zone_values)
+        if 'zone_template_name' in attrs:
+            attrs['template'] = attrs.pop('zone_template_name')
+        zone = pdorclient.Zone(config=config, **attrs)
+
+        for line in f:
+            attrs = decode_record(line.rstrip('\n').split('\t'))
+            zone.records.append(pdorclient.Record(domain_id=zone._id,
+              config=config, **attrs))
+    finally:
+        f.close()
+    return zone
+
+def lookup(name, path, config=None):
+    """Return a ``Zone`` instance for ``name``, using the snapshot at
+    ``path`` as a cache.
+
+    The zone's ``updated_at`` is fetched from the server without any of
+    its records.  If it matches the snapshot, the zone is loaded from
+    the snapshot.  Otherwise, the whole zone is fetched with
+    ``Zone.lookup()`` and the snapshot is rewritten.
+
+    Note that PowerDNS on Rails may not bump a zone's ``updated_at``
+    for every change to its records.
+
+    """
+    if not isinstance(config, pdorclient.Config):
+        config = pdorclient.Config()
+
+    zone = pdorclient.Zone.lookup(name, match=False, config=config)
+    if zone.updated_at is not None and os.path.exists(path):
+        try:
+            if updated_at(path) == zone.updated_at.strftime(
+              pdorclient.Zone.ENCODED_DATE_FMT):
+                logging.debug('Snapshot %r is current for %r' %
+                  (path, name))
+                return load(path, config)
+        except pdorclient.errors.SnapshotFormatError:
+            pass
+
+    zone = pdorclient.Zone.lookup(zone.id, config=config)
+    dump(zone, path)
+    return zone
+
+def scan(path):
+    """Yield a tuple of raw values, in ``RECORD_FIELDS`` order, for
+    each record in the snapshot at ``path``.
+
+    No ``Record`` instances are created.  The snapshot is read through
+    a read-only memory map, so concurrent scans of the same snapshot
+    share the operating system's page cache.  Missing values are
+    ``None``.
+
+    """
+    f = open(path, 'rb')
+    try:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    finally:
+        f.close()
+    try:
+        _read_header(m, path)
+        for line in iter(m.readline, ''):
+            yield tuple(map(lambda raw: None if raw == NULL else
+              raw.decode('string_escape'), line.rstrip('\n').split('\t')))
+    finally:
+        m.close()
+
+def updated_at(path):
+    """Return the zone's ``updated-at`` value, as encoded by the
+    server, from the snapshot at ``path``."""
+    f = open(path, 'rb')
+    try:
+        return _read_header(f, path)[0]
+    finally:
+        f.close()
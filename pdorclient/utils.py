@@ -1,7 +1,16 @@
+import Queue
+import collections
+import datetime
+import io
 import logging
-import lxml.objectify
 import pdorclient.errors
 import re
+import sys
+import threading
+import time
+import urllib
+import weakref
+import zlib
 
 logger = logging.getLogger(__name__)
 
@@ -29,6 +38,21 @@ def is_ipv4(ipv4):
         return True
     return False
 
+# See RFC-952 and RFC-1123.
+_RE_RFC952 = re.compile(
+  '^('
+    '\*\.'
+  ')?'
+  '('
+    '('
+      '[a-z0-9]|'
+      '[a-z0-9][a-z0-9\-]*[a-z0-9]'
+    ')\.'
+  ')*('
+    '[a-z0-9]|'
+    '[a-z0-9][a-z0-9\-]*[a-z0-9]'
+  ')$', re.I)
+
 def rfc952ify(name):
     """Return a normalised, RFC-952-compliant version of ``name``.
 
@@ -38,27 +62,90 @@ def rfc952ify(name):
     # Silently normalise case and trailing periods.
     normalised = str(name).lower().rstrip('.')
 
-    # See RFC-952 and RFC-1123.
-    re_validity = re.compile(
-      '^('
-        '\*\.'
-      ')?'
-      '('
-        '('
-          '[a-z0-9]|'
-          '[a-z0-9][a-z0-9\-]*[a-z0-9]'
-        ')\.'
-      ')*('
-        '[a-z0-9]|'
-        '[a-z0-9][a-z0-9\-]*[a-z0-9]'
-      ')$', re.I)
-    m = re_validity.match(normalised)
+    m = _RE_RFC952.match(normalised)
     if not m:
         raise pdorclient.errors.Rfc952ViolationError(normalised)
+    if normalised == name and isinstance(name, str):
+        # Hand back the caller's string, which may be shared; see
+        # ``Resource.from_xml()``.
+        return name
     return normalised
 
+# Timestamps in the server's format recently decoded by ``strptime()``.
+# Records created by one bulk import share their timestamps, so even a
+# small memo catches most of them.  The memo is emptied when full;
+# ``datetime.datetime`` instances are immutable and safe to share.
+STRPTIME_MEMO_SIZE = 1024
+_strptime_memo = {}
+
+def strptime(value, fmt):
+    """Return ``value``, a timestamp formatted as ``fmt``, as a
+    ``datetime.datetime`` instance.
+
+    Timestamps in the server's ``%Y-%m-%dT%H:%M:%SZ`` format are sliced
+    apart directly and remembered; ``time.strptime()`` is many times
+    slower, takes a global lock and is only used for anything else.
+
+    """
+    if fmt == '%Y-%m-%dT%H:%M:%SZ':
+        dt = _strptime_memo.get(value)
+        if dt is not None:
+            return dt
+        if len(value) == 20 and value[4] + value[7] + value[10] + \
+          value[13] + value[16] + value[19] == '--T::Z':
+            digits = (value[0:4], value[5:7], value[8:10], value[11:13],
+              value[14:16], value[17:19])
+            if ''.join(digits).isdigit():
+                dt = datetime.datetime(*map(int, digits))
+                if len(_strptime_memo) >= STRPTIME_MEMO_SIZE:
+                    _strptime_memo.clear()
+                _strptime_memo[value] = dt
+                return dt
+    return datetime.datetime(*(time.strptime(value, fmt)[0:6]))
+
+# Parameters look like ``record[content]=...``.
+_RE_HASH_PARAM = re.compile(r'^(\w+)\[(\w+)\]=(.*)$', re.S)
+
+def encode_body(qp, encoding, gzip=False):
+    """Return a ``(body, headers)`` tuple carrying the query parameters
+    ``qp`` in a request body instead of the query string.
+
+    ``qp`` is a list of ``key=value`` strings with URL-quoted values,
+    as returned by ``Resource._parameterise()``.  ``encoding`` is
+    ``'form'`` for an ``application/x-www-form-urlencoded`` body or
+    ``'xml'`` for an ``application/xml`` document like the ones the
+    server sends, which requires ``hash[attr]=value`` keys.  Supply
+    ``gzip=True`` to compress the body.
+
+    """
+    if encoding == 'form':
+        body = '&'.join(qp)
+        content_type = 'application/x-www-form-urlencoded'
+    elif encoding == 'xml':
+        import lxml.etree
+        root = None
+        for param in qp:
+            (hash_base, attr, value) = _RE_HASH_PARAM.match(param).groups()
+            if root is None:
+                root = lxml.etree.Element(hash_base)
+            lxml.etree.SubElement(root, attr.replace('_', '-')).text = \
+              urllib.unquote(value).decode('utf-8')
+        body = lxml.etree.tostring(root, encoding='UTF-8',
+          xml_declaration=True)
+        content_type = 'application/xml'
+    else:
+        raise ValueError('Unknown body encoding %r' % encoding)
+
+    headers = {'Content-Type': '%s; charset=utf-8' % content_type}
+    if gzip:
+        compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+        body = compressor.compress(body) + compressor.flush()
+        headers['Content-Encoding'] = 'gzip'
+    return (body, headers)
+
 def xmlobjify(xml):
     """Return a lxml object representation of ``xml``."""
+    import lxml.objectify
     if isinstance(xml, unicode):
         xml = xml.encode('ascii')
     if isinstance(xml, lxml.objectify.ObjectifiedElement):
@@ -66,3 +153,382 @@ def xmlobjify(xml):
     else:
         xmlobj = lxml.objectify.fromstring(xml)
     return xmlobj
+
+def xmlitems(elem):
+    """Yield a ``(field, text)`` tuple for each child element and then
+    each attribute of the lxml element ``elem``.
+
+    Empty and ``nil`` fields are ``''``.
+
+    """
+    import lxml.etree
+    for child in elem.iterchildren(tag=lxml.etree.Element):
+        yield (child.tag, child.text or '')
+    for item in elem.attrib.iteritems():
+        yield item
+
+def xmliterparse(xml, tag):
+    """Yield each ``tag`` element in ``xml``, in document order.
+
+    Elements are discarded once the caller has moved on to the next
+    one, so memory use does not grow with the number of elements.
+
+    """
+    import lxml.etree
+    if isinstance(xml, unicode):
+        xml = xml.encode('utf-8')
+    for (event, elem) in lxml.etree.iterparse(io.BytesIO(xml), tag=tag):
+        yield elem
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+def xmlparse(xml):
+    """Return the root lxml element of ``xml``.
+
+    Unlike ``xmlobjify()``, no ``lxml.objectify`` machinery is involved;
+    read fields with ``xmlitems()``.
+
+    """
+    import lxml.etree
+    if lxml.etree.iselement(xml):
+        return xml
+    if isinstance(xml, unicode):
+        xml = xml.encode('utf-8')
+    return lxml.etree.fromstring(xml)
+
+class ResponseBody(object):
+    """The body of an HTTP response, read from the file-like object
+    ``f`` and decompressed as it is consumed.
+
+    ``content_encoding`` is the response's ``Content-Encoding``;
+    ``gzip`` and ``deflate`` bodies are inflated chunk by chunk, so
+    neither the compressed nor the decompressed body is ever held whole
+    unless ``read()`` asks for it.  A body may only be consumed once.
+
+    ``wire_bytes`` counts the bytes read from ``f``, ``size`` the bytes
+    they decompressed to and ``decode_seconds`` the time spent
+    decompressing and parsing them.
+
+    """
+    CHUNK_SIZE = 65536
+
+    def __init__(self, f, content_encoding=None, path=None):
+        self.f = f
+        self.content_encoding = (content_encoding or 'identity').lower()
+        self.path = path
+        self.wire_bytes = 0
+        self.size = 0
+        self.decode_seconds = 0.0
+
+    def __iter__(self):
+        """Yield the decompressed body in chunks."""
+        if self.content_encoding == 'gzip':
+            inflater = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        elif self.content_encoding == 'deflate':
+            inflater = zlib.decompressobj()
+        else:
+            inflater = None
+
+        while True:
+            chunk = self.f.read(self.CHUNK_SIZE)
+            if not chunk:
+                break
+            self.wire_bytes += len(chunk)
+            if inflater is not None:
+                start = time.time()
+                try:
+                    chunk = inflater.decompress(chunk)
+                except zlib.error:
+                    # Some servers send raw deflate streams without the 
+                    # zlib header RFC 2616 asks for.
+                    if self.content_encoding != 'deflate' or \
+                      self.size > 0:
+                        raise
+                    inflater = zlib.decompressobj(-zlib.MAX_WBITS)
+                    chunk = inflater.decompress(chunk)
+                self.decode_seconds += time.time() - start
+            self.size += len(chunk)
+            if chunk:
+                yield chunk
+        if inflater is not None:
+            chunk = inflater.flush()
+            self.size += len(chunk)
+            if chunk:
+                yield chunk
+
+        logging.debug('Read %r: %d bytes on the wire (%s), %d bytes '
+          'decoded in %.3fs' % (self.path, self.wire_bytes,
+          self.content_encoding, self.size, self.decode_seconds))
+
+    def __repr__(self):
+        return '%s.%s(path=%r, content_encoding=%r)' % (self.__module__,
+          self.__class__.__name__, self.path, self.content_encoding)
+
+    def _feed(self, parser):
+        for chunk in self:
+            start = time.time()
+            parser.feed(chunk)
+            self.decode_seconds += time.time() - start
+            yield
+
+    def read(self):
+        """Return the whole decompressed body."""
+        return ''.join(self)
+
+    def xmliterparse(self, tag):
+        """Yield each ``tag`` element in the body, in document order,
+        as the body arrives; see ``xmliterparse()``."""
+        import lxml.etree
+        parser = lxml.etree.XMLPullParser(events=('end',), tag=tag)
+        for _ in self._feed(parser):
+            for (event, elem) in parser.read_events():
+                yield elem
+                elem.clear()
+                while elem.getprevious() is not None:
+                    del elem.getparent()[0]
+        parser.close()
+
+    def xmlparse(self):
+        """Return the root lxml element of the body, parsed as the
+        body arrives; see ``xmlparse()``."""
+        import lxml.etree
+        parser = lxml.etree.XMLParser()
+        for _ in self._feed(parser):
+            pass
+        start = time.time()
+        root = parser.close()
+        self.decode_seconds += time.time() - start
+        return root
+
+def imap_unordered(func, items, concurrency=1):
+    """Apply ``func`` to each element of ``items`` using at most
+    ``concurrency`` worker threads.
+
+    Yield ``(item, result, error)`` tuples in the order in which the
+    calls complete.  ``error`` is ``None`` on success; otherwise it is
+    the exception raised by ``func`` and ``result`` is ``None``.  One
+    failed call never aborts the others.
+
+    """
+    if concurrency < 2:
+        for item in items:
+            try:
+                yield (item, func(item), None)
+            except Exception, e:
+                yield (item, None, e)
+        return
+
+    tasks = Queue.Queue()
+    results = Queue.Queue()
+    sentinel = object()
+
+    def worker():
+        while True:
+            item = tasks.get()
+            if item is sentinel:
+                return
+            try:
+                results.put((item, func(item), None))
+            except Exception, e:
+                results.put((item, None, e))
+
+    workers = []
+    for i in range(concurrency):
+        t = threading.Thread(target=worker)
+        t.daemon = True
+        t.start()
+        workers.append(t)
+
+    # Feed the workers lazily so that ``items`` may be a generator of
+    # arbitrary length.
+    items = iter(items)
+    exhausted = False
+    pending = 0
+    try:
+        while True:
+            while not exhausted and pending < concurrency * 2:
+                try:
+                    tasks.put(items.next())
+                    pending += 1
+                except StopIteration:
+                    exhausted = True
+            if pending == 0:
+                break
+            # A blocking ``get()`` without a timeout cannot be
+            # interrupted by ``KeyboardInterrupt``.
+            while True:
+                try:
+                    result = results.get(True, 0.5)
+                    break
+                except Queue.Empty:
+                    continue
+            pending -= 1
+            yield result
+    finally:
+        for t in workers:
+            tasks.put(sentinel)
+
+class IdentityMap(object):
+    """A thread-safe mapping of keys to objects that holds only weak
+    references: an entry goes away once nothing else refers to its
+    object."""
+    def __init__(self):
+        self._data = weakref.WeakValueDictionary()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '%s.%s()' % (self.__module__, self.__class__.__name__)
+
+    def get(self, key):
+        with self._lock:
+            return self._data.get(key)
+
+    def setdefault(self, key, value):
+        """Return the object for ``key``, first storing ``value`` for
+        it if there is none."""
+        with self._lock:
+            existing = self._data.get(key)
+            if existing is None:
+                self._data[key] = existing = value
+            return existing
+
+class NullLock(object):
+    """A lock that never blocks, for resources that nothing else may
+    touch."""
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def acquire(self, blocking=True):
+        return True
+
+    def release(self):
+        pass
+
+class TtlCache(object):
+    """A bounded, thread-safe mapping whose entries expire ``ttl``
+    seconds after they were stored.
+
+    When full, the oldest entry is evicted first.
+
+    """
+    def __init__(self, maxsize=4096, ttl=300):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __repr__(self):
+        return '%s.%s(maxsize=%r, ttl=%r)' % (
+          self.__module__, self.__class__.__name__, self.maxsize,
+          self.ttl)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def discard(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                (expires, value) = self._data[key]
+            except KeyError:
+                return default
+            if expires < time.time():
+                del self._data[key]
+                return default
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.time() + self.ttl, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+class SingleFlight(object):
+    """Coalesces concurrent identical calls: while a call for a key is
+    in flight, callers asking for the same key wait for it and share
+    its outcome instead of making their own.
+
+    Nothing is remembered once a call completes; a caller that arrives
+    afterwards makes a call of its own.
+
+    """
+    class Flight(object):
+        def __init__(self):
+            self.callers = 1
+            self.done = threading.Event()
+            self.error = None
+            self.result = None
+
+    def __init__(self):
+        self._flights = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._flights)
+
+    def __repr__(self):
+        return '%s.%s()' % (self.__module__, self.__class__.__name__)
+
+    def do(self, key, func, copy=None):
+        """Return ``func()``, or the result of the call for ``key``
+        already in flight.
+
+        ``copy``, if supplied, is applied to the result for all callers
+        but one, so that callers that change what they are given do not
+        share it.  The one caller given the result itself is only given
+        it once every other caller has made its copy.  An error raised
+        by the call is raised to every caller.
+
+        """
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = SingleFlight.Flight()
+            else:
+                flight.callers += 1
+
+        if leader:
+            try:
+                flight.result = func()
+            except:
+                flight.error = sys.exc_info()
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        else:
+            # Unlike ``imap_unordered()``, wait without a timeout: a 
+            # timed wait polls, and would wake up to 50ms after the 
+            # call completes.
+            flight.done.wait()
+
+        if flight.error is not None:
+            raise flight.error[0], flight.error[1], flight.error[2]
+        if copy is None:
+            return flight.result
+
+        with self._lock:
+            last = flight.callers == 1
+            if last:
+                flight.callers = 0
+        if last:
+            return flight.result
+        result = copy(flight.result)
+        with self._lock:
+            flight.callers -= 1
+        return result
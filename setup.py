@@ -34,5 +34,11 @@ work with the RESTful API exposed by PowerDNS on Rails.
       'simplejson',
     ],
 
-    packages = find_packages(exclude=['tests']),
+    packages = find_packages(exclude=['benchmarks', 'tests']),
+
+    entry_points = {
+      'console_scripts': [
+        'pdorclient = pdorclient.cli:main',
+      ],
+    },
 )
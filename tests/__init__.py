@@ -48,3 +48,21 @@ def nuke_zone():
         zone.delete()
     except pdorclient.errors.NameNotFoundError:
         pass
+
+def make_zone(hosts=0, config=None, save=True, **attrs):
+    """Return a zone named ``TEST_DATA_ZONE`` holding ``hosts`` A
+    records, ``host<i>`` for ``192.0.2.<i>``.  ``attrs`` are further
+    attributes of the zone, such as ``notes``.  The zone is saved
+    unless ``save=False``."""
+    if config is None:
+        config = pdorclient.Config()
+    zone = pdorclient.Zone(name=TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, ttl=TEST_DATA_TTL, config=config,
+      **attrs)
+    zone.records.extend(map(lambda i: pdorclient.Record(
+      name='host%d.%s' % (i, TEST_DATA_ZONE),
+      type=pdorclient.Record.TYPE_A, content='192.0.2.%d' % i,
+      config=config), range(hosts)))
+    if save:
+        zone.save()
+    return zone
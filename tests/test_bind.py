@@ -0,0 +1,101 @@
+from nose.tools import raises
+import StringIO
+import logging
+import pdorclient
+import pdorclient.bind
+import pdorclient.errors
+import tests
+
+logger = logging.getLogger(__name__)
+
+MASTER_FILE = """$ORIGIN %(zone)s.
+$TTL 1h
+@       IN  SOA  ns1 hostmaster.%(zone)s. (
+                 2010010101 ; serial
+                 3h 15m 1w 1d )
+        IN  NS   ns1
+        IN  MX   10 mail.example.net.
+www 300 IN  A    192.0.2.1
+        IN  AAAA 2001:db8::1
+ftp     IN  600  CNAME www
+txt     IN  TXT  "quoted \\"text\\"; not a comment" "and more"
+""" % {'zone': tests.TEST_DATA_ZONE}
+
+def parse(text=MASTER_FILE):
+    return list(pdorclient.bind.parse(StringIO.StringIO(text),
+      config=pdorclient.Config()))
+
+def test_parse():
+    records = parse()
+    assert len(records) == 7
+    z = tests.TEST_DATA_ZONE
+
+    soa = records[0]
+    assert soa.type == pdorclient.Record.TYPE_SOA
+    assert soa.name == z
+    assert soa.ttl == 3600
+    assert soa.content == 'ns1.%s hostmaster.%s ' \
+      '2010010101 10800 900 604800 86400' % (z, z)
+
+    assert records[2].type == pdorclient.Record.TYPE_MX
+    assert records[2].prio == 10
+    assert records[2].content == 'mail.example.net'
+
+    # Owner names carry over; TTLs come from ``$TTL`` unless given.
+    assert records[3].name == 'www.%s' % z
+    assert records[3].ttl == 300
+    assert records[4].name == 'www.%s' % z
+    assert records[4].ttl == 3600
+
+    assert records[5].content == 'www.%s' % z
+    assert records[5].ttl == 600
+    assert records[6].content == 'quoted "text"; not a commentand more'
+
+def test_export_round_trip():
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, ttl=tests.TEST_DATA_TTL,
+      config=pdorclient.Config())
+    zone.records.extend(parse())
+    f = StringIO.StringIO()
+    pdorclient.bind.dump(zone, f)
+
+    fields = lambda r: (r.name, r.type, r.ttl, r.prio, r.content)
+    assert map(fields, parse(f.getvalue())) == map(fields, zone.records)
+
+@raises(pdorclient.errors.ZoneFileParseError)
+def test_parse_raises_zone_file_parse_error_on_unbalanced_parentheses():
+    parse('@ IN SOA ns1 hostmaster ( 1 2 3 4 5\n')
+
+@raises(pdorclient.errors.ZoneFileParseError)
+def test_parse_raises_zone_file_parse_error_on_unsupported_type():
+    parse('$ORIGIN example.net.\n@ IN WKS 192.0.2.1 TCP\n')
+
+@raises(pdorclient.errors.ZoneFileParseError)
+def test_parse_raises_zone_file_parse_error_without_origin():
+    parse('www IN A 192.0.2.1\n')
+
+def test_load():
+    tests.nuke_zone()
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, ttl=tests.TEST_DATA_TTL,
+      config=pdorclient.Config())
+    zone.save()
+
+    (saved, errors) = pdorclient.bind.load(zone,
+      StringIO.StringIO(MASTER_FILE), concurrency=4)
+    assert errors == []
+    assert saved == 7
+
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE)
+    assert len(zone.records) == 7
+
+    # The SOA on the server is seen even when the zone's records were
+    # not looked up.
+    (saved, errors) = pdorclient.bind.load(pdorclient.Zone.lookup(
+      tests.TEST_DATA_ZONE, match=False), StringIO.StringIO(MASTER_FILE))
+    assert errors == []
+    assert saved == 6
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE)
+    assert len(filter(lambda r: r.type == pdorclient.Record.TYPE_SOA,
+      zone.records)) == 1
+    zone.delete()
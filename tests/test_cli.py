@@ -0,0 +1,98 @@
+import StringIO
+import logging
+import pdorclient
+import pdorclient.cli
+import simplejson
+import sys
+import tests
+
+logger = logging.getLogger(__name__)
+
+def run(argv, stdin=''):
+    """Run the tool and return ``(status, [output records])``."""
+    saved = sys.stdin
+    sys.stdin = StringIO.StringIO(stdin)
+    try:
+        out = StringIO.StringIO()
+        status = pdorclient.cli.main(argv + ['--quiet'], out=out)
+    finally:
+        sys.stdin = saved
+    return (status, map(simplejson.loads, out.getvalue().splitlines()))
+
+def test_changes():
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, config=pdorclient.Config())
+    for (name, ttl) in (('a', 60), ('b', 60)):
+        zone.records.append(pdorclient.Record(
+          name='%s.%s' % (name, tests.TEST_DATA_ZONE),
+          type=pdorclient.Record.TYPE_A, content='192.0.2.1', ttl=ttl,
+          config=pdorclient.Config()))
+    desired = [
+      {'zone': tests.TEST_DATA_ZONE, 'name': 'A.%s.' % tests.TEST_DATA_ZONE,
+       'type': 'a', 'content': '192.0.2.1', 'ttl': 300},
+      {'zone': tests.TEST_DATA_ZONE, 'name': 'c.%s' % tests.TEST_DATA_ZONE,
+       'type': 'A', 'content': '192.0.2.1'},
+    ]
+    changes = pdorclient.cli._changes(zone, desired)
+    assert map(lambda (action, d, r): (action, d['name'], d.get('ttl')),
+      changes) == [
+        ('update', 'a.%s' % tests.TEST_DATA_ZONE, 300),
+        ('create', 'c.%s' % tests.TEST_DATA_ZONE, None),
+        ('delete', 'b.%s' % tests.TEST_DATA_ZONE, 60),
+      ]
+
+def test_dump_sync_and_diff():
+    tests.nuke_zone()
+    zone = tests.make_zone(3)
+    (status, records) = run(['dump', tests.TEST_DATA_ZONE])
+    assert status == 0
+    assert len(records) == 3
+
+    # Drop one record, change a TTL and add a new record.
+    records.pop()
+    records[0]['ttl'] = 1234
+    records.append({'zone': tests.TEST_DATA_ZONE,
+      'name': 'new.%s' % tests.TEST_DATA_ZONE, 'type': 'A',
+      'content': '192.0.2.99'})
+    stdin = '\n'.join(map(simplejson.dumps, records))
+
+    (status, changes) = run(['diff'], stdin)
+    assert status == 0
+    assert sorted(map(lambda c: c['action'], changes)) == \
+      ['create', 'delete', 'update']
+
+    (status, changes) = run(['sync', '--jobs', '2'], stdin)
+    assert status == 0
+    assert len(changes) == 3
+    assert run(['diff'], stdin) == (0, [])
+    zone.delete()
+
+def test_load_and_delete_records():
+    tests.nuke_zone()
+    zone = tests.make_zone(3)
+    record = {'zone': tests.TEST_DATA_ZONE,
+      'name': 'loaded.%s' % tests.TEST_DATA_ZONE, 'type': 'A',
+      'content': '192.0.2.200'}
+    missing = dict(record, zone='nonexistent.%s' % tests.TEST_DATA_ZONE)
+
+    (status, loaded) = run(['load'],
+      '\n'.join(map(simplejson.dumps, [record, missing])))
+    assert status == 1
+    assert len(loaded) == 1
+    assert loaded[0]['id'] is not None
+
+    (status, deleted) = run(['delete-records'], simplejson.dumps(record))
+    assert status == 0
+    assert map(lambda d: d['id'], deleted) == [loaded[0]['id']]
+
+    # Lines that name no record, or only a type, are refused rather
+    # than matching them all.
+    (status, deleted) = run(['delete-records'], '\n'.join(map(
+      simplejson.dumps, [{'zone': tests.TEST_DATA_ZONE},
+      {'zone': tests.TEST_DATA_ZONE, 'nmae': 'typo'},
+      {'zone': tests.TEST_DATA_ZONE, 'type': 'A'}])))
+    assert status == 1
+    assert deleted == []
+    assert len(pdorclient.Zone.lookup(tests.TEST_DATA_ZONE,
+      config=pdorclient.Config()).records) == 3
+    zone.delete()
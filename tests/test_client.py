@@ -0,0 +1,217 @@
+from nose.tools import with_setup
+import gc
+import logging
+import pdorclient
+import pdorclient.errors
+import tests
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+THREADS = 16
+
+def setup():
+    tests.nuke_zone()
+    tests.disappear_config()
+
+def teardown():
+    tests.restore_config()
+    tests.nuke_zone()
+
+def run_threads(target):
+    errors = []
+    def run(i):
+        try:
+            target(i)
+        except Exception, e: # pragma: no cover
+            errors.append(e)
+    threads = map(lambda i: threading.Thread(target=run, args=(i,)),
+      range(THREADS))
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert errors == [], errors
+
+def test_client_is_a_config():
+    client = pdorclient.Client(path=tests.TMP_CONFIG)
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+
+    assert isinstance(client, pdorclient.Config)
+    assert client.url == config.url
+    assert client.credentials == config.credentials
+    assert client.request_body == config.request_body
+
+def test_concurrent_lookups():
+    client = pdorclient.Client(path=tests.TMP_CONFIG)
+    zones = []
+    run_threads(lambda i: zones.append(client.lookup('example.com')))
+
+    assert len(zones) == THREADS
+    for zone in zones:
+        assert zone.id == 1
+        assert zone._config is client
+        assert len(zone.records) > 0
+    assert client.id_cache.get((client.url, 'example.com')) == 1
+
+def test_concurrent_lookups_are_coalesced():
+    client = pdorclient.Client(path=tests.TMP_CONFIG)
+    paths = []
+    stream = pdorclient.Resource.RestClient.stream
+    def held(self, path, headers=None):
+        # Hold each request until every thread is waiting for it.
+        paths.append(path)
+        deadline = time.time() + 10
+        while max([0] + map(lambda f: f.callers,
+          client.flights._flights.values())) < THREADS and \
+          time.time() < deadline:
+            time.sleep(0.01)
+        return stream(self, path, headers)
+
+    zones = []
+    pdorclient.Resource.RestClient.stream = held
+    try:
+        run_threads(lambda i: zones.append(client.lookup('example.com')))
+    finally:
+        pdorclient.Resource.RestClient.stream = stream
+
+    assert paths == ['/search/results?q=example.com', '/domains/1']
+    assert len(set(map(id, zones))) == THREADS
+    records = [r for zone in zones for r in zone.records]
+    assert len(set(map(id, records))) == len(records)
+    for zone in zones:
+        assert zone.records == zones[0].records
+        for r in zone.records:
+            assert r._parent() is zone
+
+    zones[0].records[0].ttl = 1
+    zones[0].name = 'example.org'
+    for zone in zones[1:]:
+        assert zone.name == 'example.com'
+        assert zone.records[0].ttl != 1
+        assert zone.pending_changes() == []
+
+def test_coalesced_lookups_keep_each_callers_config():
+    configs = map(lambda i: pdorclient.Config(path=tests.TMP_CONFIG),
+      range(THREADS))
+    for config in configs[::2]:
+        config.timestamps = 'lazy'
+    flights = pdorclient.Zone._in_flight
+
+    paths = []
+    stream = pdorclient.Resource.RestClient.stream
+    def held(self, path, headers=None):
+        paths.append(path)
+        deadline = time.time() + 10
+        while sum(map(lambda f: f.callers, flights._flights.values())) < \
+          THREADS and time.time() < deadline:
+            time.sleep(0.01)
+        return stream(self, path, headers)
+
+    zones = {}
+    pdorclient.Resource.RestClient.stream = held
+    try:
+        run_threads(lambda i: zones.__setitem__(i,
+          pdorclient.Zone.lookup('example.com', config=configs[i])))
+    finally:
+        pdorclient.Resource.RestClient.stream = stream
+
+    # One fetch of the zone for each timestamps setting.
+    assert paths.count('/domains/1') == 2
+    for (i, zone) in zones.iteritems():
+        assert zone._config is configs[i]
+        for r in zone.records:
+            assert r._config is configs[i]
+            assert isinstance(r._repr['created_at'], str) == (i % 2 == 0)
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_concurrent_changes_to_one_zone():
+    client = pdorclient.Client(path=tests.TMP_CONFIG)
+    zone = client.zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER)
+    zone.save()
+
+    def add(i):
+        with zone.lock():
+            zone.records.append(client.record(
+              name='t%d.%s' % (i, tests.TEST_DATA_ZONE),
+              type=pdorclient.Record.TYPE_A, content='192.0.2.%d' % i))
+        zone.save()
+    run_threads(add)
+
+    assert zone.pending_changes() == []
+    assert len(zone.records) == THREADS
+    for r in zone.records:
+        assert r.id is not None
+
+    zone = client.lookup(tests.TEST_DATA_ZONE)
+    assert sorted(map(lambda r: r.name, zone.records)) == \
+      sorted(map(lambda i: 't%d.%s' % (i, tests.TEST_DATA_ZONE),
+        range(THREADS)))
+
+def test_identity_map():
+    client = pdorclient.Client(path=tests.TMP_CONFIG, identity_map=True)
+    zone = client.lookup('example.com')
+    records = list(zone.records)
+    records[0].ttl = 1
+
+    assert client.lookup('example.com') is zone
+    assert client.lookup('example.com', match='ns', processes=2) is zone
+    assert map(id, zone.records) == map(id, records)
+    assert records[0].ttl == 1
+    assert map(lambda (action, r): (action, id(r)),
+      zone.pending_changes()) == [('update', id(records[0]))]
+
+    # Nothing else refers to the instances once the zone is dropped.
+    del zone, records
+    gc.collect()
+    assert len(client.identities) == 0
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_identity_map_drops_records_deleted_elsewhere():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, config=config)
+    for i in range(2):
+        zone.records.append(pdorclient.Record(
+          name='t%d.%s' % (i, tests.TEST_DATA_ZONE),
+          type=pdorclient.Record.TYPE_A, content='192.0.2.%d' % i,
+          config=config))
+    zone.save()
+
+    client = pdorclient.Client(path=tests.TMP_CONFIG, identity_map=True)
+    mapped = client.lookup(tests.TEST_DATA_ZONE)
+    assert len(mapped.records) == 2
+    (doomed, kept) = sorted(mapped.records, key=lambda r: r.name)
+
+    zone.records[0].delete()
+    assert client.lookup(tests.TEST_DATA_ZONE, match='t1') is mapped
+    assert len(mapped.records) == 2
+    assert client.lookup(tests.TEST_DATA_ZONE) is mapped
+    assert mapped.records == [kept]
+    assert doomed._state == doomed.STATE_DELETED
+    assert mapped.pending_changes() == []
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_identity_map_refreshes_saved_attributes():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, config=config)
+    zone.records.append(pdorclient.Record(
+      name='t0.%s' % tests.TEST_DATA_ZONE, type=pdorclient.Record.TYPE_A,
+      content='192.0.2.0', config=config))
+    zone.save()
+
+    client = pdorclient.Client(path=tests.TMP_CONFIG, identity_map=True)
+    mapped = client.lookup(tests.TEST_DATA_ZONE)
+    mapped.records[0].ttl = 300
+    mapped.save()
+
+    other = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, config=config)
+    other.records[0].ttl = 900
+    other.save()
+
+    assert client.lookup(tests.TEST_DATA_ZONE) is mapped
+    assert mapped.records[0].ttl == 900
+    assert mapped.records[0].name == 't0.%s' % tests.TEST_DATA_ZONE
@@ -0,0 +1,87 @@
+from nose.tools import assert_raises
+import array
+import logging
+import lxml.etree
+import pdorclient
+import pdorclient.columns
+import tests
+
+logger = logging.getLogger(__name__)
+
+def setup():
+    tests.disappear_config()
+
+def teardown():
+    tests.restore_config()
+
+ZONE_TTL = 86400
+
+def make_view():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, ttl=ZONE_TTL, config=config)
+    zone.records.extend([
+      pdorclient.Record(id=1, name='a.%s' % tests.TEST_DATA_ZONE,
+        type=pdorclient.Record.TYPE_A, content='192.0.2.1', ttl=300,
+        config=config),
+      pdorclient.Record(id=2, name='b.%s' % tests.TEST_DATA_ZONE,
+        type=pdorclient.Record.TYPE_A, content='192.0.2.1', ttl=3600,
+        config=config),
+      pdorclient.Record(id=3, name=tests.TEST_DATA_ZONE,
+        type=pdorclient.Record.TYPE_MX, content='mx.%s' %
+        tests.TEST_DATA_ZONE, prio=10, config=config),
+    ])
+    return pdorclient.columns.from_records(zone.records)
+
+def test_lookup_matches_records():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    view = pdorclient.columns.lookup('example.com', config=config)
+    zone = pdorclient.Zone.lookup('example.com', config=config)
+    assert len(view) == len(zone.records) > 0
+    assert list(view.rows()) == list(pdorclient.columns.from_records(
+      zone.records).rows())
+    for (column, typecode) in pdorclient.columns.NUMERIC:
+        assert isinstance(getattr(view, column), array.array)
+
+    mx = pdorclient.columns.lookup('example.com', config=config,
+      types=['MX'])
+    assert list(mx.rows()) == list(view.filter(type='MX').rows())
+
+def test_count_and_group():
+    view = make_view()
+    assert view.count('type') == {pdorclient.Record.TYPE_A: 2,
+      pdorclient.Record.TYPE_MX: 1}
+    assert view.count('ttl') == {300: 1, 3600: 1, ZONE_TTL: 1}
+    groups = view.group('content')
+    assert sorted(groups['192.0.2.1'].id) == [1, 2]
+    assert list(groups['mx.%s' % tests.TEST_DATA_ZONE].prio) == [10]
+
+def test_filter():
+    view = make_view()
+    assert list(view.filter(type='a').id) == [1, 2]
+    assert list(view.filter(type=[pdorclient.Record.TYPE_MX, 'A'],
+      ttl=lambda ttl: ttl < 3600).id) == [1]
+    assert list(view.filter(content='192.0.2.1', ttl=3600).id) == [2]
+    assert len(view.filter(name='nonexistent')) == 0
+    assert list(view.filter().rows()) == list(view.rows())
+
+def test_records_without_a_ttl_take_their_zones():
+    domain = lxml.etree.fromstring('<domain><ttl>%d</ttl><records>'
+      '<record><id>1</id><type>A</type><ttl>300</ttl></record>'
+      '<record><id>2</id><type>A</type></record>'
+      '</records></domain>' % ZONE_TTL)
+    records = domain.findall('records/record')
+    assert list(pdorclient.columns.from_xml(records).ttl) == [300, ZONE_TTL]
+
+    for r in records:
+        domain.find('records').remove(r)
+    assert list(pdorclient.columns.from_xml(records, ttl=60).ttl) == \
+      [300, 60]
+    assert_raises(ValueError, pdorclient.columns.from_xml, records)
+
+    record = pdorclient.Record(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Record.TYPE_A, content='192.0.2.1',
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+    assert list(pdorclient.columns.from_records([record], ttl=60).ttl) == \
+      [60]
+    assert_raises(ValueError, pdorclient.columns.from_records, [record])
@@ -39,6 +39,26 @@ def test_for_something_that_looks_like_a_set_of_credentials():
     assert len(username) > 0
     assert len(password) > 0
 
+def test_request_body_defaults_to_the_query_string():
+    config = pdorclient.Config()
+    assert config.request_body == ('query', False)
+
+@raises(pdorclient.errors.InvalidConfigurationError)
+def test_refuse_unknown_request_body():
+    config = pdorclient.Config()
+    config.config.set('client', 'body', 'yaml')
+    config.request_body
+
+def test_timestamps_default_to_eager():
+    config = pdorclient.Config()
+    assert config.timestamps == 'eager'
+
+@raises(pdorclient.errors.InvalidConfigurationError)
+def test_refuse_unknown_timestamps():
+    config = pdorclient.Config()
+    config.config.set('client', 'timestamps', 'sometimes')
+    config.timestamps
+
 def test_auth_credentials_are_actually_valid():
     config = pdorclient.Config()
     url = config.url
@@ -0,0 +1,63 @@
+import logging
+import pdorclient
+import subprocess
+import sys
+import tests
+
+logger = logging.getLogger(__name__)
+
+# Best wall time allowed for ``import pdorclient`` in a fresh
+# interpreter, as a share of the best time for ``import restclient``
+# measured alongside it.  ``restclient`` alone takes several times as
+# long as ``pdorclient`` should.
+IMPORT_BUDGET = 0.5
+RUNS = 5
+
+# Dependencies that ``import pdorclient`` must leave for later.
+DEFERRED = ('ConfigParser', 'httplib', 'httplib2', 'lxml', 'restclient',
+  'simplejson')
+
+def run(code):
+    """Run ``code`` in a fresh interpreter and return what it
+    prints."""
+    p = subprocess.Popen([sys.executable, '-c', code],
+      stdout=subprocess.PIPE)
+    out = p.communicate()[0]
+    assert p.returncode == 0
+    return out
+
+def loaded(code):
+    """Return the ``DEFERRED`` modules loaded after running ``code``."""
+    return run('import sys\n%s\nprint " ".join(filter(sys.modules.get, '
+      '%r))' % (code, DEFERRED)).split()
+
+def test_import_defers_dependencies():
+    assert loaded('import pdorclient') == []
+    assert loaded('import pdorclient.fanout, pdorclient.journal') == []
+
+def import_seconds(module):
+    """Return the wall time taken to import ``module`` in a fresh
+    interpreter."""
+    return float(run('import time\n'
+      'start = time.time()\n'
+      'import %s\n'
+      'print time.time() - start' % module))
+
+def test_import_within_budget():
+    # Interleaved, so that both see the same load on the host.
+    times = map(lambda i: (import_seconds('pdorclient'),
+      import_seconds('restclient')), range(RUNS))
+    (seconds, baseline) = map(min, zip(*times))
+    logger.debug('import pdorclient: %.3fs, restclient: %.3fs' % (
+      seconds, baseline))
+    assert seconds < baseline * IMPORT_BUDGET
+
+def test_lookup_id_leaves_restclient_and_lxml_alone():
+    modules = loaded('import pdorclient, pdorclient.errors\n'
+      'try:\n'
+      '    pdorclient.Zone.lookup_id(%r)\n'
+      'except pdorclient.errors.NameNotFoundError:\n'
+      '    pass' % tests.TEST_DATA_ZONE)
+    assert 'simplejson' in modules
+    assert 'restclient' not in modules
+    assert 'lxml' not in modules
@@ -0,0 +1,78 @@
+from nose.tools import with_setup
+import logging
+import os
+import pdorclient
+import pdorclient.journal
+import tests
+
+logger = logging.getLogger(__name__)
+
+JOURNAL = 'pdorclient.journal~'
+
+def remove_journal():
+    if os.path.exists(JOURNAL):
+        os.unlink(JOURNAL)
+
+@with_setup(remove_journal, remove_journal)
+def test_unfinished_entries_survive_reopen():
+    journal = pdorclient.journal.Journal(JOURNAL, sync_every=1)
+    first = journal.plan(('POST', '/domains/1/records', ['record[a]=1']))
+    second = journal.plan(('DELETE', '/domains/1/records/2', []))
+    assert journal.plan(None) is None
+    journal.done(first, 3)
+    journal.close()
+
+    journal = pdorclient.journal.Journal(JOURNAL)
+    unfinished = journal.unfinished()
+    assert len(unfinished) == 1
+    assert unfinished[0]['seq'] == second
+    assert unfinished[0]['method'] == 'DELETE'
+    assert unfinished[0]['path'] == '/domains/1/records/2'
+
+    # Sequence numbers carry on where the last journal left off.
+    assert journal.plan(('PUT', '/domains/1', [])) > second
+    journal.close()
+
+@with_setup(remove_journal, remove_journal)
+def test_completed_posts_are_synced_at_once():
+    journal = pdorclient.journal.Journal(JOURNAL)
+    post = journal.plan(('POST', '/domains/1/records', ['record[a]=1']))
+    delete = journal.plan(('DELETE', '/domains/1/records/2', []))
+    journal.sync()
+    journal.done(post, 3)
+    journal.done(delete)
+
+    # As read after a crash: the DELETE may be replayed, the POST not.
+    unfinished = pdorclient.journal.Journal(JOURNAL).unfinished()
+    assert map(lambda entry: entry['seq'], unfinished) == [delete]
+    journal.close()
+
+@with_setup(remove_journal, remove_journal)
+def test_truncated_entry_is_ignored():
+    journal = pdorclient.journal.Journal(JOURNAL)
+    journal.plan(('DELETE', '/domains/1/records/2', []))
+    journal.close()
+    open(JOURNAL, 'a').write('{"seq": 2, "event": "pl')
+
+    journal = pdorclient.journal.Journal(JOURNAL)
+    assert len(journal.unfinished()) == 1
+    journal.close()
+
+@with_setup(remove_journal, remove_journal)
+def test_nothing_unfinished_after_save():
+    tests.nuke_zone()
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER,
+      ttl=tests.TEST_DATA_TTL,
+      config=pdorclient.Config())
+    zone.records.append(pdorclient.Record(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Record.TYPE_NS,
+      content='ns1.%s' % tests.TEST_DATA_ZONE,
+      config=pdorclient.Config()))
+
+    with pdorclient.journal.Journal(JOURNAL) as journal:
+        zone.save(journal=journal)
+        assert journal.unfinished() == []
+        zone.delete(journal=journal)
+        assert journal.unfinished() == []
+        assert journal.resume() == 0
@@ -0,0 +1,108 @@
+import StringIO
+import datetime
+import logging
+import pdorclient
+import pdorclient.errors
+import pdorclient.jsonl
+import simplejson
+import tests
+
+logger = logging.getLogger(__name__)
+
+def make_record(**kwargs):
+    attrs = {
+      'name': 'www.%s' % tests.TEST_DATA_ZONE,
+      'type': pdorclient.Record.TYPE_MX,
+      'content': 'mail.%s' % tests.TEST_DATA_ZONE,
+      'ttl': tests.TEST_DATA_TTL,
+      'prio': 10,
+      'config': pdorclient.Config(),
+    }
+    attrs.update(kwargs)
+    return pdorclient.Record(**attrs)
+
+def test_to_dict_is_typed():
+    d = make_record(id=42, domain_id=7,
+      created_at=datetime.datetime(2011, 5, 23, 7, 0, 0)).to_dict()
+    assert d['id'] == 42
+    assert d['domain_id'] == 7
+    assert d['type'] == 'MX'
+    assert d['ttl'] == tests.TEST_DATA_TTL
+    assert d['prio'] == 10
+    assert d['created_at'] == '2011-05-23T07:00:00Z'
+    assert d['updated_at'] is None
+
+def test_round_trip():
+    records = [make_record(), make_record(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Record.TYPE_TXT, content=tests.TEST_DATA_NOTES,
+      prio=None)]
+    f = StringIO.StringIO()
+    pdorclient.jsonl.dump(records, f, zone=tests.TEST_DATA_ZONE)
+    lines = f.getvalue().splitlines()
+    assert len(lines) == 2
+    assert simplejson.loads(lines[0])['zone'] == tests.TEST_DATA_ZONE
+
+    parsed = list(pdorclient.jsonl.parse(lines,
+      config=pdorclient.Config()))
+    assert map(lambda r: r.to_dict(), parsed) == \
+      map(lambda r: r.to_dict(), records)
+
+def test_parse_drops_ids():
+    line = simplejson.dumps(make_record(id=42, domain_id=7).to_dict())
+    (r,) = pdorclient.jsonl.parse([line], domain_id=8,
+      config=pdorclient.Config())
+    assert r.id is None
+    assert r.domain_id == 8
+
+def test_parse_in_processes():
+    lines = map(lambda i: simplejson.dumps(make_record(id=i,
+      content='mail%d.%s' % (i, tests.TEST_DATA_ZONE)).to_dict()) + '\n',
+      range(25))
+    lines.insert(10, '\n')
+    config = pdorclient.Config()
+    parsed = list(pdorclient.jsonl.parse(lines, domain_id=8,
+      config=config))
+    fanned = list(pdorclient.jsonl.parse(lines, domain_id=8,
+      config=config, processes=2))
+    assert len(fanned) == 25
+    assert map(lambda r: r.to_dict(), fanned) == \
+      map(lambda r: r.to_dict(), parsed)
+    assert fanned[0].id is None
+    assert fanned[0].domain_id == 8
+
+def test_parse_in_processes_raises_worker_errors():
+    lines = [simplejson.dumps(make_record().to_dict()), '{"ttl": "x"}']
+    try:
+        list(pdorclient.jsonl.parse(lines, config=pdorclient.Config(),
+          processes=2))
+    except ValueError:
+        pass
+    else:
+        assert False
+
+def test_export_and_load():
+    tests.nuke_zone()
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, ttl=tests.TEST_DATA_TTL,
+      config=pdorclient.Config())
+    zone.save()
+
+    lines = map(lambda i: simplejson.dumps({
+      'name': 'host%d.%s' % (i, tests.TEST_DATA_ZONE),
+      'type': 'A',
+      'content': '192.0.2.%d' % i}), range(10))
+    assert pdorclient.jsonl.load(zone, lines, concurrency=4) == (10, [])
+
+    f = StringIO.StringIO()
+    pdorclient.jsonl.export(tests.TEST_DATA_ZONE, f)
+    exported = map(simplejson.loads, f.getvalue().splitlines())
+    assert len(exported) == 10
+    assert sorted(map(lambda d: d['content'], exported)) == \
+      sorted(map(lambda i: '192.0.2.%d' % i, range(10)))
+    assert set(map(lambda d: d['domain_id'], exported)) == set([zone.id])
+
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE)
+    assert map(lambda r: r.to_dict(), zone.records) == \
+      map(lambda r: r.to_dict(),
+        pdorclient.Zone.irecords(tests.TEST_DATA_ZONE))
+    zone.delete()
@@ -1,10 +1,15 @@
 from nose.tools import raises, with_setup
+import StringIO
 import datetime
 import logging
+import lxml.etree
 import pdorclient
 import pdorclient.errors
+import pdorclient.utils
 import tests
 import time
+import urllib
+import zlib
 
 logger = logging.getLogger(__name__)
 
@@ -243,6 +248,48 @@ def test_add_ptr_record():
     logging.debug('zone after save(): %r' % zone)
     assert record._state == record.STATE_AT_REST
 
+def test_add_record_with_a_request_body():
+    # Rails does not inflate gzip request bodies by default; see
+    # ``test_encode_a_gzip_request_body``.
+    for encoding in ('form', 'xml'):
+        config = pdorclient.Config(path=tests.TMP_CONFIG)
+        config.config.set('client', 'body', encoding)
+        config.config.set('client', 'body_gzip', 'no')
+        name = 'body-%s.%s' % (encoding, tests.TEST_DATA_ZONE)
+
+        zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, config=config)
+        zone.records.append(pdorclient.Record(name=name,
+          type=pdorclient.Record.TYPE_TXT,
+          content=tests.TEST_DATA_NOTES * 20,
+          config=config))
+        zone.save()
+
+        zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, match=name,
+          config=config)
+        assert len(zone.records) == 1
+        assert zone.records[0].content == tests.TEST_DATA_NOTES * 20
+
+        zone.records[0].content = tests.TEST_DATA_NOTES
+        zone.save()
+        zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, match=name,
+          config=config)
+        assert zone.records[0].content == tests.TEST_DATA_NOTES
+
+        zone.records[0].delete()
+
+def test_encode_a_gzip_request_body():
+    qp = ['record[name]=body.%s' % tests.TEST_DATA_ZONE,
+      'record[content]=%s' % urllib.quote(tests.TEST_DATA_NOTES)]
+    (body, headers) = pdorclient.utils.encode_body(qp, 'xml', True)
+
+    assert headers == {'Content-Type': 'application/xml; charset=utf-8',
+      'Content-Encoding': 'gzip'}
+    record = lxml.etree.fromstring(zlib.decompress(body,
+      16 + zlib.MAX_WBITS))
+    assert record.tag == 'record'
+    assert record.findtext('name') == 'body.%s' % tests.TEST_DATA_ZONE
+    assert record.findtext('content') == tests.TEST_DATA_NOTES
+
 def test_record_ttls_match_zone_ttl():
     zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE,
       config=pdorclient.Config(path=tests.TMP_CONFIG))
@@ -344,3 +391,267 @@ def test_remove_multiple_records_with_a_mask():
       config=pdorclient.Config(path=tests.TMP_CONFIG))
     after = len(zone.records)
     assert before - N_NS_A_RECORDS == after
+
+def test_pending_changes():
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER,
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+    assert zone.pending_changes() == []
+
+    record = pdorclient.Record(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Record.TYPE_NS,
+      content='ns1.%s' % tests.TEST_DATA_ZONE,
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+    zone.records.append(record)
+    assert zone.pending_changes() == [('create', record)]
+
+    # New records remain new, however often they are modified.
+    record.content = 'ns2.%s' % tests.TEST_DATA_ZONE
+    assert record._state == record.STATE_NEW
+    assert zone.pending_changes() == [('create', record)]
+
+    zone.records.remove(record)
+    assert zone.pending_changes() == []
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_only_pending_changes_are_persisted():
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER,
+      ttl=tests.TEST_DATA_TTL,
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+    zone.records = [
+      pdorclient.Record(name='a.%s' % tests.TEST_DATA_ZONE,
+        type=pdorclient.Record.TYPE_A,
+        content='1.1.1.1',
+        config=pdorclient.Config(path=tests.TMP_CONFIG)),
+      pdorclient.Record(name='b.%s' % tests.TEST_DATA_ZONE,
+        type=pdorclient.Record.TYPE_A,
+        content='2.2.2.2',
+        config=pdorclient.Config(path=tests.TMP_CONFIG)),
+    ]
+    zone.save()
+    assert zone.pending_changes() == []
+
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE,
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+    assert zone.pending_changes() == []
+    records = sorted(zone.records, key=lambda r: r.name)
+    records[0].content = '3.3.3.3'
+    zone.records.remove(records[1])
+    assert zone.pending_changes() == [
+      ('delete', records[1]), ('update', records[0])]
+    zone.save()
+    assert zone.pending_changes() == []
+    assert records[1]._state == pdorclient.Record.STATE_DELETED
+
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE,
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+    assert len(zone.records) == 1
+    assert zone.records[0].content == '3.3.3.3'
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_reload():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER,
+      ttl=tests.TEST_DATA_TTL,
+      config=config)
+    zone.records = map(lambda i: pdorclient.Record(
+      name='%s.%s' % (i, tests.TEST_DATA_ZONE),
+      type=pdorclient.Record.TYPE_A,
+      content='1.1.1.%d' % i,
+      config=config), range(3))
+    zone.save()
+    records = sorted(zone.records, key=lambda r: r.name)
+
+    # Change the records behind our backs.
+    other = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, config=config)
+    for r in other.records:
+        r.content = r.content.replace('1.1.1.', '2.2.2.')
+    other.notes = tests.TEST_DATA_NOTES
+    other.save()
+    other.delete_records(lambda r: r.name.startswith('2.'))
+
+    paths = []
+    stream = pdorclient.Resource.RestClient.stream
+    def logged(self, path, headers=None):
+        paths.append(path)
+        return stream(self, path, headers)
+
+    records[1].ttl = 60
+    pdorclient.Resource.RestClient.stream = logged
+    try:
+        records[0].reload()
+        (reloaded, errors) = pdorclient.Resource.reload_many(records[1:])
+        zone.reload()
+    finally:
+        pdorclient.Resource.RestClient.stream = stream
+
+    assert sorted(paths) == sorted(['/domains/%s/records/%s' % (zone.id,
+      r.id) for r in records] + ['/domains/%s?record=faffenblorg' %
+      zone.id])
+    assert records[0].content == '2.2.2.0'
+    assert records[0]._state == pdorclient.Record.STATE_AT_REST
+    assert reloaded == 1
+    assert map(lambda (r, e): r, errors) == [records[2]]
+
+    # Unsaved changes survive a reload.
+    assert records[1].content == '2.2.2.1'
+    assert records[1].ttl == 60
+    assert zone.pending_changes() == [('update', records[1])]
+
+    assert zone.notes == tests.TEST_DATA_NOTES
+    assert len(zone.records) == 3
+
+def test_reload_after_save_picks_up_changes_made_elsewhere():
+    record_xml = '<?xml version="1.0" encoding="UTF-8"?><record>' \
+      '<content>192.0.2.1</content><domain-id type="integer">7' \
+      '</domain-id><id type="integer">42</id><name>%s</name>' \
+      '<ttl type="integer">%%d</ttl><type>A</type></record>' % \
+      tests.TEST_DATA_ZONE.upper()
+    server = {'ttl': 600}
+    sent = []
+
+    def send(config, method, path, qp=None):
+        sent.append((method, path, qp))
+        for q in qp or ():
+            if q.startswith('record[ttl]='):
+                server['ttl'] = int(q.split('=')[1])
+        return record_xml % server['ttl']
+
+    def stream(self, path, headers=None):
+        return pdorclient.utils.ResponseBody(
+          StringIO.StringIO(record_xml % server['ttl']))
+
+    record = pdorclient.Record.from_xml(record_xml % server['ttl'],
+      pdorclient.Config(path=tests.TMP_CONFIG))
+    (_send, _stream) = (pdorclient.Resource.__dict__['_send'],
+      pdorclient.Resource.RestClient.stream)
+    pdorclient.Resource._send = staticmethod(send)
+    pdorclient.Resource.RestClient.stream = stream
+    try:
+        record.ttl = 300
+        record.save()
+        server['ttl'] = 900
+        record.reload()
+        assert record.ttl == 900
+        # Values from the server are normalised as on construction.
+        assert record.name == tests.TEST_DATA_ZONE
+
+        record.content = '192.0.2.2'
+        record.save()
+    finally:
+        pdorclient.Resource._send = _send
+        pdorclient.Resource.RestClient.stream = _stream
+
+    assert not filter(lambda q: q.startswith('record[ttl]='), sent[-1][2])
+    assert server['ttl'] == 900
+
+@raises(pdorclient.errors.PrematurePersistError)
+def test_refuse_to_reload_a_new_record():
+    pdorclient.Record(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Record.TYPE_NS,
+      content='ns1.%s' % tests.TEST_DATA_ZONE,
+      config=pdorclient.Config(path=tests.TMP_CONFIG)).reload()
+
+def test_from_xml():
+    record = pdorclient.Record.from_xml(
+      '<?xml version="1.0" encoding="UTF-8"?>'
+      '<record type="TXT">'
+        '<content>%s\n"quoted"</content>'
+        '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+        '<domain-id type="integer">7</domain-id>'
+        '<id type="integer">42</id>'
+        '<name>%s</name>'
+        '<prio type="integer" nil="true"></prio>'
+        '<ttl type="integer">600</ttl>'
+        '<type>A</type>'
+        '<updated-at nil="true"></updated-at>'
+        '<unknown-to-us>ignored</unknown-to-us>'
+      '</record>' % (tests.TEST_DATA_NOTES.replace('&', '&amp;'),
+        tests.TEST_DATA_ZONE),
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+
+    assert record.id == 42
+    assert record.domain_id == 7
+    assert record.name == tests.TEST_DATA_ZONE
+    # The element's attribute wins over its child.
+    assert record.type == pdorclient.Record.TYPE_TXT
+    assert record.content == '%s\n"quoted"' % tests.TEST_DATA_NOTES
+    assert record.ttl == 600
+    assert record.prio == 0
+    assert record.created_at == datetime.datetime(2011, 5, 23, 7, 0, 0)
+    assert record.updated_at is None
+
+def test_from_xml_with_lazy_timestamps():
+    xml = ('<record>'
+        '<content>192.0.2.1</content>'
+        '<created-at type="datetime">2011-05-23T07:00:00Z</created-at>'
+        '<id type="integer">%d</id>'
+        '<name>%s</name>'
+        '<type>A</type>'
+        '<updated-at nil="true"></updated-at>'
+      '</record>')
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    (a, b) = map(lambda id: pdorclient.Record.from_xml(
+      xml % (id, tests.TEST_DATA_ZONE), config, lazy=True), (1, 2))
+
+    assert a._repr['created_at'] == '2011-05-23T07:00:00Z'
+    assert a.to_dict()['created_at'] == '2011-05-23T07:00:00Z'
+    assert a.created_at == datetime.datetime(2011, 5, 23, 7, 0, 0)
+    assert a._repr['created_at'] is a.created_at
+    # Equal timestamps are decoded once.
+    assert b.created_at is a.created_at
+    assert b.updated_at is None
+
+def test_timestamps_decode_as_strptime_does():
+    fmt = pdorclient.Record.ENCODED_DATE_FMT
+    for value in ('2011-05-23T07:00:00Z', '1999-12-31T23:59:59Z'):
+        assert pdorclient.utils.strptime(value, fmt) == \
+          datetime.datetime(*(time.strptime(value, fmt)[0:6]))
+    assert pdorclient.utils.strptime('2011-05-23 07:00', '%Y-%m-%d %H:%M') \
+      == datetime.datetime(2011, 5, 23, 7, 0)
+    try:
+        pdorclient.utils.strptime('2011-05-23T07:0x:00Z', fmt)
+    except ValueError:
+        pass
+    else:
+        assert False, 'Malformed timestamp was decoded'
+
+def test_type_filter_reads_types_as_the_decoder_does():
+    root = pdorclient.utils.xmlparse('<records>'
+      '<record><id>1</id><name>a.%(zone)s</name><type>mx</type>'
+        '<content>mx.%(zone)s</content></record>'
+      '<record type="MX"><id>2</id><name>b.%(zone)s</name><type>A</type>'
+        '<content>mx.%(zone)s</content></record>'
+      '<record><id>3</id><name>c.%(zone)s</name><type>A</type>'
+        '<content>192.0.2.1</content></record>'
+      '</records>' % {'zone': tests.TEST_DATA_ZONE})
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    decoded = map(lambda r: pdorclient.Record.from_xml(r, config),
+      root.iterchildren('record'))
+    kept = pdorclient.Record._of_types(root.iterchildren('record'),
+      pdorclient.Record._types(['MX']))
+    assert map(lambda r: int(r.findtext('id')), kept) == map(
+      lambda r: r.id, filter(lambda r: r.type == pdorclient.Record.TYPE_MX,
+      decoded)) == [1, 2]
+
+def test_dirty_parameterisation_is_stable():
+    record = pdorclient.Record.from_xml(
+      '<record>'
+        '<content>1.1.1.1</content>'
+        '<domain-id type="integer">7</domain-id>'
+        '<id type="integer">42</id>'
+        '<name>%s</name>'
+        '<ttl type="integer">600</ttl>'
+        '<type>A</type>'
+      '</record>' % tests.TEST_DATA_ZONE,
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+
+    record.ttl = 300
+    record.content = '2.2.2.2'
+    record.ttl = 900
+    record.content = '3.3.3.3'
+
+    assert record._parameterise() == ['record[content]=3.3.3.3',
+      'record[ttl]=900']
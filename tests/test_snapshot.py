@@ -0,0 +1,77 @@
+from nose.tools import raises, with_setup
+import logging
+import os
+import pdorclient
+import pdorclient.errors
+import pdorclient.snapshot
+import tests
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT = 'pdorclient.snapshot~'
+
+def remove_snapshot():
+    if os.path.exists(SNAPSHOT):
+        os.unlink(SNAPSHOT)
+
+def make_zone(notes=tests.TEST_DATA_NOTES):
+    zone = tests.make_zone(save=False, notes=notes)
+    zone.records.append(pdorclient.Record(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Record.TYPE_NS,
+      content='ns1.%s' % tests.TEST_DATA_ZONE,
+      config=pdorclient.Config()))
+    zone.records.append(pdorclient.Record(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Record.TYPE_MX,
+      content='mx.%s' % tests.TEST_DATA_ZONE,
+      prio=10,
+      config=pdorclient.Config()))
+    return zone
+
+@with_setup(remove_snapshot, remove_snapshot)
+def test_dump_and_load_round_trip():
+    zone = make_zone('%s\twith a tab\nand a newline\\' %
+      tests.TEST_DATA_NOTES)
+    pdorclient.snapshot.dump(zone, SNAPSHOT)
+    loaded = pdorclient.snapshot.load(SNAPSHOT)
+
+    assert loaded.name == zone.name
+    assert loaded.type == zone.type
+    assert loaded.ttl == zone.ttl
+    assert loaded.notes == zone.notes
+    assert len(loaded.records) == 2
+    for (mine, theirs) in zip(zone.records, loaded.records):
+        assert mine.name == theirs.name
+        assert mine.type == theirs.type
+        assert mine.content == theirs.content
+        assert mine.prio == theirs.prio
+
+@with_setup(remove_snapshot, remove_snapshot)
+def test_scan_does_not_create_records():
+    pdorclient.snapshot.dump(make_zone(), SNAPSHOT)
+    rows = list(pdorclient.snapshot.scan(SNAPSHOT))
+    assert len(rows) == 2
+    row = dict(zip(pdorclient.snapshot.RECORD_FIELDS, rows[1]))
+    assert row['type'] == 'MX'
+    assert row['prio'] == '10'
+    assert row['id'] is None
+
+@with_setup(remove_snapshot, remove_snapshot)
+@raises(pdorclient.errors.SnapshotFormatError)
+def test_load_raises_snapshot_format_error_on_garbage():
+    open(SNAPSHOT, 'w').write('I am not a snapshot\n')
+    pdorclient.snapshot.load(SNAPSHOT)
+
+@with_setup(remove_snapshot, remove_snapshot)
+def test_lookup_refreshes_stale_snapshot():
+    tests.nuke_zone()
+    zone = make_zone()
+    zone.save()
+
+    first = pdorclient.snapshot.lookup(tests.TEST_DATA_ZONE, SNAPSHOT)
+    assert os.path.exists(SNAPSHOT)
+    second = pdorclient.snapshot.lookup(tests.TEST_DATA_ZONE, SNAPSHOT)
+    assert second.id == first.id
+    assert sorted(map(lambda r: r.id, second.records)) == \
+      sorted(map(lambda r: r.id, first.records))
+
+    zone.delete()
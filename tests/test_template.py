@@ -1,4 +1,4 @@
-from nose.tools import raises, with_setup
+from nose.tools import assert_raises, raises, with_setup
 import datetime
 import logging
 import pdorclient
@@ -70,3 +70,23 @@ def test_add_empty_template():
     assert template.updated_at == None
 
     template.save()
+
+def test_lookup_remembers_misses():
+    client = pdorclient.Client(path=tests.TMP_CONFIG)
+    paths = []
+    stream = pdorclient.Resource.RestClient.stream
+    def counted(self, path, headers=None):
+        paths.append(path)
+        return stream(self, path, headers)
+
+    pdorclient.Resource.RestClient.stream = counted
+    try:
+        for i in range(3):
+            assert_raises(pdorclient.errors.NameNotFoundError,
+              client.template, 'No Such Data Center')
+        assert_raises(pdorclient.errors.NameNotFoundError,
+          pdorclient.Template.lookup, 'No Such Data Center', client)
+    finally:
+        pdorclient.Resource.RestClient.stream = stream
+
+    assert paths == ['/zone_templates'] * 2
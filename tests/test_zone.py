@@ -1,9 +1,14 @@
-from nose.tools import raises, with_setup
+from nose.tools import assert_raises, raises, with_setup
+import BaseHTTPServer
+import base64
 import datetime
 import logging
 import pdorclient
 import pdorclient.errors
+import pdorclient.fanout
+import socket
 import tests
+import threading
 import time
 
 logger = logging.getLogger(__name__)
@@ -46,6 +51,33 @@ def test_lookup_seeded():
     assert zone.updated_at >= zone.created_at
     assert isinstance(zone.ttl, int)
 
+def test_lookup_with_lazy_timestamps():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = pdorclient.Zone.lookup('example.com', config=config)
+    config.config.set('client', 'timestamps', 'lazy')
+    lazy = pdorclient.Zone.lookup('example.com', config=config)
+
+    assert isinstance(lazy._repr['created_at'], str)
+    assert isinstance(lazy.records[0]._repr['updated_at'], str)
+    assert lazy.to_dict() == zone.to_dict()
+    assert map(lambda r: r.to_dict(), lazy.records) == \
+      map(lambda r: r.to_dict(), zone.records)
+    assert lazy.created_at == zone.created_at
+    assert isinstance(lazy._repr['created_at'], datetime.datetime)
+    assert map(lambda r: r.updated_at, lazy.records) == \
+      map(lambda r: r.updated_at, zone.records)
+
+def test_lookup_shares_repeated_values():
+    zone = pdorclient.Zone.lookup('example.com',
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+
+    seen = {}
+    for r in zone.records:
+        for value in (r.name, r.content, r.ttl, r._repr['domain_id']):
+            assert seen.setdefault(value, value) is value
+    assert len(set(map(lambda r: r.name, zone.records))) < \
+      len(zone.records)
+
 def test_lookup_seeded_without_rrs():
     zone = pdorclient.Zone.lookup('example.com',
       match=False,
@@ -254,3 +286,336 @@ def test_add_zone_with_invalid_master():
       type=pdorclient.Zone.TYPE_SLAVE,
       master='1.2.3.4.9.8.7.6',
       config=pdorclient.Config(path=tests.TMP_CONFIG))
+
+def test_lookup_many():
+    (zones, errors) = pdorclient.Zone.lookup_many(
+      ['example.com', tests.TEST_DATA_ZONE, 'example.com'],
+      concurrency=2,
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+
+    assert zones.keys() == ['example.com']
+    assert isinstance(zones['example.com'], pdorclient.Zone)
+    assert zones['example.com'].id == 1
+    assert len(zones['example.com'].records) > 0
+    assert errors.keys() == [tests.TEST_DATA_ZONE]
+    assert isinstance(errors[tests.TEST_DATA_ZONE],
+      pdorclient.errors.NameNotFoundError)
+
+def test_lookup_many_reports_failed_searches_per_name():
+    # The search for the parent fails once and the search for one name
+    # always does.
+    searches = []
+    search = pdorclient.Zone.__dict__['_search']
+    def failing(term, config):
+        searches.append(term)
+        if 'bad' in term or searches.count(term) == 1 and \
+          term == 'example.com':
+            raise RuntimeError(term)
+        return search.__func__(term, config)
+
+    pdorclient.Zone._search = staticmethod(failing)
+    try:
+        # A client of its own starts with an empty ID cache.
+        (zones, errors) = pdorclient.Client(path=tests.TMP_CONFIG
+          ).lookup_many(['example.com', 'bad.example.com'])
+        assert_raises(RuntimeError, pdorclient.Zone.lookup_ids,
+          ['bad.example.com'],
+          config=pdorclient.Config(path=tests.TMP_CONFIG))
+    finally:
+        pdorclient.Zone._search = search
+
+    assert sorted(set(searches)) == ['bad.example.com', 'example.com']
+    assert zones.keys() == ['example.com']
+    assert errors.keys() == ['bad.example.com']
+    assert isinstance(errors['bad.example.com'], RuntimeError)
+
+def test_ilookup_many_without_rrs():
+    results = list(pdorclient.Zone.ilookup_many(['example.com'],
+      match=False,
+      config=pdorclient.Config(path=tests.TMP_CONFIG)))
+
+    assert len(results) == 1
+    (name, zone, error) = results[0]
+    assert name == 'example.com'
+    assert error is None
+    assert len(zone.records) == 0
+
+def test_lookup_ids():
+    (ids, misses) = pdorclient.Zone.lookup_ids(
+      ['example.com', tests.TEST_DATA_ZONE],
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+
+    assert ids == {'example.com': 1}
+    assert misses == [tests.TEST_DATA_ZONE]
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_lookup_id_remembers_misses_until_saved():
+    client = pdorclient.Client(path=tests.TMP_CONFIG)
+    terms = []
+    search = pdorclient.Zone._search
+    pdorclient.Zone._search = staticmethod(lambda term, config:
+      terms.append(term) or search(term, config))
+    try:
+        for i in range(3):
+            assert_raises(pdorclient.errors.NameNotFoundError,
+              client.lookup_id, tests.TEST_DATA_ZONE)
+        (ids, misses) = pdorclient.Zone.lookup_ids([tests.TEST_DATA_ZONE],
+          config=client, cache=True)
+    finally:
+        pdorclient.Zone._search = staticmethod(search)
+
+    assert terms == [tests.TEST_DATA_ZONE]
+    assert (ids, misses) == ({}, [tests.TEST_DATA_ZONE])
+
+    zone = client.zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER)
+    zone.save()
+    assert client.miss_cache.get((client.url, pdorclient.Zone,
+      tests.TEST_DATA_ZONE)) is None
+    assert client.lookup_id(tests.TEST_DATA_ZONE) == zone.id
+
+def test_saved_zones_are_forgotten_by_every_miss_cache():
+    client = pdorclient.Client(path=tests.TMP_CONFIG)
+    other = pdorclient.Client(path=tests.TMP_CONFIG)
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    for c in (client, other, config):
+        assert_raises(pdorclient.errors.NameNotFoundError,
+          pdorclient.Zone.lookup_id, tests.TEST_DATA_ZONE, c)
+
+    zone = client.zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER)
+    zone.save()
+    for c in (client, other, config):
+        assert pdorclient.Zone.lookup_id(tests.TEST_DATA_ZONE, c,
+          cache=True) == zone.id
+
+def test_search_terms_group_names_by_parent():
+    terms = pdorclient.Zone._search_terms(['1.10.in-addr.arpa',
+      '2.10.in-addr.arpa', 'example.com', 'example.net'])
+    assert terms == ['10.in-addr.arpa', 'example.com', 'example.net']
+
+@raises(pdorclient.errors.Rfc952ViolationError)
+def test_lookup_ids_raise_rfc952_violation_on_nonsense_name():
+    pdorclient.Zone.lookup_ids(['example.com', 'example!com'],
+      config=pdorclient.Config(path=tests.TMP_CONFIG))
+
+def test_fetch_streams_the_response():
+    body = pdorclient.Zone._fetch('example.com', None,
+      pdorclient.Config(path=tests.TMP_CONFIG))
+    assert body.wire_bytes == 0
+
+    records = list(body.xmliterparse('record'))
+    assert len(records) > 0
+    assert body.wire_bytes > 0
+    if body.content_encoding == 'identity':
+        assert body.size == body.wire_bytes
+
+def test_fetch_hands_redirects_and_challenges_to_httplib2():
+    class Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+        def do_GET(self):
+            requests.append((self.path,
+              self.headers.getheader('authorization')))
+            if self.path == '/old':
+                self.reply(302, '', Location='http://%s:%d/new' %
+                  self.server.server_address)
+            elif self.headers.getheader('authorization') is None:
+                self.reply(401, 'Who?', **{'WWW-Authenticate':
+                  'Basic realm="pdor"'})
+            else:
+                self.reply(200, '<domain><name>example.com</name></domain>')
+
+        def reply(self, status, body, **headers):
+            self.send_response(status)
+            for (header, value) in headers.iteritems():
+                self.send_header(header, value)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    requests = []
+    server = BaseHTTPServer.HTTPServer(('127.0.0.1', 0), Handler)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    try:
+        config = pdorclient.Client(path=tests.TMP_CONFIG)
+        config.url = 'http://%s:%d' % server.server_address
+        rc = pdorclient.Resource.RestClient(config)
+        basic = 'Basic %s' % base64.b64encode('%s:%s' % config.credentials)
+
+        # Basic credentials are only sent once they have been asked for.
+        assert rc.stream('/new').read().startswith('<domain>')
+        assert requests == [('/new', None), ('/new', basic)]
+        assert rc.stream('/new').read().startswith('<domain>')
+        assert requests[2:] == [('/new', basic)]
+
+        # A redirect is followed by httplib2 rather than parsed.
+        del requests[:]
+        root = rc.stream('/old').xmlparse()
+        assert root.findtext('name') == 'example.com'
+        assert requests[0] == ('/old', basic)
+        assert requests[-1] == ('/new', basic)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+def test_lookup_in_processes():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = pdorclient.Zone.lookup('example.com', config=config)
+
+    chunk_size = pdorclient.fanout.CHUNK_SIZE
+    pdorclient.fanout.CHUNK_SIZE = 3
+    try:
+        fanned = pdorclient.Zone.lookup('example.com', config=config,
+          processes=2)
+    finally:
+        pdorclient.fanout.CHUNK_SIZE = chunk_size
+
+    assert len(zone.records) > 3
+    assert fanned.to_dict() == zone.to_dict()
+    assert map(lambda r: r.to_dict(), fanned.records) == \
+      map(lambda r: r.to_dict(), zone.records)
+    assert fanned.pending_changes() == []
+
+def test_lookup_with_many_patterns():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    everything = pdorclient.Zone.lookup('example.com', config=config)
+    expected = sorted(map(lambda r: r.id, filter(lambda r:
+      'ns' in r.name or 'mail' in r.name, everything.records)))
+
+    paths = []
+    stream = pdorclient.Resource.RestClient.stream
+    def logged(self, path, headers=None):
+        paths.append(path)
+        return stream(self, path, headers)
+
+    pdorclient.Resource.RestClient.stream = logged
+    try:
+        zone = pdorclient.Zone.lookup('example.com',
+          match=['ns1', 'mail', 'ns', 'ns'], config=config)
+    finally:
+        pdorclient.Resource.RestClient.stream = stream
+
+    # One search, and one query per pattern not covered by another.
+    assert sorted(paths) == ['/domains/1?record=mail',
+      '/domains/1?record=ns', '/search/results?q=example.com']
+    assert len(expected) > 2
+    assert sorted(map(lambda r: r.id, zone.records)) == expected
+    assert zone.pending_changes() == []
+
+    assert pdorclient.Zone.lookup('example.com', match=[],
+      config=config).records == []
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_lookup_with_prefix_patterns():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = pdorclient.Zone(name=tests.TEST_DATA_ZONE,
+      type=pdorclient.Zone.TYPE_MASTER, ttl=tests.TEST_DATA_TTL,
+      config=config)
+    zone.records.extend(map(lambda room: pdorclient.Record(
+      name='%s-host.%s' % (room, tests.TEST_DATA_ZONE),
+      type=pdorclient.Record.TYPE_A, content='192.0.2.1', config=config),
+      ('r404', 'r405', 'r406')))
+    zone.save()
+
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE,
+      match=['R404-', ' r405-', 'r404-h'], config=config)
+    assert sorted(map(lambda r: r.name, zone.records)) == [
+      'r404-host.%s' % tests.TEST_DATA_ZONE,
+      'r405-host.%s' % tests.TEST_DATA_ZONE]
+
+def test_lookup_with_types():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    everything = pdorclient.Zone.lookup('example.com', config=config)
+    for (types, processes) in ((['mx', pdorclient.Record.TYPE_NS], 1),
+      (['MX', 'NS'], 2)):
+        zone = pdorclient.Zone.lookup('example.com', config=config,
+          processes=processes, types=types)
+        assert map(lambda r: r.to_dict(), zone.records) == map(
+          lambda r: r.to_dict(), filter(lambda r: r.type in (
+          pdorclient.Record.TYPE_MX, pdorclient.Record.TYPE_NS),
+          everything.records))
+        assert len(zone.records) > 1
+
+    zone = pdorclient.Zone.lookup('example.com', match=['ns', 'mail'],
+      config=config, types=['A'])
+    assert sorted(map(lambda r: r.name, zone.records)) == [
+      'mail.example.com', 'ns1.example.com', 'ns2.example.com']
+    assert len(list(pdorclient.Zone.irecords('example.com',
+      config=config, types=['SOA']))) == 1
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_remove_zone_without_cascade():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    tests.make_zone(3, config)
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, config=config)
+    records = list(zone.records)
+    assert len(records) == 3
+
+    zone.delete(cascade=False)
+
+    assert zone._state == zone.STATE_DELETED
+    assert zone.id == None
+    assert zone.pending_changes() == []
+    for r in records:
+        assert r._state == r.STATE_DELETED
+        assert r.id == None
+    try:
+        pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, config=config)
+    except pdorclient.errors.NameNotFoundError:
+        pass
+    else:
+        assert False
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_delete_records():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = tests.make_zone(6, config)
+    zone.records.append(pdorclient.Record(
+      name='new.%s' % tests.TEST_DATA_ZONE, type=pdorclient.Record.TYPE_A,
+      content='192.0.2.100', config=config))
+
+    even = lambda r: int(r.content.split('.')[-1]) % 2 == 0
+    (deleted, errors) = zone.delete_records(even, concurrency=3)
+
+    # The unsaved ``new`` record is dropped without being counted.
+    assert (deleted, errors) == (3, [])
+    assert sorted(map(lambda r: r.content, zone.records)) == \
+      ['192.0.2.1', '192.0.2.3', '192.0.2.5']
+    assert zone.pending_changes() == []
+
+    zone = pdorclient.Zone.lookup(tests.TEST_DATA_ZONE, config=config)
+    assert sorted(map(lambda r: r.content, zone.records)) == \
+      ['192.0.2.1', '192.0.2.3', '192.0.2.5']
+
+@with_setup(tests.nuke_zone, tests.nuke_zone)
+def test_delete_records_alongside_a_save():
+    config = pdorclient.Config(path=tests.TMP_CONFIG)
+    zone = tests.make_zone(4, config)
+    failing = zone.records[3]
+
+    deletes = []
+    send = pdorclient.Resource.__dict__['_send']
+    def sending(config, method, path, qp=None):
+        if method == 'DELETE':
+            deletes.append(path)
+            if len(deletes) == 1:
+                # A save while the deletes are in flight.
+                zone.save()
+            if path.endswith('/%s' % failing._id):
+                raise socket.error('Connection reset by peer')
+        return send.__func__(config, method, path, qp)
+
+    pdorclient.Resource._send = staticmethod(sending)
+    try:
+        (deleted, errors) = zone.delete_records(lambda r: True)
+    finally:
+        pdorclient.Resource._send = send
+
+    assert len(deletes) == len(set(deletes)) == 4
+    assert deleted == 3
+    assert map(lambda (r, error): r, errors) == [failing]
+    assert zone.pending_changes() == [('delete', failing)]